@@ -1,5 +1,6 @@
 from django.contrib import admin
 from .models import Artikel, Komentar, Tag
+from main.pagination import EstimatedCountPaginator
 
 
 class KomentarInline(admin.TabularInline):
@@ -13,6 +14,9 @@ class KomentarInline(admin.TabularInline):
 class ArtikelAdmin(admin.ModelAdmin):
     list_display = ['judul', 'penulis', 'kategori', 'status',
                     'tanggal_publikasi', 'tampilan', 'featured']
+    # No COUNT(*) over the whole table on every list page
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_filter = ['status', 'kategori', 'featured', 'tanggal_publikasi']
     search_fields = ['judul', 'konten', 'penulis']
     prepopulated_fields = {'slug': ('judul',)}
@@ -46,6 +50,9 @@ class ArtikelAdmin(admin.ModelAdmin):
 class KomentarAdmin(admin.ModelAdmin):
     list_display = ['nama', 'email',
                     'get_artikel_judul', 'tanggal', 'disetujui']
+    # No COUNT(*) over the whole table on every list page
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     list_filter = ['disetujui', 'tanggal']
     search_fields = ['nama', 'email', 'isi']
     readonly_fields = ['id_komentar', 'tanggal']
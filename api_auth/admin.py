@@ -2,9 +2,13 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from .models import User, Petugas
+from main.pagination import EstimatedCountPaginator
 
 class Admin(UserAdmin):
     list_display = ('email', 'username', 'name', 'is_staff', 'is_superuser')
+    # No COUNT(*) over the whole table on every list page
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     fieldsets = (
         (None, {'fields': ('email', 'username', 'password')}),
         ('Personal info', {'fields': ('name', 'nomor_telepon')}),
@@ -0,0 +1,196 @@
+"""
+Async versions of the login, register and token refresh endpoints.
+
+They keep the JSON contracts and throttling of the views in `api_auth.views`,
+but never block the event loop: password hashing is awaited on the hashing
+pool and database access uses the async ORM, so under ASGI one worker can
+serve many logins while their hashes are computed.
+"""
+import json
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework.exceptions import Throttled
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken, BlacklistedToken
+from rest_framework_simplejwt.tokens import AccessToken
+from .exceptions import hashing_pool_full_response, throttled_response
+from .hashing import HashingPoolFull
+from .models import User
+from .serializers import RegistrationSerializer
+from .sessions import astart_api_session
+from .throttling import LoginRateThrottle, SuccessfulLoginResetThrottle, TokenRefreshRateThrottle
+from .tokens import RefreshToken, tokens_for_user, add_role_claims
+
+def parse_json_body(request):
+    """The JSON object sent as the request body, or None if it is not one."""
+    try:
+        data = json.loads(request.body or b'{}')
+    except (ValueError, UnicodeDecodeError):
+        return None
+    return data if isinstance(data, dict) else None
+
+async def check_throttles(throttle_classes, request, data):
+    """
+    Run DRF throttles against a plain Django request, as `APIView.check_throttles` does.
+    The throttles read the login email from `request.data`, as on a DRF request.
+
+    Raises:
+        Throttled: If any throttle rejects the request.
+    """
+    request.data = data
+    for throttle_class in throttle_classes:
+        throttle = throttle_class()
+        if not await sync_to_async(throttle.allow_request)(request, None):
+            raise Throttled(wait=throttle.wait())
+
+@csrf_exempt
+@require_POST
+async def register(request):
+    """Register a new user, hashing the password without blocking the event loop."""
+    data = parse_json_body(request)
+    if data is None:
+        return JsonResponse({'error': 'Invalid JSON body'}, status=400)
+
+    try:
+        # The sync view runs under the default DRF throttles
+        await check_throttles(api_settings.DEFAULT_THROTTLE_CLASSES, request, data)
+    except Throttled as e:
+        return throttled_response(e)
+
+    # Use the serializer to handle data validation and phone encryption
+    serializer = RegistrationSerializer(data=data)
+    if not await sync_to_async(serializer.is_valid)():
+        return JsonResponse({'error': serializer.errors}, status=400)
+
+    validated_data = serializer.validated_data
+    email = validated_data.get('email')
+    username = validated_data.get('username')
+    password = validated_data.get('password')
+    if not email or not username or not password:
+        return JsonResponse({'error': 'Email, username, and password are required'}, status=400)
+
+    try:
+        await User.objects.aregister(
+            email=email,
+            username=username,
+            name=validated_data.get('name'),
+            password=password,
+            nomor_telepon=validated_data.get('nomor_telepon', None),  # Already encrypted by the serializer
+        )
+        return JsonResponse({'message': 'User registered successfully'}, status=201)
+    except HashingPoolFull as e:
+        return hashing_pool_full_response(e)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+@csrf_exempt
+@require_POST
+async def login(request):
+    """Handle user login with rate limiting, without blocking the event loop."""
+    data = parse_json_body(request)
+    if data is None:
+        return JsonResponse({'error': 'Invalid JSON body'}, status=400)
+
+    try:
+        await check_throttles([LoginRateThrottle], request, data)
+
+        email = data.get('email')
+        password = data.get('password')
+        if not email or not password:
+            return JsonResponse({'error': 'Email and password are required'}, status=400)
+
+        user = await User.objects.alogin(email, password)
+        if not user:
+            return JsonResponse({'error': 'Invalid credentials'}, status=401)
+
+        # Authentication successful, reset rate limit
+        throttle = SuccessfulLoginResetThrottle()
+        await sync_to_async(throttle.reset_throttle_counter)(throttle.get_cache_key(request, None))
+
+        # Issuing the refresh token records it in the outstanding token table
+        refresh = await sync_to_async(tokens_for_user)(user)
+        access = str(refresh.access_token)
+
+        response = JsonResponse({
+            'message': 'Login successful',
+            'token': {
+                'refresh': str(refresh),
+                'access': access
+            },
+            'user': {
+                'id': str(user.id),
+                'email': user.email,
+                'username': user.username,
+                'name': user.name,
+                'is_staff': user.is_staff,
+                'is_superuser': user.is_superuser
+            }
+        }, status=200)
+
+        # Set session data for Django's session-based auth, saved once by SessionMiddleware
+        await astart_api_session(request, user)
+
+        response.set_cookie(key='jwt', value=access, httponly=True, samesite='Lax')
+        return response
+
+    except Throttled as e:
+        return throttled_response(e)
+    except HashingPoolFull as e:
+        return hashing_pool_full_response(e)
+    except Exception as ex:
+        return JsonResponse({'error': str(ex)}, status=400)
+
+@csrf_exempt
+@require_POST
+async def request_access_token(request):
+    """
+    Request a new access token using a refresh token.
+    Includes rate limiting and blacklists the old access token if provided.
+    """
+    data = parse_json_body(request)
+    if data is None:
+        return JsonResponse({'error': 'Invalid JSON body'}, status=400)
+
+    try:
+        await check_throttles([TokenRefreshRateThrottle], request, data)
+
+        refresh_token = data.get('refresh')
+        old_access_token = data.get('access', None)
+        if not refresh_token:
+            return JsonResponse({'error': 'Refresh token is required'}, status=400)
+
+        try:
+            # If old access token provided, blacklist it
+            if old_access_token:
+                try:
+                    jti = AccessToken(old_access_token)['jti']
+                    outstanding_token = await OutstandingToken.objects.filter(jti=jti).afirst()
+                    if outstanding_token:
+                        await BlacklistedToken.objects.aget_or_create(token=outstanding_token)
+                except Exception as blacklist_error:
+                    # Log error but continue with token refresh
+                    print(f"Error blacklisting token: {str(blacklist_error)}")
+
+            # The blacklist check may fall through to the database on a filter hit
+            token = await sync_to_async(RefreshToken)(refresh_token)
+
+            user = await User.objects.select_related('petugas').filter(id=token.payload.get('user_id')).afirst()
+            if user and not user.is_active:
+                return JsonResponse({'error': 'User account is disabled'}, status=401)
+
+            # Generate new access token with the user's current role claims
+            access_token = token.access_token
+            if user:
+                add_role_claims(access_token, user)
+            return JsonResponse({'access': str(access_token)}, status=200)
+
+        except TokenError:
+            return JsonResponse({'error': 'Invalid or expired refresh token'}, status=401)
+
+    except Throttled as e:
+        return throttled_response(e)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=400)
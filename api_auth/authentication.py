@@ -0,0 +1,140 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+from .models import User, Petugas, Admin
+
+DEFAULT_USER_CACHE_SETTINGS = {
+    'MAX_SIZE': 1024,
+    'TTL': 60,
+}
+
+class UserCache:
+    """
+    Per-process LRU cache of resolved users with a time-to-live.
+
+    Entries are dropped when they expire, when the cache is over `max_size`
+    (least recently used first), or when a `User`, `Petugas` or `Admin` row is
+    saved or deleted in this process. Other worker processes only see a change
+    once their entry expires, so keep the TTL short.
+
+    **Methods:**
+        get(user_id):
+            Return the cached user or None.
+        set(user_id, user):
+            Store a user, evicting the least recently used entry if full.
+        invalidate(user_id):
+            Drop a single user.
+        clear():
+            Drop everything.
+        stats():
+            Hit, miss, eviction and invalidation counters.
+    """
+    def __init__(self, max_size=1024, ttl=60, timer=time.monotonic):
+        self.max_size = max(1, int(max_size))
+        self.ttl = ttl
+        self.timer = timer
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+
+    def get(self, user_id):
+        key = str(user_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._counters['misses'] += 1
+                return None
+            expires_at, user = entry
+            if expires_at <= self.timer():
+                del self._entries[key]
+                self._counters['expirations'] += 1
+                self._counters['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters['hits'] += 1
+            return user
+
+    def set(self, user_id, user):
+        key = str(user_id)
+        with self._lock:
+            self._entries[key] = (self.timer() + self.ttl, user)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._counters['evictions'] += 1
+
+    def invalidate(self, user_id):
+        with self._lock:
+            if self._entries.pop(str(user_id), None) is not None:
+                self._counters['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'size': len(self._entries), 'max_size': self.max_size, 'ttl': self.ttl, **self._counters}
+
+_user_cache = None
+_user_cache_lock = threading.Lock()
+
+def get_user_cache():
+    """Return the process-wide user cache, configured from `USER_CACHE`."""
+    global _user_cache
+    if _user_cache is None:
+        with _user_cache_lock:
+            if _user_cache is None:
+                config = {**DEFAULT_USER_CACHE_SETTINGS, **getattr(settings, 'USER_CACHE', {})}
+                _user_cache = UserCache(max_size=config['MAX_SIZE'], ttl=config['TTL'])
+    return _user_cache
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Petugas)
+@receiver(post_save, sender=Admin)
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Petugas)
+@receiver(post_delete, sender=Admin)
+def invalidate_cached_user(sender, instance, **kwargs):
+    get_user_cache().invalidate(instance.pk)
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that resolves users through the per-process `UserCache`.
+
+    Users are loaded together with their `petugas` row, so role checks such as
+    `IsPetugas` or `user.is_petugas` cost no extra query. Each request gets its
+    own shallow copy of the cached instance.
+    """
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        cache = get_user_cache()
+        user = cache.get(user_id)
+        if user is None:
+            try:
+                user = User.objects.select_related('petugas').get(**{api_settings.USER_ID_FIELD: user_id})
+            except User.DoesNotExist:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found")
+            cache.set(user_id, user)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return copy.copy(user)
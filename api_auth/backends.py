@@ -1,6 +1,6 @@
-import hashlib
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
+from . import hashers
 
 User = get_user_model()
 
@@ -9,7 +9,8 @@ class SHA256SaltedAuthBackend(ModelBackend):
     Custom authentication backend for salted SHA-256 passwords.
     
     This backend allows Django admin to authenticate users whose passwords
-    are stored as SHA-256 hashes with salt.
+    are stored as salted hashes from `api_auth.hashers`, upgrading legacy
+    hashes on a successful login.
     """
     
     def authenticate(self, request, username=None, password=None, **kwargs):
@@ -27,22 +28,15 @@ class SHA256SaltedAuthBackend(ModelBackend):
             if not hasattr(user, 'password_salt') or not user.password_salt:
                 return None
                 
-            # Hash the provided password with the stored salt
-            hashed_password = hashlib.pbkdf2_hmac(
-                'sha256', 
-                password.encode(), 
-                user.password_salt.encode(), 
-                100000  # Use the same iteration count as in your create_user method
-            ).hex()
-            
-            # Compare with stored password
-            if user.password == hashed_password:
+            # Verify with whichever hasher produced the stored password
+            if user.check_password(password) and self.user_can_authenticate(user):
+                user.upgrade_password(password)
                 return user
                 
         except User.DoesNotExist:
             # Run this to mitigate timing attacks
             # This ensures the time taken for failed logins is similar to successful ones
             salt = "dummy-salt-for-timing-attack-mitigation"
-            hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), 100000)
+            hashers.make_password(password, salt)
             
         return None
\ No newline at end of file
@@ -0,0 +1,205 @@
+import hashlib
+import math
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+DEFAULT_BLACKLIST_FILTER_SETTINGS = {
+    'SYNC_INTERVAL': 5,
+    'SYNC_OVERLAP': 100,
+    'GENERATION_SECONDS': 3600,
+    'CAPACITY': 10000,
+    'ERROR_RATE': 0.01,
+}
+
+# Shared cache key marking a JTI blacklisted by any process, until the token expires
+REVOKED_KEY = 'token_blacklist:revoked:{}'
+
+def mark_revoked(jti, expires_at):
+    """Mark `jti` as blacklisted in the shared cache, for every worker, until the token expires."""
+    timeout = int((expires_at - timezone.now()).total_seconds())
+    if timeout > 0:
+        cache.set(REVOKED_KEY.format(jti), True, timeout)
+
+def is_marked_revoked(jti):
+    return cache.get(REVOKED_KEY.format(jti)) is not None
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings.
+    Never gives false negatives; false positives happen at roughly `error_rate`
+    while fewer than `capacity` items have been added.
+    """
+    def __init__(self, capacity, error_rate):
+        capacity = max(1, int(capacity))
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Double hashing: derive k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+class BlacklistFilter:
+    """
+    Per-process filter of blacklisted token JTIs in front of the `BlacklistedToken` table.
+
+    A miss means the token was not blacklisted as of the last sync; it is
+    then checked against the shared cache (`REVOKED_KEY`, written when a
+    blacklist row commits), which covers tokens blacklisted since by other
+    processes. Only filter hits fall through to the database. JTIs are
+    grouped into Bloom filter generations by token expiry; a generation is
+    dropped once every token in it has expired, which keeps memory flat as
+    the token tables grow.
+
+    The filter is loaded on first use and kept current by:
+        - `post_save` on `BlacklistedToken` for inserts made by this process
+        - an incremental sync by primary key every `SYNC_INTERVAL` seconds for
+          inserts made by other processes. The last `SYNC_OVERLAP` ids are
+          re-read so rows committed slightly out of id order are not missed.
+
+    Remaining window: a token blacklisted by another process is accepted
+    here only if its cache entry is missing (culled from a full cache, or the
+    cache file was lost), and then until the next sync, `SYNC_INTERVAL`
+    seconds at most. A row committed more than `SYNC_OVERLAP` ids out of
+    order is never synced, so this process relies on the cache entry alone.
+
+    **Methods:**
+        add(jti, expires_at):
+            Record a blacklisted JTI.
+        might_contain(jti):
+            False if the JTI is definitely not blacklisted.
+        is_blacklisted(jti):
+            Filter check, confirmed against the database on a hit.
+        stats():
+            Generation, item and hit/miss counters.
+    """
+    def __init__(self, sync_interval=5, sync_overlap=100, generation_seconds=3600,
+                 capacity=10000, error_rate=0.01, timer=time.monotonic):
+        self.sync_interval = sync_interval
+        self.sync_overlap = sync_overlap
+        self.generation_seconds = generation_seconds
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.timer = timer
+        self._generations = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._last_id = 0
+        self._last_sync = None
+        self._counters = {'checks': 0, 'filter_hits': 0, 'cache_hits': 0, 'db_checks': 0, 'confirmed': 0}
+
+    def _generation_for(self, expires_at):
+        return int(expires_at.timestamp()) // self.generation_seconds
+
+    def _prune(self):
+        current = int(timezone.now().timestamp()) // self.generation_seconds
+        for generation in [g for g in self._generations if g < current]:
+            del self._generations[generation]
+
+    def _add(self, jti, expires_at):
+        generation = self._generation_for(expires_at)
+        if generation < int(timezone.now().timestamp()) // self.generation_seconds:
+            # Already expired, the signature check rejects it anyway
+            return
+        bloom = self._generations.get(generation)
+        if bloom is None:
+            bloom = self._generations[generation] = BloomFilter(self.capacity, self.error_rate)
+        bloom.add(jti)
+
+    def add(self, jti, expires_at):
+        with self._lock:
+            self._add(jti, expires_at)
+
+    def sync(self, force=False):
+        """Load the filter on first use, then pull newly blacklisted JTIs from the database."""
+        now = self.timer()
+        if not force and self._loaded and now - self._last_sync < self.sync_interval:
+            return
+        with self._lock:
+            if not force and self._loaded and now - self._last_sync < self.sync_interval:
+                return
+            rows = BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())
+            if self._loaded:
+                rows = rows.filter(id__gt=max(0, self._last_id - self.sync_overlap))
+            for row_id, jti, expires_at in rows.values_list('id', 'token__jti', 'token__expires_at').iterator():
+                self._add(jti, expires_at)
+                self._last_id = max(self._last_id, row_id)
+            self._prune()
+            self._loaded = True
+            self._last_sync = now
+
+    def might_contain(self, jti):
+        self.sync()
+        return any(jti in bloom for bloom in list(self._generations.values()))
+
+    def is_blacklisted(self, jti):
+        self._counters['checks'] += 1
+        if not self.might_contain(jti):
+            # Blacklisted by another process since the last sync
+            if is_marked_revoked(jti):
+                self._counters['cache_hits'] += 1
+                return True
+            return False
+        self._counters['filter_hits'] += 1
+        self._counters['db_checks'] += 1
+        blacklisted = BlacklistedToken.objects.filter(token__jti=jti).exists()
+        if blacklisted:
+            self._counters['confirmed'] += 1
+        return blacklisted
+
+    def stats(self):
+        generations = list(self._generations.values())
+        return {
+            'generations': len(generations),
+            'items': sum(bloom.count for bloom in generations),
+            'bytes': sum(len(bloom.bits) for bloom in generations),
+            **self._counters,
+        }
+
+_blacklist_filter = None
+_blacklist_filter_lock = threading.Lock()
+
+def get_blacklist_filter():
+    """Return the process-wide blacklist filter, configured from `TOKEN_BLACKLIST_FILTER`."""
+    global _blacklist_filter
+    if _blacklist_filter is None:
+        with _blacklist_filter_lock:
+            if _blacklist_filter is None:
+                config = {**DEFAULT_BLACKLIST_FILTER_SETTINGS, **getattr(settings, 'TOKEN_BLACKLIST_FILTER', {})}
+                _blacklist_filter = BlacklistFilter(
+                    sync_interval=config['SYNC_INTERVAL'],
+                    sync_overlap=config['SYNC_OVERLAP'],
+                    generation_seconds=config['GENERATION_SECONDS'],
+                    capacity=config['CAPACITY'],
+                    error_rate=config['ERROR_RATE'],
+                )
+    return _blacklist_filter
+
+@receiver(post_save, sender=BlacklistedToken)
+def add_blacklisted_token_to_filter(sender, instance, created, **kwargs):
+    if not created:
+        return
+    jti, expires_at = instance.token.jti, instance.token.expires_at
+    if _blacklist_filter is not None:
+        _blacklist_filter.add(jti, expires_at)
+    # Other processes only see the row once it commits
+    transaction.on_commit(lambda: mark_revoked(jti, expires_at))
@@ -1,29 +1,52 @@
+from django.http import JsonResponse
 from rest_framework.views import exception_handler
 from rest_framework.exceptions import Throttled
 from rest_framework.response import Response
 from rest_framework import status
+from .hashing import HashingPoolFull
+
+def hashing_pool_full_response(exc):
+    """Build a fast 503 response with a Retry-After header for a saturated hashing pool."""
+    wait = int(getattr(exc, 'wait', None) or 1)
+    response = JsonResponse({
+        'error': 'Server is busy',
+        'detail': f'Please try again after {wait}s',
+        'wait_seconds': wait,
+    }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    response['Retry-After'] = str(wait)
+    return response
+
+def throttled_error_data(exc):
+    """Response body for a Throttled exception, with the wait time when known."""
+    wait = getattr(exc, 'wait', None)
+    
+    error_data = {
+        'error': 'Too many login attempts',
+        'detail': 'Please try again later'
+    }
+    
+    if wait:
+        minutes, seconds = divmod(int(wait), 60)
+        wait_msg = f"{minutes}m {seconds}s" if minutes else f"{seconds}s"
+        error_data['detail'] = f'Please try again after {wait_msg}'
+        error_data['wait_seconds'] = int(wait)
+    return error_data
+
+def throttled_response(exc):
+    """429 response for views outside DRF's exception handling, e.g. the async views."""
+    return JsonResponse(throttled_error_data(exc), status=status.HTTP_429_TOO_MANY_REQUESTS)
 
 def custom_exception_handler(exc, context):
     """Custom exception handler for more user-friendly throttling messages."""
     # Call REST framework's default exception handler first
     response = exception_handler(exc, context)
     
+    # Saturated password hashing pool
+    if isinstance(exc, HashingPoolFull):
+        return hashing_pool_full_response(exc)
+
     # Handle throttling exceptions specifically
     if isinstance(exc, Throttled):
-        # Calculate wait time
-        wait = getattr(exc, 'wait', None)
-        
-        error_data = {
-            'error': 'Too many login attempts',
-            'detail': 'Please try again later'
-        }
-        
-        if wait:
-            minutes, seconds = divmod(int(wait), 60)
-            wait_msg = f"{minutes}m {seconds}s" if minutes else f"{seconds}s"
-            error_data['detail'] = f'Please try again after {wait_msg}'
-            error_data['wait_seconds'] = int(wait)
-        
-        return Response(error_data, status=status.HTTP_429_TOO_MANY_REQUESTS)
+        return Response(throttled_error_data(exc), status=status.HTTP_429_TOO_MANY_REQUESTS)
     
     return response
\ No newline at end of file
@@ -0,0 +1,219 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from .hashing import PBKDF2_ITERATIONS, get_hashing_pool
+
+try:
+    from argon2.low_level import Type as Argon2Type, hash_secret_raw as argon2_hash_secret_raw
+except ImportError:  # argon2-cffi is optional
+    Argon2Type = None
+    argon2_hash_secret_raw = None
+
+DEFAULT_ALGORITHM = 'pbkdf2_sha256'
+
+class BasePasswordHasher:
+    """
+    Base class for password hashers.
+
+    Encoded hashes have the form `<algorithm>$<cost params...>$<hex digest>`, so
+    every stored password carries the algorithm and cost it was made with. The
+    salt stays in `User.password_salt`.
+
+    **Methods:**
+        encode(password, salt, **params):
+            Hash a password and return the encoded string.
+        verify(password, encoded, salt):
+            Check a password against an encoded string.
+        decode(encoded):
+            Split an encoded string into its cost params and digest.
+        must_update(encoded):
+            Whether the encoded hash was made with a different cost than configured.
+        calibrate(target_seconds, measure):
+            Pick cost params whose hashing time is close to `target_seconds`.
+    """
+    algorithm = None
+    param_names = ()
+    default_params = {}
+
+    def __init__(self, **params):
+        self.params = {**self.default_params, **params}
+
+    def derive(self, password, salt, **params):
+        raise NotImplementedError('Subclasses must implement derive()')
+
+    def encode(self, password, salt, **params):
+        params = {**self.params, **params}
+        digest = self.derive(password, salt, **params)
+        parts = [self.algorithm] + [str(params[name]) for name in self.param_names] + [digest]
+        return '$'.join(parts)
+
+    def decode(self, encoded):
+        algorithm, *values, digest = encoded.split('$')
+        if algorithm != self.algorithm or len(values) != len(self.param_names):
+            raise ValueError(f'Not a {self.algorithm} hash')
+        return {name: int(value) for name, value in zip(self.param_names, values)}, digest
+
+    def verify(self, password, encoded, salt):
+        params, digest = self.decode(encoded)
+        return hmac.compare_digest(self.derive(password, salt, **params), digest)
+
+    def must_update(self, encoded):
+        params, _ = self.decode(encoded)
+        return params != {name: self.params[name] for name in self.param_names}
+
+    def calibrate(self, target_seconds, measure):
+        raise NotImplementedError('Subclasses must implement calibrate()')
+
+class PBKDF2SHA256Hasher(BasePasswordHasher):
+    """PBKDF2 with HMAC-SHA256. Cost is the iteration count."""
+    algorithm = 'pbkdf2_sha256'
+    param_names = ('iterations',)
+    default_params = {'iterations': PBKDF2_ITERATIONS}
+
+    def derive(self, password, salt, iterations):
+        return hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), iterations).hex()
+
+    def calibrate(self, target_seconds, measure):
+        # Cost scales linearly with the iteration count
+        probe = 50000
+        elapsed = measure(iterations=probe)
+        iterations = int(probe * target_seconds / elapsed)
+        return {'iterations': max(10000, round(iterations, -3))}
+
+class LegacyPBKDF2SHA256Hasher(PBKDF2SHA256Hasher):
+    """
+    Hashes created before the hasher registry: a bare hex digest of
+    PBKDF2-SHA256 with 100,000 iterations. Always upgraded on login.
+    """
+    algorithm = 'pbkdf2_sha256_legacy'
+
+    def decode(self, encoded):
+        return {'iterations': PBKDF2_ITERATIONS}, encoded
+
+    def must_update(self, encoded):
+        return True
+
+class ScryptHasher(BasePasswordHasher):
+    """Memory-hard scrypt. Cost is the CPU/memory factor `n`, block size `r` and parallelism `p`."""
+    algorithm = 'scrypt'
+    param_names = ('n', 'r', 'p')
+    default_params = {'n': 2 ** 14, 'r': 8, 'p': 1}
+
+    def derive(self, password, salt, n, r, p):
+        # 128 * n * r bytes are needed, leave some headroom
+        maxmem = 256 * n * r * p
+        return hashlib.scrypt(password.encode(), salt=salt.encode(), n=n, r=r, p=p, maxmem=maxmem, dklen=32).hex()
+
+    def calibrate(self, target_seconds, measure):
+        # n must be a power of two, double it until we reach the target
+        n = 2 ** 12
+        while n < 2 ** 20 and measure(n=n * 2) <= target_seconds:
+            n *= 2
+        return {'n': n}
+
+class Argon2Hasher(BasePasswordHasher):
+    """Memory-hard Argon2id. Requires the optional `argon2-cffi` package."""
+    algorithm = 'argon2'
+    param_names = ('time_cost', 'memory_cost', 'parallelism')
+    default_params = {'time_cost': 2, 'memory_cost': 65536, 'parallelism': 1}
+
+    def derive(self, password, salt, time_cost, memory_cost, parallelism):
+        if argon2_hash_secret_raw is None:
+            raise ImproperlyConfigured('The argon2 hasher requires the argon2-cffi package')
+        return argon2_hash_secret_raw(
+            secret=password.encode(),
+            salt=salt.encode(),
+            time_cost=time_cost,
+            memory_cost=memory_cost,
+            parallelism=parallelism,
+            hash_len=32,
+            type=Argon2Type.ID,
+        ).hex()
+
+    def calibrate(self, target_seconds, measure):
+        # Keep the configured memory cost, raise passes until we reach the target
+        time_cost = 1
+        while time_cost < 20 and measure(time_cost=time_cost + 1) <= target_seconds:
+            time_cost += 1
+        return {'time_cost': time_cost}
+
+HASHERS = {
+    hasher.algorithm: hasher
+    for hasher in (PBKDF2SHA256Hasher, LegacyPBKDF2SHA256Hasher, ScryptHasher, Argon2Hasher)
+}
+
+def get_hasher(algorithm=None):
+    """Return a hasher configured from `PASSWORD_HASHING`, defaulting to the preferred algorithm."""
+    config = getattr(settings, 'PASSWORD_HASHING', {})
+    algorithm = algorithm or config.get('ALGORITHM', DEFAULT_ALGORITHM)
+    if algorithm not in HASHERS:
+        raise ImproperlyConfigured(f'Unknown password hasher: {algorithm}')
+    return HASHERS[algorithm](**config.get('PARAMS', {}).get(algorithm, {}))
+
+def identify_hasher(encoded):
+    """Return the hasher that produced `encoded`."""
+    if '$' not in encoded:
+        return get_hasher(LegacyPBKDF2SHA256Hasher.algorithm)
+    return get_hasher(encoded.split('$', 1)[0])
+
+def generate_salt():
+    return base64.b64encode(os.urandom(32)).decode('utf-8')
+
+def make_password(password, salt):
+    """
+    Hash a password with the preferred hasher on the hashing pool.
+
+    Raises:
+        HashingPoolFull: If the pool cannot accept more work right now.
+    """
+    return get_hashing_pool().run(get_hasher().encode, password, salt)
+
+def encode_password(algorithm, params, password, salt):
+    """
+    Hash a password with an explicit algorithm and cost, outside the hashing pool.
+    Takes only picklable arguments so it can run in a process pool, e.g. for bulk imports.
+    """
+    return HASHERS[algorithm](**params).encode(password, salt)
+
+def verify_password(password, encoded, salt):
+    """
+    Check a password against an encoded hash on the hashing pool.
+
+    Raises:
+        HashingPoolFull: If the pool cannot accept more work right now.
+    """
+    if not password or not encoded or not salt:
+        return False
+    try:
+        hasher = identify_hasher(encoded)
+        return get_hashing_pool().run(hasher.verify, password, encoded, salt)
+    except (ImproperlyConfigured, ValueError):
+        # Unknown algorithm or malformed hash
+        return False
+
+async def amake_password(password, salt):
+    """Async `make_password`: awaits the hashing pool instead of blocking the event loop."""
+    return await asyncio.wrap_future(get_hashing_pool().submit(get_hasher().encode, password, salt))
+
+async def averify_password(password, encoded, salt):
+    """Async `verify_password`: awaits the hashing pool instead of blocking the event loop."""
+    if not password or not encoded or not salt:
+        return False
+    try:
+        hasher = identify_hasher(encoded)
+        return await asyncio.wrap_future(get_hashing_pool().submit(hasher.verify, password, encoded, salt))
+    except (ImproperlyConfigured, ValueError):
+        # Unknown algorithm or malformed hash
+        return False
+
+def must_update(encoded):
+    """Whether an encoded hash should be upgraded to the preferred algorithm and cost."""
+    try:
+        hasher = identify_hasher(encoded)
+        return hasher.algorithm != get_hasher().algorithm or hasher.must_update(encoded)
+    except (ImproperlyConfigured, ValueError):
+        return True
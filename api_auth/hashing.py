@@ -0,0 +1,173 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+logger = logging.getLogger(__name__)
+
+PBKDF2_ITERATIONS = 100000
+
+DEFAULT_HASHING_SETTINGS = {
+    'WORKERS': 4,
+    'QUEUE_DEPTH': 16,
+    'RETRY_AFTER': 1,
+}
+
+class HashingPoolFull(APIException):
+    """
+    Raised when every hashing worker is busy and the waiting queue is full.
+    Carries a `wait` value so DRF and our handlers can send a Retry-After header.
+    """
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Server is busy, please try again shortly'
+    default_code = 'hashing_pool_full'
+
+    def __init__(self, wait=None, detail=None, code=None):
+        super().__init__(detail, code)
+        self.wait = wait
+
+class HashingPool:
+    """
+    Bounded worker pool for CPU-heavy password hashing.
+
+    hashlib's KDFs release the GIL while they run, so a thread pool gives
+    real parallelism without the pickling overhead of a process pool. At most
+    `workers + queue_depth` jobs are admitted at once; anything beyond that is
+    rejected immediately with `HashingPoolFull` instead of blocking the request
+    thread.
+
+    **Methods:**
+        submit(func, *args):
+            Admit a job to the pool and return its Future.
+        run(func, *args):
+            Admit a job and wait for its result.
+        stats():
+            Counters for admitted/rejected jobs, queue wait and hash time.
+    """
+    def __init__(self, workers=4, queue_depth=16, retry_after=1):
+        self.workers = max(1, int(workers))
+        self.queue_depth = max(0, int(queue_depth))
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(self.workers + self.queue_depth)
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._in_flight = 0
+        self._counters = {
+            'completed': 0,
+            'rejected': 0,
+            'queue_wait_total': 0.0,
+            'queue_wait_max': 0.0,
+            'hash_time_total': 0.0,
+            'hash_time_max': 0.0,
+        }
+
+    def _get_executor(self):
+        # Recreate the executor after a fork (e.g. a preloading WSGI server),
+        # since worker threads do not survive into the child process.
+        pid = os.getpid()
+        if self._executor is None or self._pid != pid:
+            with self._lock:
+                if self._executor is None or self._pid != pid:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.workers,
+                        thread_name_prefix='password-hashing',
+                    )
+                    self._pid = pid
+        return self._executor
+
+    def _record(self, queue_wait, hash_time):
+        with self._lock:
+            counters = self._counters
+            counters['completed'] += 1
+            counters['queue_wait_total'] += queue_wait
+            counters['queue_wait_max'] = max(counters['queue_wait_max'], queue_wait)
+            counters['hash_time_total'] += hash_time
+            counters['hash_time_max'] = max(counters['hash_time_max'], hash_time)
+        logger.debug('password hash: queue_wait=%.4fs hash_time=%.4fs', queue_wait, hash_time)
+
+    def _release(self, future):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def submit(self, func, *args):
+        """
+        Admit a job to the pool.
+
+        Raises:
+            HashingPoolFull: If all workers are busy and the queue is full.
+        """
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._counters['rejected'] += 1
+            logger.warning('Password hashing pool is full, rejecting request')
+            raise HashingPoolFull(wait=self.retry_after)
+
+        with self._lock:
+            self._in_flight += 1
+        enqueued_at = time.perf_counter()
+
+        def job():
+            started_at = time.perf_counter()
+            try:
+                return func(*args)
+            finally:
+                self._record(started_at - enqueued_at, time.perf_counter() - started_at)
+
+        try:
+            future = self._get_executor().submit(job)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    def run(self, func, *args):
+        """Admit a job to the pool and block until its result is ready."""
+        return self.submit(func, *args).result()
+
+    def stats(self):
+        """Return a snapshot of the pool counters, with averages in milliseconds."""
+        with self._lock:
+            counters = dict(self._counters)
+            in_flight = self._in_flight
+        completed = counters['completed']
+        return {
+            'workers': self.workers,
+            'queue_depth': self.queue_depth,
+            'in_flight': in_flight,
+            'completed': completed,
+            'rejected': counters['rejected'],
+            'avg_queue_wait_ms': round(counters['queue_wait_total'] / completed * 1000, 3) if completed else 0.0,
+            'max_queue_wait_ms': round(counters['queue_wait_max'] * 1000, 3),
+            'avg_hash_time_ms': round(counters['hash_time_total'] / completed * 1000, 3) if completed else 0.0,
+            'max_hash_time_ms': round(counters['hash_time_max'] * 1000, 3),
+        }
+
+    def shutdown(self, wait=True):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_hashing_pool():
+    """Return the process-wide hashing pool, configured from `PASSWORD_HASHING`."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                config = {**DEFAULT_HASHING_SETTINGS, **getattr(settings, 'PASSWORD_HASHING', {})}
+                _pool = HashingPool(
+                    workers=config['WORKERS'],
+                    queue_depth=config['QUEUE_DEPTH'],
+                    retry_after=config['RETRY_AFTER'],
+                )
+    return _pool
@@ -0,0 +1,57 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from api_auth.models import User
+from api_auth.utils import decrypt_phone_numbers, phone_blind_index
+
+class Command(BaseCommand):
+    help = 'Fill User.nomor_telepon_index for existing users, in primary-key batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Users updated per batch (default: 1000)')
+        parser.add_argument('--sleep', type=float, default=0.0,
+                            help='Seconds to pause between batches (default: 0)')
+        parser.add_argument('--all', action='store_true',
+                            help='Recompute every index, e.g. after changing PHONE_BLIND_INDEX_KEY')
+
+    def handle(self, *args, **options):
+        queryset = User.objects.exclude(nomor_telepon__isnull=True).exclude(nomor_telepon='')
+        if not options['all']:
+            queryset = queryset.filter(nomor_telepon_index__isnull=True)
+
+        batch_size = options['batch_size']
+        last_pk = None
+        updated = 0
+        failed = 0
+        started = time.perf_counter()
+        while True:
+            # Keyset pagination on the primary key so each batch is an index range scan
+            batch = queryset.order_by('pk')
+            if last_pk is not None:
+                batch = batch.filter(pk__gt=last_pk)
+            rows = list(batch.only('pk', 'nomor_telepon', 'nomor_telepon_index')[:batch_size])
+            if not rows:
+                break
+            last_pk = rows[-1].pk
+
+            phones = decrypt_phone_numbers([user.nomor_telepon for user in rows])
+            changed = []
+            for user, phone in zip(rows, phones):
+                if phone is None:
+                    failed += 1
+                    continue
+                user.nomor_telepon_index = phone_blind_index(phone)
+                changed.append(user)
+            with transaction.atomic():
+                User.objects.bulk_update(changed, ['nomor_telepon_index'])
+            updated += len(changed)
+
+            if len(rows) < batch_size:
+                break
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        elapsed = time.perf_counter() - started
+        rate = updated / elapsed if elapsed else 0.0
+        self.stdout.write(f'Indexed {updated} users in {elapsed:.2f}s ({rate:.0f} rows/s), {failed} could not be decrypted')
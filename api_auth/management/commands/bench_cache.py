@@ -0,0 +1,57 @@
+import os
+import tempfile
+import time
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from rest_framework.exceptions import Throttled
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from api_auth.throttling import LoginRateThrottle
+from nusa_lapor_backend.cache import SQLiteCache
+
+class Command(BaseCommand):
+    help = 'Compare LoginRateThrottle check latency on the per-process LocMemCache and the shared SQLiteCache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--checks', type=int, default=20000,
+                            help='Throttle checks per backend (default: 20000)')
+        parser.add_argument('--rate', default='100000/m',
+                            help='Throttle rate, high enough that most checks are allowed (default: 100000/m)')
+        parser.add_argument('--location', default=None,
+                            help='SQLite cache file to use (default: a temporary file)')
+
+    def handle(self, *args, **options):
+        checks = options['checks']
+        request = Request(
+            RequestFactory().post('/api/auth/login/', data='{"email": "bench@example.com"}',
+                                  content_type='application/json'),
+            parsers=[JSONParser()],
+        )
+
+        with tempfile.TemporaryDirectory() as tmp:
+            location = options['location'] or os.path.join(tmp, 'bench_cache.sqlite3')
+            backends = (
+                ('LocMemCache (per process)', LocMemCache('bench-cache', {})),
+                ('SQLiteCache (shared)', SQLiteCache(location, {})),
+            )
+            self.stdout.write(f'Rate: {options["rate"]}, checks: {checks}\n')
+            for label, backend in backends:
+                per_check = self.run(backend, request, options['rate'], checks)
+                self.stdout.write(f'{label:<26} {per_check * 1e6:9.1f} us/check')
+
+    def run(self, backend, request, rate, checks):
+        throttle = LoginRateThrottle()
+        throttle.is_test = False
+        throttle.cache = backend
+        throttle.rate = rate
+        throttle.num_requests, throttle.duration = throttle.parse_rate(rate)
+        backend.delete_many(throttle.get_window_keys(throttle.get_cache_key(request, None)))
+
+        started = time.perf_counter()
+        for _ in range(checks):
+            try:
+                throttle.allow_request(request, None)
+            except Throttled:
+                pass
+        return (time.perf_counter() - started) / checks
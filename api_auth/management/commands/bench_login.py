@@ -0,0 +1,78 @@
+import asyncio
+import statistics
+import time
+import httpx
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+from api_auth.models import User
+
+BENCH_PASSWORD = 'bench-password-123'
+
+class Command(BaseCommand):
+    help = (
+        'Load test concurrent logins through ASGI, comparing the sync DRF login view '
+        'with the async login view. Runs in-process unless --base-url points at a server.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Logins per endpoint (default: 200)')
+        parser.add_argument('--concurrency', type=int, default=20,
+                            help='Logins in flight at once (default: 20)')
+        parser.add_argument('--base-url', default=None,
+                            help='Benchmark a running server, e.g. http://127.0.0.1:8000 (default: in-process ASGI app)')
+
+    def handle(self, *args, **options):
+        concurrency = options['concurrency']
+        # One account per concurrent client, so the per-email login throttle is not what is measured
+        users = [
+            User.objects.create_user(email=f'bench-login-{i}@example.com', username=f'bench-login-{i}', password=BENCH_PASSWORD)
+            for i in range(concurrency)
+        ]
+        try:
+            for label, url_name in (('sync  (DRF view)', 'api_auth:login'), ('async (ASGI view)', 'api_auth:async_login')):
+                result = asyncio.run(self.run(reverse(url_name), users, options))
+                self.stdout.write(
+                    f'{label:<18} {result["throughput"]:7.1f} logins/s   '
+                    f'p50 {result["p50"] * 1000:7.1f} ms   p95 {result["p95"] * 1000:7.1f} ms   '
+                    f'errors {result["errors"]}'
+                )
+        finally:
+            User.objects.filter(pk__in=[user.pk for user in users]).delete()
+
+    async def run(self, path, users, options):
+        if options['base_url']:
+            client = httpx.AsyncClient(base_url=options['base_url'], timeout=60)
+        else:
+            transport = httpx.ASGITransport(app=get_asgi_application())
+            client = httpx.AsyncClient(transport=transport, base_url='http://localhost', timeout=60)
+
+        queue = asyncio.Queue()
+        for i in range(options['requests']):
+            queue.put_nowait(users[i % len(users)].email)
+        latencies = []
+        errors = 0
+
+        async def worker():
+            nonlocal errors
+            while not queue.empty():
+                email = queue.get_nowait()
+                started = time.perf_counter()
+                response = await client.post(path, json={'email': email, 'password': BENCH_PASSWORD})
+                latencies.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    errors += 1
+
+        async with client:
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(options['concurrency'])))
+            elapsed = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            'throughput': len(latencies) / elapsed,
+            'p50': statistics.median(latencies),
+            'p95': latencies[int(len(latencies) * 0.95) - 1],
+            'errors': errors,
+        }
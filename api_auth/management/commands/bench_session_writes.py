@@ -0,0 +1,64 @@
+import json
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from api_auth.models import User
+
+BENCH_PASSWORD = 'bench-password-123'
+
+STRATEGIES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+    'none': 'django.contrib.sessions.backends.db',
+}
+
+WRITE_STATEMENTS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+class Command(BaseCommand):
+    help = 'Count database writes per API login and logout for each API_SESSION_STRATEGY.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=20,
+                            help='Logins (each followed by a logout) per strategy (default: 20)')
+
+    def handle(self, *args, **options):
+        user = User.objects.create_user(email='bench-session@example.com', username='bench-session', password=BENCH_PASSWORD)
+        try:
+            self.stdout.write(f'{"strategy":<16} {"writes/login":>12} {"session writes/login":>21} {"session rows added":>19}')
+            for strategy, engine in STRATEGIES.items():
+                with override_settings(API_SESSION_STRATEGY=strategy, SESSION_ENGINE=engine):
+                    self.report(strategy, self.measure(user, options['logins']))
+        finally:
+            user.delete()
+
+    def report(self, label, result):
+        self.stdout.write(
+            f'{label:<16} {result["writes"]:>12.1f} {result["session_writes"]:>21.1f} {result["session_rows"]:>19}'
+        )
+
+    def measure(self, user, logins):
+        client = Client(HTTP_HOST='localhost')
+        sessions_before = Session.objects.count()
+        writes = session_writes = 0
+        for _ in range(logins):
+            with CaptureQueriesContext(connection) as ctx:
+                response = client.post(reverse('api_auth:login'),
+                                       data=json.dumps({'email': user.email, 'password': BENCH_PASSWORD}),
+                                       content_type='application/json')
+            statements = [query['sql'].lstrip().upper() for query in ctx.captured_queries]
+            login_writes = [sql for sql in statements if sql.startswith(WRITE_STATEMENTS)]
+            writes += len(login_writes)
+            session_writes += len([sql for sql in login_writes if 'DJANGO_SESSION' in sql])
+
+            refresh = response.json()['token']['refresh']
+            client.post(reverse('api_auth:logout'), data=json.dumps({'refresh': refresh}),
+                        content_type='application/json')
+        return {
+            'writes': writes / logins,
+            'session_writes': session_writes / logins,
+            'session_rows': Session.objects.count() - sessions_before,
+        }
@@ -0,0 +1,62 @@
+import time
+from django.core.cache import cache, caches
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from rest_framework.exceptions import Throttled
+from rest_framework.request import Request
+from rest_framework.parsers import JSONParser
+from rest_framework.throttling import SimpleRateThrottle
+from api_auth.throttling import LoginRateThrottle
+
+class ListHistoryThrottle(SimpleRateThrottle):
+    """DRF's stock list-of-timestamps throttle, used as the baseline."""
+    cache = cache
+
+    def __init__(self, rate):
+        self.rate = rate
+        super().__init__()
+
+    def get_cache_key(self, request, view):
+        return 'bench_throttle_list_history'
+
+class Command(BaseCommand):
+    help = 'Microbenchmark the per-check cost of LoginRateThrottle against a list-history throttle.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--checks', type=int, default=20000,
+                            help='Throttle checks per implementation (default: 20000)')
+        parser.add_argument('--rate', default='100000/m',
+                            help='Throttle rate, high enough that most checks are allowed (default: 100000/m)')
+
+    def handle(self, *args, **options):
+        checks = options['checks']
+        factory = RequestFactory()
+        request = Request(
+            factory.post('/api/auth/login/', data='{"email": "bench@example.com"}', content_type='application/json'),
+            parsers=[JSONParser()],
+        )
+
+        sliding = LoginRateThrottle()
+        sliding.is_test = False
+        sliding.rate = options['rate']
+        sliding.num_requests, sliding.duration = sliding.parse_rate(sliding.rate)
+        cache.delete_many(sliding.get_window_keys(sliding.get_cache_key(request, None)))
+
+        baseline = ListHistoryThrottle(options['rate'])
+        cache.delete(baseline.get_cache_key(request, None))
+
+        backend = caches['default']
+        self.stdout.write(f'Cache backend: {type(backend).__module__}.{type(backend).__name__}')
+        self.stdout.write(f'Rate: {options["rate"]}, checks: {checks}\n')
+        for label, throttle in (('list history (baseline)', baseline), ('sliding window counter', sliding)):
+            per_check = self.run(throttle, request, checks)
+            self.stdout.write(f'{label:<26} {per_check * 1e6:9.1f} us/check')
+
+    def run(self, throttle, request, checks):
+        started = time.perf_counter()
+        for _ in range(checks):
+            try:
+                throttle.allow_request(request, None)
+            except Throttled:
+                pass
+        return (time.perf_counter() - started) / checks
@@ -0,0 +1,52 @@
+import statistics
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.core.exceptions import ImproperlyConfigured
+from api_auth.hashers import HASHERS, LegacyPBKDF2SHA256Hasher, generate_salt, get_hasher
+
+class Command(BaseCommand):
+    help = (
+        'Measure password hashing on this machine and recommend a cost that '
+        'hits the target latency per hash.'
+    )
+
+    def add_arguments(self, parser):
+        algorithms = sorted(name for name in HASHERS if name != LegacyPBKDF2SHA256Hasher.algorithm)
+        parser.add_argument('--algorithm', choices=algorithms, default=None,
+                            help='Hasher to calibrate (default: PASSWORD_HASHING["ALGORITHM"])')
+        parser.add_argument('--target-ms', type=float, default=250.0,
+                            help='Target time for a single hash in milliseconds (default: 250)')
+        parser.add_argument('--samples', type=int, default=3,
+                            help='Hashes per measurement, the median is used (default: 3)')
+
+    def handle(self, *args, **options):
+        hasher = get_hasher(options['algorithm'])
+        target = options['target_ms'] / 1000
+        samples = max(1, options['samples'])
+        salt = generate_salt()
+
+        def measure(**params):
+            timings = []
+            for _ in range(samples):
+                started = time.perf_counter()
+                hasher.encode('calibration-password', salt, **params)
+                timings.append(time.perf_counter() - started)
+            return statistics.median(timings)
+
+        try:
+            current = measure()
+            params = {**hasher.params, **hasher.calibrate(target, measure)}
+            achieved = measure(**params)
+        except ImproperlyConfigured as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(f'Algorithm:        {hasher.algorithm}')
+        self.stdout.write(f'Current params:   {hasher.params} -> {current * 1000:.1f} ms')
+        self.stdout.write(f'Target:           {target * 1000:.1f} ms')
+        self.stdout.write(self.style.SUCCESS(
+            f'Recommended:      {params} -> {achieved * 1000:.1f} ms'
+        ))
+        self.stdout.write(
+            '\nSet this in PASSWORD_HASHING["PARAMS"]["%s"]. Existing hashes are '
+            'upgraded on their next successful login.' % hasher.algorithm
+        )
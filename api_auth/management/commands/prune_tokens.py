@@ -0,0 +1,72 @@
+import time
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken, BlacklistedToken
+
+DB_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.db',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+class Command(BaseCommand):
+    help = (
+        'Delete expired blacklisted/outstanding JWTs and expired sessions in small '
+        'batches, pausing between batches so no long locks are held.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows deleted per batch (default: 1000)')
+        parser.add_argument('--sleep', type=float, default=0.1,
+                            help='Seconds to pause between batches (default: 0.1)')
+        parser.add_argument('--max-batches', type=int, default=0,
+                            help='Stop each table after this many batches, 0 for no limit (default: 0)')
+        parser.add_argument('--every', type=int, default=0,
+                            help='Keep running as a background job, pruning every N seconds (default: run once)')
+        parser.add_argument('--skip-sessions', action='store_true',
+                            help='Do not prune the django_session table')
+
+    def handle(self, *args, **options):
+        while True:
+            self.prune_all(options)
+            if not options['every']:
+                break
+            time.sleep(options['every'])
+
+    def prune_all(self, options):
+        now = timezone.now()
+        # Blacklisted rows go first, so deleting their outstanding tokens cascades to nothing
+        targets = [
+            ('token_blacklist_blacklistedtoken', BlacklistedToken.objects.filter(token__expires_at__lte=now)),
+            ('token_blacklist_outstandingtoken', OutstandingToken.objects.filter(expires_at__lte=now)),
+        ]
+        if not options['skip_sessions'] and settings.SESSION_ENGINE in DB_SESSION_ENGINES:
+            targets.append(('django_session', Session.objects.filter(expire_date__lte=now)))
+
+        for label, queryset in targets:
+            removed, elapsed = self.prune(queryset, options['batch_size'], options['sleep'], options['max_batches'])
+            rate = removed / elapsed if elapsed else 0.0
+            self.stdout.write(f'{label}: removed {removed} rows in {elapsed:.2f}s ({rate:.0f} rows/s)')
+
+    def prune(self, queryset, batch_size, pause, max_batches):
+        """Delete the rows of `queryset` in primary-key batches. Returns (rows removed, seconds)."""
+        model = queryset.model
+        removed = 0
+        batches = 0
+        started = time.perf_counter()
+        while not max_batches or batches < max_batches:
+            with transaction.atomic():
+                ids = list(queryset.values_list('pk', flat=True)[:batch_size])
+                if not ids:
+                    break
+                deleted, _ = model.objects.filter(pk__in=ids).delete()
+            removed += deleted
+            batches += 1
+            if len(ids) < batch_size:
+                break
+            if pause:
+                time.sleep(pause)
+        return removed, time.perf_counter() - started
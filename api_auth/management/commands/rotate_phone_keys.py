@@ -0,0 +1,105 @@
+import json
+import os
+import time
+from cryptography.fernet import InvalidToken
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from api_auth.models import User
+from api_auth.utils import get_cipher, get_encryption_keys, get_primary_cipher, rotate_phone_number
+
+class Command(BaseCommand):
+    help = (
+        'Re-encrypt User.nomor_telepon under the newest key in CRYPTOGRAPHY_KEYS, in '
+        'keyset-paginated batches. Progress is checkpointed, so an interrupted run resumes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Users read and updated per batch (default: 500)')
+        parser.add_argument('--sleep', type=float, default=0.2,
+                            help='Seconds to pause between batches to limit load on the primary (default: 0.2)')
+        parser.add_argument('--max-batches', type=int, default=0,
+                            help='Stop after this many batches, 0 for no limit (default: 0)')
+        parser.add_argument('--checkpoint', default='rotate_phone_keys.json',
+                            help='File recording the last rotated primary key (default: rotate_phone_keys.json)')
+        parser.add_argument('--restart', action='store_true',
+                            help='Ignore an existing checkpoint and start from the first user')
+
+    def handle(self, *args, **options):
+        if len(get_encryption_keys()) < 2:
+            self.stdout.write('Only one key configured, put the new key first in CRYPTOGRAPHY_KEYS to rotate')
+
+        checkpoint_path = options['checkpoint']
+        progress = {'last_pk': None, 'rotated': 0, 'skipped': 0, 'failed': 0}
+        if not options['restart'] and os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as f:
+                progress.update(json.load(f))
+            self.stdout.write(f'Resuming after user {progress["last_pk"]}')
+
+        cipher = get_cipher()
+        primary = get_primary_cipher()
+        queryset = User.objects.exclude(nomor_telepon__isnull=True).exclude(nomor_telepon='').order_by('pk')
+        batches = 0
+        rotated_this_run = 0
+        finished = True
+        started = time.perf_counter()
+        while not options['max_batches'] or batches < options['max_batches']:
+            batch = queryset
+            if progress['last_pk'] is not None:
+                batch = batch.filter(pk__gt=progress['last_pk'])
+            rows = list(batch.only('pk', 'nomor_telepon')[:options['batch_size']])
+            if not rows:
+                break
+
+            changed = []
+            for user in rows:
+                try:
+                    rotated = rotate_phone_number(user.nomor_telepon, cipher, primary)
+                except InvalidToken:
+                    progress['failed'] += 1
+                    continue
+                if rotated is None:
+                    progress['skipped'] += 1
+                    continue
+                changed.append((user.pk, user.nomor_telepon, rotated))
+
+            # Each write is conditional on the ciphertext read above: a number
+            # changed since then was saved under the newest key along with its
+            # blind index, and must not be overwritten with the old number.
+            rotated_rows = 0
+            with transaction.atomic():
+                for pk, encrypted, rotated in changed:
+                    rotated_rows += User.objects.filter(pk=pk, nomor_telepon=encrypted).update(nomor_telepon=rotated)
+            progress['rotated'] += rotated_rows
+            progress['skipped'] += len(changed) - rotated_rows
+            progress['last_pk'] = str(rows[-1].pk)
+            self.save_checkpoint(checkpoint_path, progress)
+            rotated_this_run += rotated_rows
+            batches += 1
+
+            if len(rows) < options['batch_size']:
+                break
+            if options['sleep']:
+                time.sleep(options['sleep'])
+        else:
+            self.stdout.write(f'Stopped after {batches} batches, run again to continue')
+            finished = False
+
+        elapsed = time.perf_counter() - started
+        rate = rotated_this_run / elapsed if elapsed else 0.0
+        self.stdout.write(
+            f'Rotated {progress["rotated"]}, already current {progress["skipped"]}, '
+            f'undecryptable {progress["failed"]} ({rate:.0f} rows/s this run)'
+        )
+        if finished and os.path.exists(checkpoint_path):
+            # The next rotation starts from the first user again
+            os.remove(checkpoint_path)
+        if progress['failed']:
+            raise CommandError(f'{progress["failed"]} phone numbers could not be decrypted with any configured key')
+
+    def save_checkpoint(self, path, progress):
+        # Write then rename, so a crash never leaves a half-written checkpoint
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(progress, f)
+        os.replace(tmp_path, path)
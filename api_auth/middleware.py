@@ -0,0 +1,21 @@
+from .exceptions import hashing_pool_full_response
+from .hashing import HashingPoolFull
+
+class HashingPoolFullMiddleware:
+    """
+    Turn a saturated password hashing pool into a 503 with Retry-After.
+
+    DRF views are covered by `custom_exception_handler`; this middleware covers
+    everything else that authenticates through our backends, such as the
+    Django admin login form.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_exception(self, request, exception):
+        if isinstance(exception, HashingPoolFull):
+            return hashing_pool_full_response(exception)
+        return None
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_auth', '0002_user_nomor_telepon_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='nomor_telepon_index',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True, unique=True),
+        ),
+    ]
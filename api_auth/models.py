@@ -1,5 +1,7 @@
-import uuid, hashlib, os, base64, re
-from django.db import models
+import uuid, re
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, connections, models, transaction
+from django.db.models.signals import post_save
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
@@ -7,13 +9,46 @@ from django.contrib.auth.models import (
 )
 from django.core.validators import RegexValidator
 from django.core.exceptions import ValidationError
+from . import hashers
+from .utils import decrypt_phone_number, phone_blind_index
+
+# Error message for a unique constraint violation on each column, in the order they are reported
+UNIQUE_VIOLATION_MESSAGES = (
+    ('email', 'Email already in use'),
+    ('username', 'Username already in use'),
+    ('nomor_telepon_index', 'Phone number already in use'),
+)
+
+def _unique_violation_message(error):
+    """
+    The registration error message for an IntegrityError raised by a unique
+    constraint on the user table, or None if it is not one of those.
+    Only the constraint name or the column position of the error is read,
+    never the rest of the text, which contains the submitted values:
+    PostgreSQL names the constraint (`<table>_<column>_key`, or
+    `<table>_<column>_<hash>_uniq` when added later) and starts its detail
+    with "Key (<column>)=", SQLite says "UNIQUE constraint failed: <table>.<column>".
+    """
+    table = User._meta.db_table
+    messages = dict(UNIQUE_VIOLATION_MESSAGES)
+    constraint = getattr(getattr(error.__cause__, 'diag', None), 'constraint_name', None)
+    if constraint:
+        for column, message in messages.items():
+            if constraint == f'{table}_{column}_key' or re.fullmatch(rf'{table}_{column}_[0-9a-f]+_uniq', constraint):
+                return message
+        return None
+    text = str(error)
+    match = (re.fullmatch(rf'UNIQUE constraint failed: {table}\.(\w+)', text.strip())
+             or re.search(r'\bKey \((\w+)\)=', text))
+    return messages.get(match.group(1)) if match else None
 
 class UserManager(BaseUserManager):
     """
     Custom user manager for handling user creation and authentication in the system.
     This manager extends Django's BaseUserManager to provide custom methods for creating
-    users and superusers with email as the primary identifier. It implements secure 
-    password hashing using PBKDF2 with SHA-256 and a unique salt for each user.
+    users and superusers with email as the primary identifier. Passwords are hashed
+    through the hasher registry in `api_auth.hashers` (PBKDF2-SHA256 by default)
+    with a unique salt for each user.
     **Methods:**
         create_user(email, username, password=None, **extra_fields):
             Creates and saves a User with the given email, username and password.
@@ -22,6 +57,16 @@ class UserManager(BaseUserManager):
         check_password(raw_password):
             Verifies if the provided raw password matches the stored hashed password.
             Handles both Django's native format and custom SHA-256 format with salt.
+        filter_by_phone(phone_number):
+            Users with the given plain phone number, found through the blind index.
+        phone_in_use(phone_number):
+            Whether any user already has the given plain phone number.
+        register(email, username, name, password, nomor_telepon=None, **extra_fields):
+            Validates and inserts a new user, reporting duplicates from the unique constraints.
+        register_many(entries):
+            Registers several users, with one bulk INSERT when none of them conflict.
+        acreate_user / aregister / alogin:
+            Async variants for the async views, hashing on the pool without blocking the event loop.
     Raises:
         ValueError: If email or password is not provided during user creation.
     """
@@ -35,19 +80,25 @@ class UserManager(BaseUserManager):
         user = self.model(email=email, username=username, **extra_fields)
         
         if password:
-            user.password_salt = base64.b64encode(os.urandom(32)).decode('utf-8')
-            # Use HMAC for more secure password and salt combination
-            hashed_password = hashlib.pbkdf2_hmac('sha256', 
-                                                password.encode(), 
-                                                user.password_salt.encode(), 
-                                                100000).hex()
-            user.password = hashed_password
+            user.set_password(password)
         else:
             raise ValueError('The Password field must be set')
         
         user.save(using=self._db)
         return user
 
+    async def acreate_user(self, email, username, password=None, **extra_fields):
+        """Async `create_user`: the password is hashed without blocking the event loop."""
+        if not email:
+            raise ValueError('The Email field must be set')
+        if not password:
+            raise ValueError('The Password field must be set')
+        email = self.normalize_email(email)
+        user = self.model(email=email, username=username, **extra_fields)
+        await user.aset_password(password)
+        await user.asave(using=self._db)
+        return user
+
     def create_superuser(self, email, username, password=None, **extra_fields):
         """
         Create and save a superuser with the given email, username and password.
@@ -61,6 +112,11 @@ class UserManager(BaseUserManager):
         """
         Register a new user with validation checks.
         
+        Uniqueness of the email, username and phone number is not checked up
+        front: the user is inserted directly and a unique constraint violation
+        is turned into the matching error message, so a signup is one INSERT
+        and two concurrent signups cannot both take the same email.
+        
         Args:
             email: User's email address
             username: Unique username
@@ -75,21 +131,76 @@ class UserManager(BaseUserManager):
         Raises:
             ValidationError: If input data doesn't meet requirements
         """
+        self._validate_registration(email, username, name, password)
+        user = self._new_user(email, username, name=name, nomor_telepon=nomor_telepon, **extra_fields)
+        user.set_password(password)
+        return self._insert_new_user(user)
+
+    async def aregister(self, email, username, name, password, nomor_telepon=None, **extra_fields):
+        """Async `register`: same checks and errors, using the hashing pool without blocking the event loop."""
+        self._validate_registration(email, username, name, password)
+        user = self._new_user(email, username, name=name, nomor_telepon=nomor_telepon, **extra_fields)
+        await user.aset_password(password)
+        return await sync_to_async(self._insert_new_user)(user)
+
+    def register_many(self, entries):
+        """
+        Register several users, each entry holding the `register` arguments.
+        Valid entries are inserted with one bulk INSERT. If that hits a unique
+        constraint they are inserted one by one instead, so each conflict is
+        reported against its own entry and the others are still registered.
+        
+        Returns:
+            (users, errors): the created users in entry order, and a dict
+            mapping the index of each rejected entry to its error message.
+        """
+        users, errors = {}, {}
+        for index, entry in enumerate(entries):
+            entry = dict(entry)
+            password = entry.pop('password', None)
+            try:
+                self._validate_registration(entry.get('email'), entry.get('username'), entry.get('name'), password)
+                user = self._new_user(entry.pop('email'), entry.pop('username'), **entry)
+            except ValidationError as e:
+                errors[index] = e.messages[0]
+                continue
+            user.set_password(password)
+            users[index] = user
+        if not users:
+            return [], errors
+
+        try:
+            with transaction.atomic(using=self._db):
+                self.bulk_create(list(users.values()))
+        except IntegrityError:
+            for index, user in list(users.items()):
+                try:
+                    self._insert_new_user(user)
+                except ValidationError as e:
+                    errors[index] = e.messages[0]
+                    del users[index]
+        else:
+            # bulk_create skips post_save, send it so receivers (e.g. row counters) stay in step
+            for user in users.values():
+                post_save.send(sender=self.model, instance=user, created=True, update_fields=None, raw=False, using=self._db)
+        return [users[index] for index in sorted(users)], errors
+
+    def _validate_registration(self, email, username, name, password):
+        """
+        Validate registration input in order. Uniqueness is left to the
+        database constraints, see `_insert_new_user`.
+        """
         # Email validation
         if not email:
             raise ValidationError('Email is required')
         if not re.match(r"[^@]+@[^@]+\.[^@]+", email):
             raise ValidationError('Enter a valid email address')
-        if self.model.objects.filter(email=email).exists():
-            raise ValidationError('Email already in use')
             
         # Username validation
         if not username:
             raise ValidationError('Username is required')
         if len(username) < 3:
             raise ValidationError('Username must be at least 3 characters')
-        if self.model.objects.filter(username=username).exists():
-            raise ValidationError('Username already in use')
             
         # Password validation
         if not password:
@@ -100,16 +211,31 @@ class UserManager(BaseUserManager):
         # Name validation
         if not name:
             raise ValidationError('Name is required')
-            
-        # Create the user
-        return self.create_user(
-            email=email,
-            username=username,
-            password=password,
-            name=name,
-            nomor_telepon=nomor_telepon,
-            **extra_fields
-        )
+
+    def _new_user(self, email, username, **extra_fields):
+        """An unsaved user, with the phone blind index filled in as `save()` would."""
+        user = self.model(email=self.normalize_email(email), username=username, **extra_fields)
+        user.nomor_telepon_index = user.get_phone_blind_index()
+        return user
+
+    def _insert_new_user(self, user):
+        """
+        Insert `user` in a single INSERT. Unique constraint violations become
+        the same field-specific errors the registration checks used to raise.
+        
+        Raises:
+            ValidationError: If the email, username or phone number is already in use
+        """
+        try:
+            # Savepoint, so a conflict does not break an enclosing transaction
+            with transaction.atomic(using=self._db):
+                user.save(using=self._db, force_insert=True)
+        except IntegrityError as e:
+            message = _unique_violation_message(e)
+            if message is None:
+                raise
+            raise ValidationError(message) from e
+        return user
     
     def login(self, email, password):
         """
@@ -126,8 +252,8 @@ class UserManager(BaseUserManager):
             return None
             
         try:
-            # Get the user by email
-            user = self.model.objects.get(email=email)
+            # Get the user by email, with the petugas profile for the token role claims
+            user = self.model.objects.select_related('petugas').get(email=email)
             
             # Check if account is active
             if not user.is_active:
@@ -135,14 +261,51 @@ class UserManager(BaseUserManager):
                 
             # Check password
             if user.check_password(password):
+                # Transparently move legacy or outdated hashes to the current hasher
+                user.upgrade_password(password)
+                return user
+                
+        except self.model.DoesNotExist:
+            # Run the hash function anyway to prevent timing attacks
+            hashers.make_password(password, 'dummy-salt')
+            
+        return None
+
+    async def alogin(self, email, password):
+        """Async `login`: the password check is awaited on the hashing pool."""
+        if not email or not password:
+            return None
+            
+        try:
+            user = await self.model.objects.select_related('petugas').aget(email=email)
+            
+            if not user.is_active:
+                return None
+                
+            if await user.acheck_password(password):
+                await user.aupgrade_password(password)
                 return user
                 
         except self.model.DoesNotExist:
             # Run the hash function anyway to prevent timing attacks
-            hashlib.pbkdf2_hmac('sha256', password.encode(), b'dummy-salt', 100000)
+            await hashers.amake_password(password, 'dummy-salt')
             
         return None
     
+    def filter_by_phone(self, phone_number):
+        """
+        Users whose phone number matches the plain `phone_number` in any format
+        (0812..., +62812..., 62812...), as a single indexed query.
+        """
+        blind_index = phone_blind_index(phone_number)
+        if not blind_index:
+            return self.none()
+        return self.filter(nomor_telepon_index=blind_index)
+
+    def phone_in_use(self, phone_number):
+        """Whether any user already has the plain `phone_number`."""
+        return self.filter_by_phone(phone_number).exists()
+
     def check_password(self, user, raw_password):
         """
         Check if the raw password matches the one stored in the database.
@@ -154,20 +317,7 @@ class UserManager(BaseUserManager):
         Returns:
             True if password matches, False otherwise
         """
-        if not user.password or not raw_password:
-            return False
-            
-        # Get salt and create hash
-        salt = user.password_salt
-        hashed_password = hashlib.pbkdf2_hmac(
-            'sha256', 
-            raw_password.encode(), 
-            salt.encode(), 
-            100000
-        ).hex()
-        
-        # Compare with stored password
-        return user.password == hashed_password
+        return user.check_password(raw_password)
 
 class User(AbstractBaseUser, PermissionsMixin):
     """
@@ -179,8 +329,9 @@ class User(AbstractBaseUser, PermissionsMixin):
         - email: EmailField, unique
         - username: CharField, unique
         - name: CharField, optional
-        - nomor_telepon: CharField, optional
-        - password: CharField, hashed password
+        - nomor_telepon: CharField, optional, Fernet-encrypted
+        - nomor_telepon_index: CharField, unique, HMAC blind index of the plain phone number
+        - password: CharField, encoded hash (`<algorithm>$<cost>$<digest>`)
         - password_salt: CharField, unique salt for password hashing
         - is_active: BooleanField, default=True
         - is_staff: BooleanField, default=False
@@ -189,13 +340,22 @@ class User(AbstractBaseUser, PermissionsMixin):
     **Methods:**
         __str__():
             Returns the email of the user.
+        is_petugas / is_admin:
+            Role flags used by the permission classes and report views.
         has_module_perms(app_label):
             Does the user have permissions to view the app `app_label`?
         save(*args, **kwargs):
-            Override the save method to generate a UUID for the user.
+            Override the save method to generate a UUID for the user
+            and keep the phone number blind index in step.
         check_password(raw_password):
             Returns a boolean of whether the raw_password was
             correct. This method is needed for Django admin compatibility.
+        set_password(raw_password):
+            Hash the raw password with the preferred hasher and a fresh salt.
+        upgrade_password(raw_password):
+            Rehash a verified password stored with an outdated hasher or cost.
+        acheck_password / aset_password / aupgrade_password:
+            Async variants awaiting the hashing pool.
     """
     id = models.UUIDField(primary_key=True, editable=False, unique=True, default=uuid.uuid4)
     email = models.EmailField(unique=True)
@@ -226,6 +386,7 @@ class User(AbstractBaseUser, PermissionsMixin):
         ],
     )
     nomor_telepon = models.CharField(max_length=255, blank=True, null=True)
+    nomor_telepon_index = models.CharField(max_length=64, blank=True, null=True, unique=True, editable=False)
     password = models.CharField(max_length=255)
     password_salt = models.CharField(max_length=64)
     is_active = models.BooleanField(default=True)
@@ -240,15 +401,57 @@ class User(AbstractBaseUser, PermissionsMixin):
     def __str__(self):
         return self.email
     
+    @property
+    def is_petugas(self):
+        """Whether the user has a Petugas profile. Free when loaded with select_related('petugas')."""
+        return hasattr(self, 'petugas')
+
+    @property
+    def is_admin(self):
+        """Whether the user is an admin (superuser), matching the IsAdmin permission."""
+        return self.is_superuser
+
     def has_module_perms(self, app_label):
         """Does the user have permissions to view the app `app_label`?"""
         # Simplest possible answer: Yes, always
         return True if self.is_staff else False
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        user = super().from_db(db, field_names, values)
+        # The phone number as loaded, so save() knows whether the stored blind index still matches it
+        user._loaded_nomor_telepon = user.__dict__.get('nomor_telepon')
+        return user
+
     def save(self, *args, **kwargs):
         if not self.id:
             self.id = uuid.uuid4()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'nomor_telepon' in update_fields:
+            self.nomor_telepon_index = self.get_phone_blind_index()
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'nomor_telepon_index'}
         super().save(*args, **kwargs)
+        self._loaded_nomor_telepon = self.nomor_telepon
+
+    def get_phone_blind_index(self):
+        """
+        Blind index for the current phone number. Values coming from
+        EncryptedPhoneField carry it already; the stored index is kept while
+        the phone number is the one loaded from the database; any other value
+        (admin form, plain assignment, submitted ciphertext) is indexed again,
+        by decrypting it when encrypted.
+        """
+        if not self.nomor_telepon:
+            return None
+        blind_index = getattr(self.nomor_telepon, 'blind_index', None)
+        if blind_index:
+            return blind_index
+        if self.nomor_telepon_index and self.nomor_telepon == getattr(self, '_loaded_nomor_telepon', None):
+            return self.nomor_telepon_index
+        if self.nomor_telepon.startswith('gAAA'):
+            return phone_blind_index(decrypt_phone_number(self.nomor_telepon))
+        return phone_blind_index(self.nomor_telepon)
     
     def check_password(self, raw_password):
         """
@@ -258,19 +461,91 @@ class User(AbstractBaseUser, PermissionsMixin):
         if not self.password or not raw_password:
             return False
             
-        # Get salt and create hash
-        salt = self.password_salt
-        hashed_password = hashlib.pbkdf2_hmac(
-            'sha256', 
-            raw_password.encode(), 
-            salt.encode(), 
-            100000
-        ).hex()
-        
-        # Compare with stored password
-        return self.password == hashed_password
+        # The stored hash records its own algorithm and cost
+        return hashers.verify_password(raw_password, self.password, self.password_salt)
+
+    def set_password(self, raw_password):
+        """
+        Hash the raw password with the preferred hasher and a fresh salt.
+        Overrides Django's implementation so admin password changes use the same format.
+        """
+        self.password_salt = hashers.generate_salt()
+        self.password = hashers.make_password(raw_password, self.password_salt)
+
+    def upgrade_password(self, raw_password):
+        """
+        Rehash a verified password if it was stored with a legacy format or
+        an outdated algorithm/cost. Returns True if the hash was upgraded.
+        """
+        if not hashers.must_update(self.password):
+            return False
+        self.set_password(raw_password)
+        self.save(update_fields=['password', 'password_salt'])
+        return True
+
+    async def acheck_password(self, raw_password):
+        """Async `check_password`, awaiting the hashing pool."""
+        if not self.password or not raw_password:
+            return False
+        return await hashers.averify_password(raw_password, self.password, self.password_salt)
+
+    async def aset_password(self, raw_password):
+        """Async `set_password`, awaiting the hashing pool."""
+        self.password_salt = hashers.generate_salt()
+        self.password = await hashers.amake_password(raw_password, self.password_salt)
+
+    async def aupgrade_password(self, raw_password):
+        """Async `upgrade_password`."""
+        if not hashers.must_update(self.password):
+            return False
+        await self.aset_password(raw_password)
+        await self.asave(update_fields=['password', 'password_salt'])
+        return True
+
+def _profile_for(model, user, **fields):
+    """
+    Build an unsaved child instance (Petugas, Admin) on top of an already saved
+    user, carrying the user's field values without copying `__dict__`.
+    """
+    values = {field.attname: getattr(user, field.attname) for field in User._meta.concrete_fields}
+    profile = model(**values, **fields)
+    profile.user_ptr = user
+    return profile
+
+def _insert_child_rows(model, profiles, using):
+    """
+    Insert only the child-table rows of a multi-table inherited model
+    (Petugas, Admin) for users that already exist. `profiles` are unsaved
+    instances with `user_ptr` set. Unlike `save()`, the parent User row is
+    not written again, and unlike `bulk_create()` this works for child models.
+    `post_save` is still sent so receivers (e.g. the user cache) stay in step.
+    """
+    if not profiles:
+        return profiles
+    fields = model._meta.local_concrete_fields
+    manager = model._base_manager.db_manager(using)
+    batch_size = connections[using].ops.bulk_batch_size(fields, profiles) or len(profiles)
+    for start in range(0, len(profiles), batch_size):
+        manager._insert(profiles[start:start + batch_size], fields=fields, using=using)
+    for profile in profiles:
+        profile._state.adding = False
+        profile._state.db = using
+        post_save.send(sender=model, instance=profile, created=True, update_fields=None, raw=False, using=using)
+    return profiles
 
 class PetugasManager(models.Manager):
+    """
+    Manager for Petugas model.
+    **Methods:**
+        create_petugas(email, username, password=None, name=None, jabatan=None, nomor_telepon=None, **extra_fields):
+            Creates and saves a User with its Petugas profile.
+        bulk_create_profiles(profiles):
+            Inserts Petugas profile rows for already saved users in bulk.
+        promote(user, jabatan):
+            Makes an existing user a Petugas.
+        promote_users(users, jabatan):
+            Makes existing users Petugas with one UPDATE and one INSERT for the batch.
+    """
     def create_petugas(self, email, username, password=None, name=None, jabatan=None, nomor_telepon=None, **extra_fields):
         """
         Create and save a Petugas with the given email, username, and password.
@@ -301,18 +576,49 @@ class PetugasManager(models.Manager):
             **extra_fields
         )
         
-        # Create the Petugas part that extends User
-        petugas = self.model(
-            user_ptr=user,
-            jabatan=jabatan
-        )
-        
-        # This is required because we're using multi-table inheritance
-        petugas.__dict__.update(user.__dict__)
-        petugas.save(using=self._db)
+        # Create the Petugas part that extends User, only the petugas row is inserted
+        petugas = _profile_for(self.model, user, jabatan=jabatan)
+        self.bulk_create_profiles([petugas])
         
         return petugas
 
+    def bulk_create_profiles(self, profiles):
+        """
+        Insert Petugas profiles, e.g. `Petugas(user_ptr=user, jabatan=...)`,
+        for users that are already saved. Only the petugas table is written.
+        """
+        return _insert_child_rows(self.model, list(profiles), self.db)
+
+    def promote(self, user, jabatan):
+        """
+        Make an existing user a Petugas.
+        Returns the Petugas, or None if the user already is one.
+        """
+        promoted = self.promote_users([user], jabatan)
+        return promoted[0] if promoted else None
+
+    def promote_users(self, users, jabatan):
+        """
+        Make existing users Petugas. Users that already are one are skipped.
+        The parent rows only get a single `is_staff` UPDATE for the whole batch
+        and each user gets one petugas INSERT, instead of a full re-save.
+        Returns the new Petugas instances.
+        """
+        users = list(users)
+        already = set(self.filter(pk__in=[user.pk for user in users]).values_list('pk', flat=True))
+        users = [user for user in users if user.pk not in already]
+        if not users:
+            return []
+
+        with transaction.atomic(using=self.db):
+            # Petugas are staff by default
+            User.objects.db_manager(self.db).filter(
+                pk__in=[user.pk for user in users if not user.is_staff]
+            ).update(is_staff=True)
+            for user in users:
+                user.is_staff = True
+            return self.bulk_create_profiles(_profile_for(self.model, user, jabatan=jabatan) for user in users)
+
 class Petugas(User):
     """
     Petugas model that inherits from User.
@@ -326,7 +632,14 @@ class Petugas(User):
         return f"{self.name} - {self.jabatan}"
     
 class AdminManager(models.Manager):
-    """Manager for Admin model."""
+    """
+    Manager for Admin model.
+    **Methods:**
+        create_admin(email, username, password=None, name=None, nomor_telepon=None, **extra_fields):
+            Creates and saves a superuser with its Admin profile.
+        bulk_create_profiles(profiles):
+            Inserts Admin profile rows for already saved superusers in bulk.
+    """
     def create_admin(self, email, username, password=None, name=None, nomor_telepon=None, **extra_fields):
         """
         Create and save an Admin with the given email, username, and password.
@@ -351,17 +664,19 @@ class AdminManager(models.Manager):
             **extra_fields
         )
 
-        # Create the Admin part that extends User
-        admin = self.model(
-            user_ptr=user
-        )
-
-        # This is required because we're using multi-table inheritance
-        admin.__dict__.update(user.__dict__)
-        admin.save(using=self._db)
+        # Create the Admin part that extends User, only the admin row is inserted
+        admin = _profile_for(self.model, user)
+        self.bulk_create_profiles([admin])
 
         return admin
 
+    def bulk_create_profiles(self, profiles):
+        """
+        Insert Admin profiles, e.g. `Admin(user_ptr=user)`, for users that are
+        already saved (and are superusers). Only the admin table is written.
+        """
+        return _insert_child_rows(self.model, list(profiles), self.db)
+
     def get_queryset(self):
         """Filter queryset to only include superusers."""
         return super().get_queryset().filter(is_superuser=True)
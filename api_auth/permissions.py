@@ -1,4 +1,41 @@
 from rest_framework import permissions
+from .tokens import has_role_claims, token_is_petugas, token_is_admin
+
+def request_is_petugas(request):
+    """
+    Whether the requester is a petugas.
+    Authorizes from the verified token's role claims when present,
+    falling back to the user's Petugas profile for older tokens.
+    """
+    user = request.user
+    if not user or not user.is_authenticated:
+        return False
+
+    token = getattr(request, 'auth', None)
+    if has_role_claims(token):
+        return token_is_petugas(token)
+
+    try:
+        # Check if the user has a petugas profile
+        user.petugas
+        return True
+    except AttributeError:
+        return False
+
+def request_is_admin(request):
+    """
+    Whether the requester is an admin (superuser).
+    Authorizes from the verified token's role claims when present.
+    """
+    user = request.user
+    if not user or not user.is_authenticated:
+        return False
+
+    token = getattr(request, 'auth', None)
+    if has_role_claims(token):
+        return token_is_admin(token)
+
+    return user.is_superuser
 
 class IsPetugas(permissions.BasePermission):
     """
@@ -8,17 +45,8 @@ class IsPetugas(permissions.BasePermission):
 
     def has_permission(self, request, view):
         # Check if the user is authenticated and is a petugas
-        user = request.user
-        if not user or not user.is_authenticated:
-            return False
-            
-        try:
-            # Check if the user has a petugas profile
-            petugas = user.petugas
-            return True
-        except AttributeError:
-            return False
-        
+        return request_is_petugas(request)
+
 class IsAdmin(permissions.BasePermission):
     """
     Custom permission to only allow admin users (superusers) to access.
@@ -27,4 +55,4 @@ class IsAdmin(permissions.BasePermission):
 
     def has_permission(self, request, view):
         # Check if the user is authenticated and is a superuser
-        return request.user and request.user.is_authenticated and request.user.is_superuser
\ No newline at end of file
+        return request_is_admin(request)
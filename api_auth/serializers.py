@@ -1,6 +1,7 @@
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
 from .models import User, Petugas, Admin
-from .utils import EncryptedPhoneSerializerMixin, EncryptedPhoneField
+from .utils import EncryptedPhoneSerializerMixin, EncryptedPhoneField, EncryptedPhoneListSerializer
 import base64, os, hashlib
 
 class BaseUserModelSerializer(EncryptedPhoneSerializerMixin, serializers.ModelSerializer):
@@ -54,6 +55,19 @@ class UserSerializer(BaseUserModelSerializer):
         fields = ['id', 'email', 'username', 'name', 'nomor_telepon', 'password']
         read_only_fields = ['id', 'password_salt']
         encrypted_fields = ['nomor_telepon']
+        list_serializer_class = EncryptedPhoneListSerializer
+
+class RegistrationSerializer(UserSerializer):
+    """
+    UserSerializer for signups. The unique email/username lookups are dropped:
+    `UserManager.register` inserts directly and reports duplicates from the
+    database constraints, which also holds under concurrent signups.
+    """
+    def get_fields(self):
+        fields = super().get_fields()
+        for field in fields.values():
+            field.validators = [validator for validator in field.validators if not isinstance(validator, UniqueValidator)]
+        return fields
 
 class PetugasSerializer(BaseUserModelSerializer):
     class Meta:
@@ -61,10 +75,12 @@ class PetugasSerializer(BaseUserModelSerializer):
         fields = ['id', 'email', 'username', 'name', 'jabatan', 'nomor_telepon', 'password']
         read_only_fields = ['id', 'password_salt']
         encrypted_fields = ['nomor_telepon']
+        list_serializer_class = EncryptedPhoneListSerializer
 
 class AdminSerializer(BaseUserModelSerializer):
     class Meta:
         model = Admin
         fields = ['id', 'email', 'username', 'name', 'nomor_telepon', 'password']
         read_only_fields = ['id', 'password_salt']
-        encrypted_fields = ['nomor_telepon']
\ No newline at end of file
+        encrypted_fields = ['nomor_telepon']
+        list_serializer_class = EncryptedPhoneListSerializer
\ No newline at end of file
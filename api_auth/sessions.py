@@ -0,0 +1,25 @@
+from django.conf import settings
+
+# Backend recorded in the session, so Django's session auth can load the user
+SESSION_AUTH_BACKEND = 'django.contrib.auth.backends.ModelBackend'
+
+def api_sessions_enabled():
+    """Whether API logins create a Django session (API_SESSION_STRATEGY is not 'none')."""
+    return getattr(settings, 'API_SESSION_STRATEGY', 'db') != 'none'
+
+def start_api_session(request, user):
+    """
+    Record the logged in user in the Django session, unless sessions are disabled for the API.
+    SessionMiddleware persists it once when the response is sent.
+    """
+    if not api_sessions_enabled():
+        return
+    request.session['_auth_user_id'] = str(user.pk)
+    request.session['_auth_user_backend'] = SESSION_AUTH_BACKEND
+
+async def astart_api_session(request, user):
+    """Async `start_api_session`."""
+    if not api_sessions_enabled():
+        return
+    await request.session.aset('_auth_user_id', str(user.pk))
+    await request.session.aset('_auth_user_backend', SESSION_AUTH_BACKEND)
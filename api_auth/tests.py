@@ -1,14 +1,43 @@
-import json, hashlib
-from django.test import TestCase, Client
+import json, hashlib, threading
+from django.conf import settings
+from django.test import TestCase, Client, RequestFactory, override_settings
 from django.core.cache import cache
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from rest_framework import status
 from django.apps import apps
-from api_auth.utils import EncryptedPhoneField
+from api_auth.utils import EncryptedPhoneField, encrypt_phone_number, decrypt_phone_numbers, get_cipher, phone_blind_index, rotate_phone_number
+from api_auth.management.commands import rotate_phone_keys
+from api_auth import utils as phone_utils
+from api_auth.serializers import UserSerializer
+from api_auth.hashing import HashingPool, HashingPoolFull
+from api_auth.throttling import SuccessfulLoginResetThrottle
+from api_auth import hashers
+from api_auth.authentication import UserCache, get_user_cache
+from rest_framework_simplejwt.tokens import RefreshToken, AccessToken
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from django.core.management import call_command
+from io import StringIO
+from rest_framework.test import APIRequestFactory
+from api_auth.permissions import IsPetugas, IsAdmin
+from api_auth.tokens import RefreshToken as FilteredRefreshToken, add_role_claims, tokens_for_user
+from api_auth.blacklist import BloomFilter, BlacklistFilter, get_blacklist_filter
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from datetime import timedelta
 from rest_framework.serializers import ValidationError
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework.exceptions import Throttled
 from unittest.mock import patch
+from types import SimpleNamespace
+from django.db import IntegrityError
+from api_auth.models import _unique_violation_message
+import os, tempfile, time
+from nusa_lapor_backend.cache import SQLiteCache
+from main.counts import estimated_count
+from cryptography.fernet import Fernet
 
 User = get_user_model()
 Petugas = apps.get_model('api_auth', 'Petugas')
@@ -498,4 +527,823 @@ class AuthAPITestCase(TestCase):
                 decrypted = field.to_representation(result)
                 print(f"✅ {phone} → {result[:10]}... → {decrypted}")
             except ValidationError as ve:
-                print(f"❌ {phone} → Error: {str(ve)}")
\ No newline at end of file
+                print(f"❌ {phone} → Error: {str(ve)}")
+class HashingPoolTestCase(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.login_url = reverse('api_auth:login')
+
+    def test_pool_rejects_when_queue_is_full(self):
+        """Test the pool fails fast instead of blocking when saturated."""
+        pool = HashingPool(workers=1, queue_depth=0, retry_after=3)
+        release = threading.Event()
+        try:
+            future = pool.submit(release.wait)
+            with self.assertRaises(HashingPoolFull) as ctx:
+                pool.submit(lambda: None)
+            self.assertEqual(ctx.exception.wait, 3)
+            release.set()
+            future.result(timeout=5)
+
+            stats = pool.stats()
+            self.assertEqual(stats['completed'], 1)
+            self.assertEqual(stats['rejected'], 1)
+            self.assertEqual(stats['in_flight'], 0)
+        finally:
+            release.set()
+            pool.shutdown()
+
+
+    def test_login_returns_503_when_pool_is_full(self):
+        """Test login answers 503 with Retry-After when hashing is saturated."""
+        with patch('api_auth.hashers.make_password', side_effect=HashingPoolFull(wait=2)):
+            response = self.client.post(
+                self.login_url,
+                data=json.dumps({'email': 'nobody@example.com', 'password': 'password123'}),
+                content_type='application/json'
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '2')
+        self.assertEqual(response.json()['wait_seconds'], 2)
+
+class PasswordHasherTestCase(TestCase):
+    def test_encoded_hash_records_algorithm_and_cost(self):
+        """Test new passwords are stored with their algorithm and cost."""
+        user = User.objects.create_user(email='hash@example.com', username='hashuser', password='password123')
+        algorithm, iterations, digest = user.password.split('$')
+        self.assertEqual(algorithm, 'pbkdf2_sha256')
+        self.assertEqual(int(iterations), 100000)
+        self.assertTrue(user.check_password('password123'))
+        self.assertFalse(user.check_password('wrongpassword'))
+
+    def test_scrypt_hasher_roundtrip(self):
+        """Test the memory-hard scrypt hasher encodes and verifies."""
+        hasher = hashers.ScryptHasher(n=2 ** 10)
+        encoded = hasher.encode('password123', 'salt')
+        self.assertTrue(encoded.startswith('scrypt$1024$8$1$'))
+        self.assertTrue(hasher.verify('password123', encoded, 'salt'))
+        self.assertFalse(hasher.verify('wrongpassword', encoded, 'salt'))
+
+    def test_legacy_hash_is_upgraded_on_login(self):
+        """Test a bare PBKDF2 hex digest still verifies and is rehashed on login."""
+        user = User.objects.create_user(email='legacy@example.com', username='legacyuser', password='password123')
+        user.password_salt = 'legacy-salt'
+        user.password = hashlib.pbkdf2_hmac('sha256', b'password123', b'legacy-salt', 100000).hex()
+        user.save()
+
+        self.assertEqual(User.objects.login('legacy@example.com', 'password123'), user)
+
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$'))
+        self.assertNotEqual(user.password_salt, 'legacy-salt')
+        self.assertTrue(user.check_password('password123'))
+
+    def test_outdated_cost_is_upgraded_on_login(self):
+        """Test hashes with a different cost than configured are rehashed on login."""
+        user = User.objects.create_user(email='cost@example.com', username='costuser', password='password123')
+        params = {'pbkdf2_sha256': {'iterations': 120000}}
+        with self.settings(PASSWORD_HASHING={**settings.PASSWORD_HASHING, 'PARAMS': params}):
+            self.assertTrue(hashers.must_update(user.password))
+            User.objects.login('cost@example.com', 'password123')
+            user.refresh_from_db()
+            self.assertTrue(user.password.startswith('pbkdf2_sha256$120000$'))
+
+class UserCacheTestCase(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.protected_url = reverse('api_auth:protected')
+        self.protected_petugas_url = reverse('api_auth:protected_petugas')
+        get_user_cache().clear()
+        self.petugas = Petugas.objects.create_petugas(
+            email='cached@petugasexample.com',
+            username='cachedpetugas',
+            name='Cached Petugas',
+            password='petugaspass123',
+            jabatan='Petugas Lapangan',
+        )
+        self.access_token = str(RefreshToken.for_user(self.petugas).access_token)
+
+    def test_warm_cache_needs_no_auth_queries(self):
+        """Test authenticated endpoints run no auth queries once the user is cached."""
+        response = self.client.get(self.protected_petugas_url, HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.protected_petugas_url, HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['petugas']['jabatan'], 'Petugas Lapangan')
+
+    def test_save_invalidates_cached_user(self):
+        """Test saving a Petugas drops the cached entry so the next request reloads it."""
+        self.client.get(self.protected_url, HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+        self.petugas.jabatan = 'Koordinator'
+        self.petugas.save()
+
+        response = self.client.get(self.protected_petugas_url, HTTP_AUTHORIZATION=f'Bearer {self.access_token}')
+        self.assertEqual(response.json()['petugas']['jabatan'], 'Koordinator')
+        self.assertEqual(get_user_cache().stats()['invalidations'], 1)
+
+    def test_lru_and_ttl_eviction(self):
+        """Test the cache evicts least recently used and expired entries."""
+        now = [0.0]
+        cache = UserCache(max_size=2, ttl=10, timer=lambda: now[0])
+        cache.set('a', 'user-a')
+        cache.set('b', 'user-b')
+        cache.get('a')
+        cache.set('c', 'user-c')
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 'user-a')
+        now[0] = 11.0
+        self.assertIsNone(cache.get('c'))
+
+        stats = cache.stats()
+        self.assertEqual(stats['hits'], 2)
+        self.assertEqual(stats['misses'], 2)
+        self.assertEqual(stats['evictions'], 1)
+        self.assertEqual(stats['expirations'], 1)
+
+class RoleClaimsTestCase(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.login_url = reverse('api_auth:login')
+        self.refresh_token_url = reverse('api_auth:token_refresh')
+        self.assign_petugas_url = reverse('api_auth:assign_petugas')
+        self.user = User.objects.create_user(email='role@example.com', username='roleuser', password='password123')
+        self.admin = Admin.objects.create_admin(email='role@adminexample.com', username='roleadmin', password='adminpass123')
+        self.petugas = Petugas.objects.create_petugas(
+            email='role@petugasexample.com',
+            username='rolepetugas',
+            password='petugaspass123',
+            jabatan='Petugas Lapangan',
+        )
+
+    def login(self, email, password):
+        response = self.client.post(
+            self.login_url,
+            data=json.dumps({'email': email, 'password': password}),
+            content_type='application/json'
+        )
+        return response.json()['token']
+
+    def test_login_tokens_carry_role_claims(self):
+        """Test access tokens issued at login carry the role and jabatan claims."""
+        user_access = AccessToken(self.login('role@example.com', 'password123')['access'])
+        petugas_access = AccessToken(self.login('role@petugasexample.com', 'petugaspass123')['access'])
+        admin_access = AccessToken(self.login('role@adminexample.com', 'adminpass123')['access'])
+
+        self.assertEqual(user_access['role'], 'user')
+        self.assertNotIn('jabatan', user_access)
+        self.assertEqual(petugas_access['role'], 'petugas')
+        self.assertEqual(petugas_access['jabatan'], 'Petugas Lapangan')
+        self.assertEqual(admin_access['role'], 'admin')
+
+    def test_refreshed_access_token_carries_role_claims(self):
+        """Test refreshed access tokens carry the user's current role claims."""
+        refresh = self.login('role@petugasexample.com', 'petugaspass123')['refresh']
+        response = self.client.post(
+            self.refresh_token_url,
+            data=json.dumps({'refresh': refresh}),
+            content_type='application/json'
+        )
+        access = AccessToken(response.json()['access'])
+        self.assertEqual(access['role'], 'petugas')
+        self.assertEqual(access['jabatan'], 'Petugas Lapangan')
+
+    def test_refresh_after_demotion_drops_petugas_claims(self):
+        """Test access tokens refreshed after a petugas is demoted carry the user role and no jabatan."""
+        refresh = self.login('role@petugasexample.com', 'petugaspass123')['refresh']
+        Petugas.objects.get(pk=self.petugas.pk).delete(keep_parents=True)
+
+        for url in (self.refresh_token_url, reverse('api_auth:async_token_refresh')):
+            response = self.client.post(url, data=json.dumps({'refresh': refresh}), content_type='application/json')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            access = AccessToken(response.json()['access'])
+            self.assertEqual(access['role'], 'user')
+            self.assertNotIn('jabatan', access)
+
+            response = self.client.get(reverse('api_auth:protected_petugas'), HTTP_AUTHORIZATION=f'Bearer {access}')
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_permissions_authorize_from_claims(self):
+        """Test IsPetugas and IsAdmin decide from the token claims without a query."""
+        request = APIRequestFactory().get('/')
+        request.user = self.user
+        request.auth = add_role_claims(AccessToken.for_user(self.petugas), self.petugas)
+
+        with self.assertNumQueries(0):
+            self.assertTrue(IsPetugas().has_permission(request, None))
+            self.assertFalse(IsAdmin().has_permission(request, None))
+
+    def test_assign_petugas_revokes_user_tokens(self):
+        """Test promoting a user blacklists their refresh tokens."""
+        user_refresh = self.login('role@example.com', 'password123')['refresh']
+        admin_access = self.login('role@adminexample.com', 'adminpass123')['access']
+
+        response = self.client.post(
+            self.assign_petugas_url,
+            data=json.dumps({'user_id': str(self.user.id)}),
+            content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {admin_access}'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(BlacklistedToken.objects.filter(token__user=self.user).exists())
+        with self.assertRaises(TokenError):
+            RefreshToken(user_refresh)
+
+class BlacklistFilterTestCase(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.logout_url = reverse('api_auth:logout')
+        self.user = User.objects.create_user(email='filter@example.com', username='filteruser', password='password123')
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        """Test every added item is reported as present."""
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        items = [f'jti-{i}' for i in range(1000)]
+        for item in items:
+            bloom.add(item)
+        self.assertTrue(all(item in bloom for item in items))
+        false_positives = sum(f'other-{i}' in bloom for i in range(1000))
+        self.assertLess(false_positives, 50)
+
+    def test_unlisted_token_skips_blacklist_query(self):
+        """Test a refresh token missing from the filter is accepted without a blacklist query."""
+        refresh = str(tokens_for_user(self.user))
+        get_blacklist_filter().sync(force=True)
+
+        with CaptureQueriesContext(connection) as queries:
+            FilteredRefreshToken(refresh)
+        self.assertFalse(any('token_blacklist_blacklistedtoken' in q['sql'] for q in queries.captured_queries))
+
+    def test_logged_out_token_is_rejected(self):
+        """Test a blacklisted refresh token hits the filter and is confirmed by the database."""
+        refresh = str(tokens_for_user(self.user))
+        response = self.client.post(self.logout_url, data=json.dumps({'refresh': refresh}), content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with self.assertRaises(TokenError):
+            FilteredRefreshToken(refresh)
+
+    def test_token_blacklisted_by_another_process_is_rejected(self):
+        """Test a token blacklisted after this process's last sync is caught through the shared cache."""
+        other_process = BlacklistFilter(sync_interval=3600)
+        other_process.sync(force=True)
+        refresh = tokens_for_user(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=refresh['jti']))
+
+        self.assertFalse(other_process.might_contain(refresh['jti']))
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(other_process.is_blacklisted(refresh['jti']))
+        self.assertEqual(len(queries.captured_queries), 0)
+        self.assertEqual(other_process.stats()['cache_hits'], 1)
+        self.assertFalse(other_process.is_blacklisted(tokens_for_user(self.user)['jti']))
+
+    def test_expired_generations_are_dropped(self):
+        """Test generations whose tokens have all expired are pruned."""
+        blacklist_filter = BlacklistFilter(generation_seconds=60)
+        blacklist_filter._loaded = True
+        blacklist_filter._last_sync = blacklist_filter.timer()
+        blacklist_filter.add('fresh', timezone.now() + timedelta(hours=1))
+        blacklist_filter.add('expired', timezone.now() - timedelta(hours=1))
+        self.assertEqual(blacklist_filter.stats()['generations'], 1)
+        self.assertTrue(blacklist_filter.might_contain('fresh'))
+        self.assertFalse(blacklist_filter.might_contain('expired'))
+
+class PruneTokensCommandTestCase(TestCase):
+    def test_prunes_only_expired_rows_in_batches(self):
+        """Test expired tokens are deleted in batches and live ones are kept."""
+        user = User.objects.create_user(email='prune@example.com', username='pruneuser', password='password123')
+        now = timezone.now()
+        for i in range(5):
+            token = OutstandingToken.objects.create(
+                user=user, jti=f'expired-{i}', token='x', created_at=now - timedelta(days=2), expires_at=now - timedelta(days=1)
+            )
+            if i % 2 == 0:
+                BlacklistedToken.objects.create(token=token)
+        OutstandingToken.objects.create(user=user, jti='live', token='x', created_at=now, expires_at=now + timedelta(days=1))
+
+        out = StringIO()
+        call_command('prune_tokens', batch_size=2, sleep=0, skip_sessions=True, stdout=out)
+
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), ['live'])
+        self.assertEqual(BlacklistedToken.objects.count(), 0)
+        self.assertIn('token_blacklist_outstandingtoken: removed 5 rows', out.getvalue())
+        self.assertIn('token_blacklist_blacklistedtoken: removed 3 rows', out.getvalue())
+
+class LoginRateThrottleTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.now = 600.0
+        self.request = RequestFactory().post('/api/auth/login/')
+        self.throttle = self.make_throttle()
+
+    def make_throttle(self):
+        throttle = SuccessfulLoginResetThrottle()
+        throttle.is_test = False
+        throttle.timer = lambda: self.now
+        return throttle
+
+    def test_sliding_window_counter(self):
+        """Test the limit applies over a sliding window weighted across two buckets."""
+        for _ in range(3):
+            self.assertTrue(self.throttle.allow_request(self.request, None))
+        with self.assertRaises(Throttled) as ctx:
+            self.throttle.allow_request(self.request, None)
+        self.assertEqual(ctx.exception.wait, 80)
+
+        # Halfway into the next window only half of the previous window still counts
+        self.now += 90
+        self.assertTrue(self.make_throttle().allow_request(self.request, None))
+        with self.assertRaises(Throttled):
+            self.make_throttle().allow_request(self.request, None)
+
+    def test_stores_integers_per_window(self):
+        """Test each key only keeps one integer counter per window."""
+        for _ in range(3):
+            self.throttle.allow_request(self.request, None)
+        current_key, previous_key = self.throttle.get_window_keys(self.throttle.key)
+        self.assertEqual(cache.get(current_key), 3)
+        self.assertIsNone(cache.get(previous_key))
+
+    def test_reset_after_successful_login(self):
+        """Test resetting the counter allows new attempts straight away."""
+        for _ in range(3):
+            self.throttle.allow_request(self.request, None)
+        self.throttle.reset_throttle_counter(self.throttle.key)
+        self.assertTrue(self.make_throttle().allow_request(self.request, None))
+
+class PhoneDecryptionTestCase(TestCase):
+    def test_cipher_built_once_per_key(self):
+        """Test the Fernet cipher is reused across calls."""
+        self.assertIs(get_cipher(), get_cipher())
+
+    def test_decrypt_phone_numbers(self):
+        """Test batch decryption keeps order and passes through plain values."""
+        first = encrypt_phone_number('6281234567890')
+        second = encrypt_phone_number('6289876543210')
+        self.assertEqual(
+            decrypt_phone_numbers([first, None, second, '', first, 'plain']),
+            ['6281234567890', None, '6289876543210', '', '6281234567890', 'plain'],
+        )
+
+    def test_list_serializer_decrypts_in_one_batch(self):
+        """Test serializing many users decrypts all phone numbers in a single batch."""
+        for i in range(3):
+            User.objects.create_user(
+                email=f'batch{i}@example.com', username=f'batch{i}', name=f'Batch {i}',
+                password='Password123!', nomor_telepon=encrypt_phone_number(f'62812345678{i}'),
+            )
+        with patch.object(phone_utils, 'decrypt_phone_numbers', wraps=decrypt_phone_numbers) as batch, \
+                patch.object(phone_utils, 'decrypt_phone_number', wraps=phone_utils.decrypt_phone_number) as single:
+            data = UserSerializer(User.objects.order_by('username'), many=True).data
+        self.assertEqual([row['nomor_telepon'] for row in data], ['628123456780', '628123456781', '628123456782'])
+        self.assertEqual(batch.call_count, 1)
+        # Only the batch decrypts, the per-row field never calls decrypt again
+        self.assertEqual(single.call_count, 3)
+
+class PhoneBlindIndexTestCase(TestCase):
+    def setUp(self):
+        self.register_url = reverse('api_auth:register')
+        self.payload = {
+            'email': 'phone@example.com',
+            'username': 'phoneuser',
+            'name': 'Phone User',
+            'password': 'password123',
+            'nomor_telepon': '081234567890',
+        }
+
+    def test_register_fills_index_and_lookup(self):
+        """Test registration stores the blind index and any phone format finds the user."""
+        response = self.client.post(self.register_url, data=json.dumps(self.payload), content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        user = User.objects.get(email='phone@example.com')
+        self.assertTrue(user.nomor_telepon.startswith('gAAA'))
+        self.assertEqual(user.nomor_telepon_index, phone_blind_index('6281234567890'))
+        for phone in ('081234567890', '+6281234567890', '62-81234567890'):
+            with self.assertNumQueries(1):
+                self.assertEqual(list(User.objects.filter_by_phone(phone)), [user])
+        self.assertFalse(User.objects.phone_in_use('081299999999'))
+
+    def test_changed_phone_is_indexed_again(self):
+        """Test saving a changed phone number, encrypted or plain, moves the blind index to the new number."""
+        User.objects.create_user(email='phone@example.com', username='phoneuser', password='password123',
+                                 nomor_telepon=encrypt_phone_number('6281234567890'))
+        user = User.objects.get(email='phone@example.com')
+        self.assertTrue(User.objects.phone_in_use('081234567890'))
+
+        # A ciphertext without blind_index, as an admin form or a client would submit it
+        user.nomor_telepon = encrypt_phone_number('6281299990000')
+        user.save()
+        self.assertTrue(User.objects.phone_in_use('081299990000'))
+        self.assertFalse(User.objects.phone_in_use('081234567890'))
+
+        user = User.objects.get(pk=user.pk)
+        user.nomor_telepon = '081277770000'
+        user.save(update_fields=['nomor_telepon'])
+        self.assertEqual(list(User.objects.filter_by_phone('081277770000')), [user])
+        self.assertFalse(User.objects.phone_in_use('081299990000'))
+
+        # Saving other fields keeps the index without decrypting
+        user = User.objects.get(pk=user.pk)
+        user.name = 'Phone User'
+        with patch('api_auth.models.decrypt_phone_number') as decrypt:
+            user.save()
+        decrypt.assert_not_called()
+        self.assertTrue(User.objects.phone_in_use('081277770000'))
+
+    def test_register_duplicate_phone(self):
+        """Test registration with a phone number already in use is rejected."""
+        self.client.post(self.register_url, data=json.dumps(self.payload), content_type='application/json')
+        duplicate = {**self.payload, 'email': 'other@example.com', 'username': 'otheruser', 'nomor_telepon': '+6281234567890'}
+        response = self.client.post(self.register_url, data=json.dumps(duplicate), content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Phone number already in use', response.json()['error'])
+
+    def test_backfill_phone_index(self):
+        """Test the backfill command indexes users saved before the column existed."""
+        user = User.objects.create_user(
+            email='old@example.com', username='olduser', password='password123',
+            nomor_telepon=encrypt_phone_number('6281311112222'),
+        )
+        User.objects.filter(pk=user.pk).update(nomor_telepon_index=None)
+
+        out = StringIO()
+        call_command('backfill_phone_index', batch_size=1, stdout=out)
+        self.assertIn('Indexed 1 users', out.getvalue())
+        self.assertTrue(User.objects.phone_in_use('081311112222'))
+
+class RotatePhoneKeysTestCase(TestCase):
+    def setUp(self):
+        self.old_key = Fernet.generate_key().decode()
+        self.new_key = Fernet.generate_key().decode()
+        for i in range(3):
+            User.objects.create_user(
+                email=f'rotate{i}@example.com', username=f'rotate{i}', password='password123',
+                nomor_telepon=Fernet(self.old_key).encrypt(f'62811000000{i}'.encode()).decode(),
+            )
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.checkpoint = os.path.join(self.tmp.name, 'rotate.json')
+
+    def test_rotation_resumes_from_checkpoint(self):
+        """Test rows are moved to the newest key in batches and an interrupted run resumes."""
+        with override_settings(CRYPTOGRAPHY_KEYS=f'{self.new_key},{self.old_key}'):
+            call_command('rotate_phone_keys', batch_size=2, max_batches=1, sleep=0,
+                         checkpoint=self.checkpoint, stdout=StringIO())
+            with open(self.checkpoint) as f:
+                self.assertEqual(json.load(f)['rotated'], 2)
+
+            out = StringIO()
+            call_command('rotate_phone_keys', batch_size=2, sleep=0, checkpoint=self.checkpoint, stdout=out)
+            self.assertIn('Rotated 3, already current 0', out.getvalue())
+            self.assertFalse(os.path.exists(self.checkpoint))
+
+        # Every row now decrypts with the new key alone
+        new_cipher = Fernet(self.new_key)
+        phones = sorted(new_cipher.decrypt(phone.encode()).decode() for phone in User.objects.values_list('nomor_telepon', flat=True))
+        self.assertEqual(phones, ['628110000000', '628110000001', '628110000002'])
+
+    def test_number_changed_during_rotation_is_kept(self):
+        """Test a number saved while its batch is being rotated is not overwritten with the old one."""
+
+        def rotate_while_user_changes_number(encrypted, cipher, primary):
+            user = User.objects.get(username='rotate1')
+            if user.nomor_telepon == encrypted:
+                user.nomor_telepon = Fernet(self.new_key).encrypt(b'628119999999').decode()
+                user.save()
+            return rotate_phone_number(encrypted, cipher, primary)
+
+        with override_settings(CRYPTOGRAPHY_KEYS=f'{self.new_key},{self.old_key}'), \
+                patch.object(rotate_phone_keys, 'rotate_phone_number', side_effect=rotate_while_user_changes_number):
+            out = StringIO()
+            call_command('rotate_phone_keys', batch_size=10, sleep=0, checkpoint=self.checkpoint, stdout=out)
+            self.assertIn('Rotated 2, already current 1', out.getvalue())
+            self.assertEqual(list(User.objects.filter_by_phone('628119999999')), [User.objects.get(username='rotate1')])
+
+        phone = User.objects.get(username='rotate1').nomor_telepon
+        self.assertEqual(Fernet(self.new_key).decrypt(phone.encode()), b'628119999999')
+
+class ImportUsersCommandTestCase(TestCase):
+    def test_import_csv(self):
+        """Test users, petugas and admins are imported in bulk with usable passwords."""
+        User.objects.create_user(email='exists@example.com', username='exists', password='password123')
+        # Seed the row counters, the import must keep them in step
+        self.assertEqual(estimated_count(User), 1)
+        self.assertEqual(estimated_count(Petugas), 0)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, 'users.csv')
+        with open(path, 'w') as f:
+            f.write(
+                'email,username,name,password,nomor_telepon,role,jabatan\n'
+                'warga@example.com,warga,Warga Satu,password123,081200000001,,\n'
+                'petugas@example.com,petugas1,Petugas Satu,password123,081200000002,petugas,Petugas Lapangan\n'
+                'admin@example.com,admin1,Admin Satu,password123,,admin,\n'
+                'exists@example.com,exists2,Exists,password123,,,\n'
+                'nopassword@example.com,nopassword,No Password,,,,\n'
+                f'long@example.com,{"u" * 30},Long Username,password123,,,\n'
+                'not-an-email,bademail,Bad Email,password123,,,\n'
+                'noname@example.com,noname1,,password123,,,\n'
+            )
+
+        out = StringIO()
+        call_command('import_users', path, chunk_size=2, workers=1, stdout=out)
+        self.assertIn('Imported 4 users', out.getvalue())
+        self.assertIn('1 already existed, 3 invalid', out.getvalue())
+        self.assertFalse(User.objects.filter(username__in=['u' * 30, 'bademail']).exists())
+        self.assertIsNone(User.objects.get(username='noname1').name)
+
+        warga = User.objects.get(email='warga@example.com')
+        self.assertTrue(warga.check_password('password123'))
+        self.assertEqual(list(User.objects.filter_by_phone('081200000001')), [warga])
+        self.assertEqual(Petugas.objects.get(email='petugas@example.com').jabatan, 'Petugas Lapangan')
+        self.assertTrue(Admin.objects.filter(email='admin@example.com').exists())
+        self.assertEqual(estimated_count(User), 5)
+        self.assertEqual(estimated_count(Petugas), 1)
+
+class PetugasPromotionTestCase(TestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(email=f'promote{i}@example.com', username=f'promote{i}', password='password123')
+            for i in range(3)
+        ]
+
+    def test_promote_users_only_inserts_child_rows(self):
+        """Test a batch promotion is one is_staff UPDATE and one petugas INSERT, with no parent re-save."""
+        with CaptureQueriesContext(connection) as ctx:
+            promoted = Petugas.objects.promote_users(self.users, 'Petugas Lapangan')
+        # Row counter upkeep (main.counts) is not part of the promotion itself
+        statements = [query['sql'] for query in ctx.captured_queries if 'main_rowcounter' not in query['sql']]
+        self.assertEqual(len([sql for sql in statements if sql.startswith('INSERT')]), 1)
+        self.assertEqual(len([sql for sql in statements if sql.startswith('UPDATE')]), 1)
+        self.assertFalse(any('"email"' in sql for sql in statements if sql.startswith('UPDATE')))
+
+        self.assertEqual(len(promoted), 3)
+        self.assertEqual(Petugas.objects.filter(is_staff=True, jabatan='Petugas Lapangan').count(), 3)
+        self.assertEqual(Petugas.objects.promote_users(self.users, 'Petugas Lapangan'), [])
+
+    def test_assign_petugas_batch(self):
+        """Test the batch endpoint promotes new users and reports existing and unknown ones."""
+        admin = Admin.objects.create_admin(email='batchadmin@example.com', username='batchadmin', password='password123')
+        Petugas.objects.promote(self.users[0], 'Koordinator')
+        missing_id = '00000000-0000-0000-0000-000000000000'
+
+        response = self.client.post(
+            reverse('api_auth:assign_petugas_batch'),
+            data=json.dumps({'user_ids': [str(user.id) for user in self.users] + [missing_id], 'jabatan': 'Petugas Lapangan'}),
+            content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {tokens_for_user(admin).access_token}',
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(sorted(p['username'] for p in data['petugas']), ['promote1', 'promote2'])
+        self.assertEqual(data['already_petugas'], [str(self.users[0].id)])
+        self.assertEqual(data['not_found'], [missing_id])
+        self.assertEqual(Petugas.objects.get(pk=self.users[0].pk).jabatan, 'Koordinator')
+
+class ConstraintRegistrationTestCase(TestCase):
+    def setUp(self):
+        self.payload = {
+            'email': 'signup@example.com',
+            'username': 'signupuser',
+            'name': 'Signup User',
+            'password': 'password123',
+            'nomor_telepon': '081255554444',
+        }
+        self.admin = User.objects.create_superuser(email='partner-admin@example.com', username='partneradmin', password='password123')
+
+    def register(self, data):
+        return self.client.post(reverse('api_auth:register'), data=json.dumps(data), content_type='application/json')
+
+    def test_register_single_insert(self):
+        """Test a signup is one INSERT, with no uniqueness lookups before it."""
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.register(self.payload)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        user_queries = [query['sql'] for query in ctx.captured_queries if '"api_auth_user"' in query['sql']]
+        self.assertEqual(len(user_queries), 1)
+        self.assertTrue(user_queries[0].startswith('INSERT'))
+
+    def test_duplicates_from_constraints(self):
+        """Test unique constraint violations become the field-specific error messages."""
+        self.register(self.payload)
+        cases = (
+            ({'username': 'other', 'nomor_telepon': '081200000001'}, 'Email already in use'),
+            ({'email': 'other@example.com', 'nomor_telepon': '081200000001'}, 'Username already in use'),
+            ({'email': 'other@example.com', 'username': 'other'}, 'Phone number already in use'),
+        )
+        for changes, message in cases:
+            response = self.register({**self.payload, **changes})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(message, response.json()['error'])
+        self.assertEqual(User.objects.filter(email__in=['signup@example.com', 'other@example.com']).count(), 1)
+
+        # The failed insert must not break the surrounding transaction
+        with self.assertRaises(DjangoValidationError):
+            User.objects.register(email='signup@example.com', username='third', name='Third', password='password123')
+        self.assertTrue(User.objects.filter(username='signupuser').exists())
+
+    def test_duplicate_message_ignores_submitted_values(self):
+        """Test the duplicate column is read from the constraint, not from values that contain another column's name."""
+        postgres_text = ('duplicate key value violates unique constraint "api_auth_user_username_key"\n'
+                         'DETAIL:  Key (username)=(john.email) already exists.')
+        self.assertEqual(_unique_violation_message(IntegrityError(postgres_text)), 'Username already in use')
+        # psycopg's error, with the constraint name in its diagnostics
+        error = IntegrityError(postgres_text)
+        error.__cause__ = Exception(postgres_text)
+        error.__cause__.diag = SimpleNamespace(constraint_name='api_auth_user_nomor_telepon_index_5b6e7f2a_uniq')
+        self.assertEqual(_unique_violation_message(error), 'Phone number already in use')
+        error.__cause__.diag = SimpleNamespace(constraint_name='api_auth_user_username_key')
+        self.assertEqual(_unique_violation_message(error), 'Username already in use')
+        self.assertEqual(_unique_violation_message(IntegrityError('UNIQUE constraint failed: api_auth_user.email')),
+                         'Email already in use')
+        self.assertIsNone(_unique_violation_message(IntegrityError('NOT NULL constraint failed: api_auth_user.email')))
+
+        self.register({**self.payload, 'username': 'emailnomor'})
+        response = self.register({**self.payload, 'email': 'other@example.com', 'nomor_telepon': '081200000001',
+                                  'username': 'emailnomor'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Username already in use', response.json()['error'])
+
+    def test_register_batch(self):
+        """Test batch registration inserts the valid entries and reports the rest by index."""
+        admin_access = str(tokens_for_user(self.admin).access_token)
+        users = [
+            self.payload,
+            {**self.payload, 'email': 'second@example.com', 'username': 'seconduser', 'nomor_telepon': '081255553333'},
+            {**self.payload, 'email': 'third@example.com', 'username': 'signupuser', 'nomor_telepon': '081255552222'},
+            {**self.payload, 'email': 'not-an-email', 'username': 'fourthuser'},
+        ]
+        response = self.client.post(reverse('api_auth:register_batch'), data=json.dumps({'users': users}),
+                                    content_type='application/json', HTTP_AUTHORIZATION=f'Bearer {admin_access}')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        data = response.json()
+        self.assertEqual([user['username'] for user in data['users']], ['signupuser', 'seconduser'])
+        self.assertEqual([error['index'] for error in data['errors']], [2, 3])
+        self.assertEqual(data['errors'][0]['error'], 'Username already in use')
+        self.assertTrue(User.objects.get(email='second@example.com').check_password('password123'))
+
+        user_access = str(tokens_for_user(User.objects.get(email='second@example.com')).access_token)
+        response = self.client.post(reverse('api_auth:register_batch'), data=json.dumps({'users': users}),
+                                    content_type='application/json', HTTP_AUTHORIZATION=f'Bearer {user_access}')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_register_many_bulk_insert(self):
+        """Test register_many inserts conflict-free entries with one INSERT."""
+        entries = [
+            {'email': f'bulk{i}@example.com', 'username': f'bulkuser{i}', 'name': 'Bulk User', 'password': 'password123'}
+            for i in range(3)
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            users, errors = User.objects.register_many(entries)
+        self.assertEqual(errors, {})
+        self.assertEqual(len(users), 3)
+        inserts = [query['sql'] for query in ctx.captured_queries if query['sql'].startswith('INSERT INTO "api_auth_user"')]
+        self.assertEqual(len(inserts), 1)
+
+class AsyncAuthViewsTestCase(TestCase):
+    def setUp(self):
+        self.payload = {
+            'email': 'async@example.com',
+            'username': 'asyncuser',
+            'name': 'Async User',
+            'password': 'password123',
+            'nomor_telepon': '081277776666',
+        }
+
+    def post(self, name, data):
+        return self.client.post(reverse(f'api_auth:{name}'), data=json.dumps(data), content_type='application/json')
+
+    def test_register_login_and_refresh(self):
+        """Test the async endpoints keep the JSON contracts of the sync ones."""
+        response = self.post('async_register', self.payload)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.json(), {'message': 'User registered successfully'})
+        user = User.objects.get(email='async@example.com')
+        self.assertTrue(user.check_password('password123'))
+        self.assertTrue(User.objects.phone_in_use('081277776666'))
+
+        response = self.post('async_login', {'email': 'async@example.com', 'password': 'password123'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data['message'], 'Login successful')
+        self.assertEqual(data['user']['username'], 'asyncuser')
+        self.assertEqual(AccessToken(data['token']['access'])['role'], 'user')
+        self.assertIn('jwt', response.cookies)
+
+        response = self.post('async_token_refresh', {'refresh': data['token']['refresh']})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(AccessToken(response.json()['access'])['role'], 'user')
+
+    def test_errors(self):
+        """Test async endpoint error responses match the sync endpoints."""
+        self.post('async_register', self.payload)
+        response = self.post('async_register', {**self.payload, 'username': 'another', 'nomor_telepon': '081277775555'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Email already in use', response.json()['error'])
+        response = self.post('async_register', {**self.payload, 'email': 'another@example.com', 'username': 'another'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Phone number already in use', response.json()['error'])
+
+        response = self.post('async_login', {'email': 'async@example.com', 'password': 'wrongpassword'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.json(), {'error': 'Invalid credentials'})
+
+        response = self.post('async_token_refresh', {'refresh': 'not-a-token'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_login_throttled(self):
+        """Test the async login applies LoginRateThrottle."""
+        cache.clear()
+        # LoginRateThrottle is a no-op while 'test' is in sys.argv
+        with patch('api_auth.throttling.sys.argv', ['manage.py']):
+            for _ in range(3):
+                self.post('async_login', {'email': 'nobody@example.com', 'password': 'wrongpassword'})
+            response = self.post('async_login', {'email': 'nobody@example.com', 'password': 'wrongpassword'})
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(response.json()['error'], 'Too many login attempts')
+
+class SessionStrategyTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='session@example.com', username='sessionuser', password='password123')
+
+    def login(self, name='login'):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse(f'api_auth:{name}'),
+                                        data=json.dumps({'email': 'session@example.com', 'password': 'password123'}),
+                                        content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        session_writes = [
+            query['sql'] for query in ctx.captured_queries
+            if 'django_session' in query['sql'] and not query['sql'].lstrip().upper().startswith('SELECT')
+        ]
+        return response, session_writes
+
+    @override_settings(API_SESSION_STRATEGY='db', SESSION_ENGINE='django.contrib.sessions.backends.db')
+    def test_db_sessions_written_once(self):
+        """Test a db-backed login saves its session in a single write."""
+        for name in ('login', 'async_login'):
+            response, session_writes = self.login(name)
+            self.assertEqual(len(session_writes), 1)
+            self.assertEqual(self.client.session['_auth_user_id'], str(self.user.pk))
+
+    @override_settings(API_SESSION_STRATEGY='signed_cookies', SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies')
+    def test_signed_cookie_sessions(self):
+        """Test signed cookie sessions keep the logged in user without touching the database."""
+        response, session_writes = self.login()
+        self.assertEqual(session_writes, [])
+        self.assertIn(settings.SESSION_COOKIE_NAME, response.cookies)
+        self.assertEqual(self.client.session['_auth_user_id'], str(self.user.pk))
+
+    @override_settings(API_SESSION_STRATEGY='none', SESSION_ENGINE='django.contrib.sessions.backends.signed_cookies')
+    def test_no_sessions(self):
+        """Test API logins create no session at all when the strategy is 'none'."""
+        for name in ('login', 'async_login'):
+            response, session_writes = self.login(name)
+            self.assertEqual(session_writes, [])
+            self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+            self.assertIn('jwt', response.cookies)
+
+class SQLiteCacheTestCase(TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.location = os.path.join(self.tmp.name, 'cache.sqlite3')
+        self.cache = SQLiteCache(self.location, {})
+
+    def test_add_incr_and_expiry(self):
+        """Test add only sets missing keys, incr is atomic on ints and expired keys are gone."""
+        self.assertTrue(self.cache.add('attempts', 1, timeout=60))
+        self.assertFalse(self.cache.add('attempts', 5, timeout=60))
+        self.assertEqual(self.cache.incr('attempts'), 2)
+        self.assertEqual(self.cache.decr('attempts'), 1)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+        self.cache.set('profile', {'nama': 'Budi'}, timeout=60)
+        self.assertEqual(self.cache.get_many(['profile', 'attempts']), {'profile': {'nama': 'Budi'}, 'attempts': 1})
+
+        with patch('nusa_lapor_backend.cache.time.time', return_value=time.time() + 120):
+            self.assertIsNone(self.cache.get('attempts'))
+            self.assertFalse(self.cache.has_key('profile'))
+            self.assertTrue(self.cache.add('attempts', 7, timeout=60))
+
+    def test_shared_between_instances(self):
+        """Test separate backend instances (as in separate workers) see the same counters."""
+        other = SQLiteCache(self.location, {})
+        self.cache.add('shared', 0, timeout=60)
+
+        def worker():
+            for _ in range(50):
+                other.incr('shared')
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.cache.get('shared'), 200)
@@ -1,8 +1,8 @@
 from rest_framework.throttling import SimpleRateThrottle, AnonRateThrottle
-from django.core.cache import cache
+from django.core.cache import cache as default_cache
 from rest_framework.exceptions import Throttled
+import math
 import sys
-import time
 
 class TokenRefreshRateThrottle(AnonRateThrottle):
     """
@@ -17,6 +17,7 @@ class LoginRateThrottle(SimpleRateThrottle):
     Allows 3 login attempts per IP address per minute.
     """
     scope = 'login'
+    cache = default_cache
     
     def __init__(self):
         # Check if we're running in test mode
@@ -64,10 +65,22 @@ class LoginRateThrottle(SimpleRateThrottle):
         
         return any(request.path.endswith(endpoint) for endpoint in auth_endpoints)
     
+    def get_window_keys(self, key, now=None):
+        """
+        Return the cache keys of the current and previous fixed windows for `key`.
+        """
+        window = int((self.timer() if now is None else now) // self.duration)
+        return f"{key}:{window}", f"{key}:{window - 1}"
+    
     def allow_request(self, request, view):
         """
         Check if request should be allowed.
         Overridden to add custom tracking for failed vs successful logins.
+        
+        Uses a sliding-window counter: one integer per fixed window, with the
+        previous window weighted by how much of it still overlaps the sliding
+        window. Each key stores at most two integers and is updated with an
+        atomic cache increment.
         """
         # Always allow during tests
         if self.is_test:
@@ -84,56 +97,74 @@ class LoginRateThrottle(SimpleRateThrottle):
         if not self.key:
             return True
             
-        # Get the history from cache
-        self.history = self.get_history(self.key)
-        
-        # Check if we've exceeded the throttle limit
         self.now = self.timer()
+        current_key, previous_key = self.get_window_keys(self.key, self.now)
+        
+        # Count this attempt first so concurrent requests cannot all slip through
+        self.current_count = self.increment(current_key)
+        self.previous_count = self.cache.get(previous_key, 0)
         
-        # Drop any requests outside the throttle window
-        while self.history and self.history[0] <= self.now - self.duration:
-            self.history.pop(0)
-            
         # Check if the request should be throttled
-        if len(self.history) >= self.num_requests:
-            # Request should be throttled
-            # Calculate wait time
-            remaining_seconds = self.duration - (self.now - self.history[0])
+        if self.estimate(self.previous_count, self.current_count) > self.num_requests:
+            # Rejected attempts do not count towards the limit
+            self.decrement(current_key)
+            self.current_count -= 1
             
             # Raise the throttled exception directly
-            raise Throttled(wait=remaining_seconds)
-            
-        # Request is allowed, update the history
-        self.history.append(self.now)
-        self.cache_history(self.key, self.history)
+            raise Throttled(wait=self.wait())
         
         return True
-        
-    def get_history(self, key):
+    
+    def elapsed_fraction(self):
+        """How far into the current fixed window we are, between 0 and 1."""
+        return (self.now % self.duration) / self.duration
+    
+    def estimate(self, previous_count, current_count):
         """
-        Get history from cache.
+        Estimate the number of requests in the sliding window ending now.
         """
-        return cache.get(key, [])
-        
-    def cache_history(self, key, history):
+        return previous_count * (1 - self.elapsed_fraction()) + current_count
+    
+    def increment(self, key):
         """
-        Update history in cache.
+        Atomically increment a window counter, creating it if needed.
         """
-        cache.set(key, history, self.duration)
+        # Keep each window around long enough to serve as the previous window
+        self.cache.add(key, 0, self.duration * 2)
+        try:
+            return self.cache.incr(key)
+        except ValueError:
+            # The key expired between add() and incr()
+            self.cache.set(key, 1, self.duration * 2)
+            return 1
+    
+    def decrement(self, key):
+        try:
+            self.cache.decr(key)
+        except ValueError:
+            pass
         
     def wait(self):
         """
         Calculate how long to wait before next request.
         """
-        if not hasattr(self, 'history'):
+        if not hasattr(self, 'current_count'):
             return None
-            
-        if not self.history:
+        
+        previous_count, current_count = self.previous_count, self.current_count
+        if self.estimate(previous_count, current_count) + 1 <= self.num_requests:
             return None
-            
-        # Calculate remaining window
-        remaining_duration = self.duration - (self.now - self.history[0])
-        return max(0, int(remaining_duration))
+        
+        offset = self.now % self.duration
+        if current_count + 1 <= self.num_requests and previous_count:
+            # Allowed later in this window, once enough of the previous window has slid out
+            fraction = 1 - (self.num_requests - current_count - 1) / previous_count
+            remaining_duration = fraction * self.duration - offset
+        else:
+            # Allowed in the next window, once enough of this window has slid out
+            fraction = 1 - (self.num_requests - 1) / current_count if current_count else 0
+            remaining_duration = (self.duration - offset) + fraction * self.duration
+        return max(0, int(math.ceil(remaining_duration)))
 
 
 class SuccessfulLoginResetThrottle(LoginRateThrottle):
@@ -143,6 +174,6 @@ class SuccessfulLoginResetThrottle(LoginRateThrottle):
     def reset_throttle_counter(self, key):
         """Reset the throttle counter for a specific key."""
         try:
-            cache.delete(key)
+            self.cache.delete_many(self.get_window_keys(key))
         except Exception as e:
             print(f"Error resetting throttle counter: {e}")
\ No newline at end of file
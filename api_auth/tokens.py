@@ -0,0 +1,106 @@
+from django.db import transaction
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken as BaseRefreshToken
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken, BlacklistedToken
+from .blacklist import get_blacklist_filter, mark_revoked
+
+# Compact role claims carried by our tokens.
+# `role` is one of ROLE_USER / ROLE_PETUGAS / ROLE_ADMIN (admin wins if both apply),
+# `jabatan` is only present for users with a Petugas profile.
+ROLE_CLAIM = 'role'
+JABATAN_CLAIM = 'jabatan'
+
+ROLE_USER = 'user'
+ROLE_PETUGAS = 'petugas'
+ROLE_ADMIN = 'admin'
+
+class RefreshToken(BaseRefreshToken):
+    """
+    Refresh token that checks the blacklist through the in-memory
+    `BlacklistFilter`, so only filter hits cost a database query.
+    """
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if get_blacklist_filter().is_blacklisted(jti):
+            raise TokenError(_("Token is blacklisted"))
+
+def get_role_claims(user):
+    """
+    Build the role claims for a user.
+    Load the user with select_related('petugas') to avoid an extra query.
+    """
+    petugas = getattr(user, 'petugas', None)
+    if user.is_admin:
+        role = ROLE_ADMIN
+    elif petugas is not None:
+        role = ROLE_PETUGAS
+    else:
+        role = ROLE_USER
+
+    claims = {ROLE_CLAIM: role}
+    if petugas is not None:
+        claims[JABATAN_CLAIM] = petugas.jabatan
+    return claims
+
+def add_role_claims(token, user):
+    """
+    Write the role claims for `user` into `token` and return it.
+    Access tokens start as a copy of their refresh token's claims, so a
+    jabatan the user no longer holds is removed.
+    """
+    claims = get_role_claims(user)
+    for claim, value in claims.items():
+        token[claim] = value
+    if JABATAN_CLAIM not in claims and JABATAN_CLAIM in token:
+        del token[JABATAN_CLAIM]
+    return token
+
+def tokens_for_user(user):
+    """
+    Issue a refresh token carrying the user's role claims.
+    The claims are copied into `refresh.access_token` as well.
+    """
+    return add_role_claims(RefreshToken.for_user(user), user)
+
+def has_role_claims(token):
+    """Whether a validated token carries role claims (tokens issued before them do not)."""
+    return token is not None and ROLE_CLAIM in token
+
+def token_is_petugas(token):
+    """
+    Whether the token's role is petugas. An admin with a Petugas profile has
+    the admin role, and counts as petugas through the jabatan written with it.
+    """
+    role = token.get(ROLE_CLAIM)
+    return role == ROLE_PETUGAS or (role == ROLE_ADMIN and JABATAN_CLAIM in token)
+
+def token_is_admin(token):
+    return token.get(ROLE_CLAIM) == ROLE_ADMIN
+
+def revoke_user_tokens(*users):
+    """
+    Blacklist every unexpired refresh token of the given users, e.g. after a role
+    change, so the old role claims cannot be refreshed. Returns the number of tokens revoked.
+    """
+    outstanding = list(OutstandingToken.objects.filter(
+        user__in=users,
+        expires_at__gt=timezone.now(),
+        blacklistedtoken__isnull=True,
+    ))
+    revoked = BlacklistedToken.objects.bulk_create(
+        [BlacklistedToken(token=token) for token in outstanding],
+        ignore_conflicts=True,
+    )
+    # bulk_create sends no post_save, update this process's filter and the shared cache directly
+    blacklist_filter = get_blacklist_filter()
+    for token in outstanding:
+        blacklist_filter.add(token.jti, token.expires_at)
+
+    def mark_all_revoked():
+        for token in outstanding:
+            mark_revoked(token.jti, token.expires_at)
+    transaction.on_commit(mark_all_revoked)
+    return len(revoked)
@@ -1,12 +1,15 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
+from . import async_views
 from .views import (
     register,
+    register_batch,
     login, 
     protected,
     protected_petugas,
     protected_admin,
     assign_petugas,
+    assign_petugas_batch,
     logout,
     request_access_token,
 )
@@ -15,11 +18,18 @@ app_name = "api_auth"
 
 urlpatterns = [
     path("register/", register, name="register"),
+    path("register/batch/", register_batch, name="register_batch"),
     path("login/", login, name="login"),
     path("protected/", protected, name="protected"),
     path("protected/petugas/", protected_petugas, name="protected_petugas"),
     path("protected/admin/", protected_admin, name="protected_admin"),
     path("assign/petugas/", assign_petugas, name="assign_petugas"),
+    path("assign/petugas/batch/", assign_petugas_batch, name="assign_petugas_batch"),
     path("logout/", logout, name="logout"),
     path("token/refresh/", request_access_token, name="token_refresh"),
+
+    # Async versions for ASGI deployments, same request and response bodies
+    path("async/register/", async_views.register, name="async_register"),
+    path("async/login/", async_views.login, name="async_login"),
+    path("async/token/refresh/", async_views.request_access_token, name="async_token_refresh"),
 ]
\ No newline at end of file
@@ -1,8 +1,10 @@
 from rest_framework import serializers
 from django.conf import settings
 from django.core.validators import RegexValidator
-from cryptography.fernet import Fernet
+from django.db import models
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
 import base64
+import hashlib, hmac
 import os, re
 
 def get_encryption_key():
@@ -25,6 +27,104 @@ def get_encryption_key():
     
     return key
 
+def get_blind_index_key():
+    """
+    Get the HMAC key for phone number blind indexes.
+    Kept apart from the Fernet key so rotating one does not invalidate the other;
+    derived from SECRET_KEY when PHONE_BLIND_INDEX_KEY is not set.
+    """
+    key = getattr(settings, 'PHONE_BLIND_INDEX_KEY', None)
+    if key:
+        return key.encode() if isinstance(key, str) else key
+    return hashlib.sha256(b'nusa-lapor.phone-blind-index:' + settings.SECRET_KEY.encode()).digest()
+
+def normalize_phone_number(phone):
+    """
+    Bring a phone number to the stored format: country code and digits only.
+    0812..., +62812... and 62-812... all become 62812...
+    """
+    phone = str(phone).strip()
+    # 1. If starts with 0, replace with 62
+    # 2. If starts with +62, replace with 62
+    # 3. Remove any spaces or hyphens
+    if phone.startswith('0'):
+        phone = '62' + phone[1:]
+    elif phone.startswith('+62'):
+        phone = '62' + phone[3:]
+    elif phone.startswith('+'):
+        phone = phone[1:]  # Just remove the plus
+    return re.sub(r'\D', '', phone)
+
+def phone_blind_index(phone_number):
+    """
+    Keyed HMAC-SHA256 of the normalized phone number.
+    Deterministic, unlike the Fernet ciphertext, so it can be indexed and
+    compared, without revealing the number to anyone lacking the key.
+    """
+    if not phone_number:
+        return None
+    phone = normalize_phone_number(phone_number)
+    if not phone:
+        return None
+    return hmac.new(get_blind_index_key(), phone.encode(), hashlib.sha256).hexdigest()
+
+class EncryptedPhoneNumber(str):
+    """Fernet ciphertext of a phone number that carries the blind index of its plain value."""
+    def __new__(cls, encrypted, blind_index):
+        value = super().__new__(cls, encrypted)
+        value.blind_index = blind_index
+        return value
+
+def get_encryption_keys():
+    """
+    Get the Fernet key ring, newest key first.
+    CRYPTOGRAPHY_KEYS lists the keys comma-separated: the first encrypts, all of
+    them decrypt, so a new key can be put in front while old rows are rotated.
+    Falls back to the single key from `get_encryption_key`.
+    """
+    keys = getattr(settings, 'CRYPTOGRAPHY_KEYS', None) or os.environ.get('CRYPTOGRAPHY_KEYS')
+    if isinstance(keys, str):
+        keys = [key.strip() for key in keys.split(',') if key.strip()]
+    if not keys:
+        keys = [get_encryption_key()]
+    return tuple(key.encode() if isinstance(key, str) else key for key in keys)
+
+_ciphers = {}
+
+def get_cipher(key=None):
+    """
+    Return the cipher for `key`, built once per key.
+    Without a key, returns a MultiFernet over the configured key ring.
+    """
+    if key is None:
+        keys = get_encryption_keys()
+        cipher = _ciphers.get(keys)
+        if cipher is None:
+            cipher = _ciphers[keys] = MultiFernet([get_cipher(k) for k in keys])
+        return cipher
+    cipher = _ciphers.get(key)
+    if cipher is None:
+        cipher = _ciphers[key] = Fernet(key)
+    return cipher
+
+def get_primary_cipher():
+    """Return the Fernet cipher for the newest key in the ring, the one new values are encrypted with."""
+    return get_cipher(get_encryption_keys()[0])
+
+def rotate_phone_number(encrypted_phone, cipher=None, primary=None):
+    """
+    Re-encrypt a phone number under the newest key.
+    Returns None if it is already encrypted with the newest key, so callers can skip the write.
+    Raises InvalidToken if no key in the ring can decrypt it.
+    """
+    primary = primary or get_primary_cipher()
+    try:
+        primary.decrypt(encrypted_phone.encode())
+        return None
+    except InvalidToken:
+        pass
+    return (cipher or get_cipher()).rotate(encrypted_phone.encode()).decode()
+
 def encrypt_phone_number(phone_number):
     """Encrypt a phone number using Fernet symmetric encryption."""
     # Handle None and empty string
@@ -34,12 +134,10 @@ def encrypt_phone_number(phone_number):
     if phone_number == "":
         return ""
     
-    key = get_encryption_key()
-    f = Fernet(key)
-    encrypted = f.encrypt(str(phone_number).encode())
+    encrypted = get_cipher().encrypt(str(phone_number).encode())
     return encrypted.decode()
 
-def decrypt_phone_number(encrypted_phone):
+def decrypt_phone_number(encrypted_phone, cipher=None):
     """Decrypt a phone number that was encrypted with Fernet."""
     # Handle None and empty string
     if encrypted_phone is None:
@@ -49,15 +147,30 @@ def decrypt_phone_number(encrypted_phone):
         return ""
     
     try:
-        key = get_encryption_key()
-        f = Fernet(key)
-        decrypted = f.decrypt(encrypted_phone.encode())
+        decrypted = (cipher or get_cipher()).decrypt(encrypted_phone.encode())
         return decrypted.decode()
     except Exception as e:
         # Log error but don't expose details
         print(f"Decryption error: {type(e).__name__}")
         return None
 
+def decrypt_phone_numbers(encrypted_phones):
+    """
+    Decrypt a list of phone numbers in one pass.
+    The key is resolved once and repeated ciphertexts are decrypted once.
+    Values that are not Fernet tokens are returned unchanged.
+    Returns the plain values in the same order.
+    """
+    cipher = get_cipher()
+    decrypted = {}
+    for value in encrypted_phones:
+        if value not in decrypted:
+            if isinstance(value, str) and value.startswith('gAAA'):
+                decrypted[value] = decrypt_phone_number(value, cipher)
+            else:
+                decrypted[value] = value
+    return [decrypted[value] for value in encrypted_phones]
+
 # Custom field for handling encrypted phone numbers in serializers
 class EncryptedPhoneField(serializers.CharField):
     """
@@ -87,6 +200,10 @@ class EncryptedPhoneField(serializers.CharField):
             
         # Check if the value is encrypted
         if isinstance(value, str) and value.startswith('gAAA'):
+            # Use the value decrypted up front by EncryptedPhoneListSerializer, if any
+            decrypted_phones = getattr(self.parent, '_decrypted_phones', None)
+            if decrypted_phones and value in decrypted_phones:
+                return decrypted_phones[value]
             try:
                 # Decrypt the phone number
                 return decrypt_phone_number(value)
@@ -142,25 +259,12 @@ class EncryptedPhoneField(serializers.CharField):
                 "Example: 081234567890, +62812345678, or +62-81234567890"
             )
             
-        # Transform the phone number to standard format
-        # 1. If starts with 0, replace with 62
-        # 2. If starts with +62, replace with 62
-        # 3. Remove any spaces or hyphens
-        
-        # First handle the prefix
-        if phone.startswith('0'):
-            phone = '62' + phone[1:]
-        elif phone.startswith('+62'):
-            phone = '62' + phone[3:]
-        elif phone.startswith('+'):
-            phone = phone[1:]  # Just remove the plus
-            
-        # Remove any non-digit characters (spaces, hyphens, etc.)
-        phone = re.sub(r'\D', '', phone)
+        # Transform the phone number to standard format (62 prefix, digits only)
+        phone = normalize_phone_number(phone)
         
         # Encrypt the validated and transformed phone number
         try:
-            return encrypt_phone_number(phone)
+            return EncryptedPhoneNumber(encrypt_phone_number(phone), phone_blind_index(phone))
         except Exception as e:
             # If encryption fails, raise a validation error
             print(f"Error encrypting phone number: {e}")
@@ -173,6 +277,27 @@ class PhoneNumberSerializer(serializers.Serializer):
     """
     phone = EncryptedPhoneField(allow_blank=True)
 
+class EncryptedPhoneListSerializer(serializers.ListSerializer):
+    """
+    List serializer for `many=True` that decrypts the encrypted fields of all
+    items in one batch before serializing them, instead of row by row.
+    Set it as `list_serializer_class` in the child serializer's Meta.
+    """
+    def to_representation(self, data):
+        items = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        encrypted_fields = getattr(getattr(self.child, 'Meta', None), 'encrypted_fields', [])
+        values = [
+            value
+            for item in items
+            for value in (getattr(item, field_name, None) for field_name in encrypted_fields)
+            if isinstance(value, str) and value.startswith('gAAA')
+        ]
+        self.child._decrypted_phones = dict(zip(values, decrypt_phone_numbers(values)))
+        try:
+            return super().to_representation(items)
+        finally:
+            self.child._decrypted_phones = None
+
 # Mixin for model serializers to handle encrypted phone fields
 class EncryptedPhoneSerializerMixin:
     """
@@ -184,6 +309,7 @@ class EncryptedPhoneSerializerMixin:
             model = User
             fields = ['id', 'username', 'nomor_telepon']
             encrypted_fields = ['nomor_telepon']  # Specify which fields should be encrypted
+            list_serializer_class = EncryptedPhoneListSerializer  # Batch decryption for many=True
     """
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -225,7 +351,10 @@ class EncryptedPhoneSerializerMixin:
                 # Skip if already handled by EncryptedPhoneField
                 if not isinstance(self.fields.get(field_name), EncryptedPhoneField):
                     if isinstance(value, str) and value.startswith('gAAA'):
-                        representation[field_name] = decrypt_phone_number(value)
+                        decrypted_phones = getattr(self, '_decrypted_phones', None) or {}
+                        representation[field_name] = (
+                            decrypted_phones[value] if value in decrypted_phones else decrypt_phone_number(value)
+                        )
                 
         return representation
     
@@ -3,24 +3,37 @@ from tokenize import TokenError
 from django.http import JsonResponse
 from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework_simplejwt.tokens import RefreshToken, AccessToken
+from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework_simplejwt.token_blacklist.models import OutstandingToken, BlacklistedToken
 from django.contrib.auth import get_user_model
 from rest_framework.request import Request
 from django.views.decorators.csrf import csrf_exempt
 import json
-from .serializers import UserSerializer
+from .serializers import RegistrationSerializer
 from .permissions import IsPetugas, IsAdmin
 from .models import User, Petugas
 from .throttling import LoginRateThrottle, SuccessfulLoginResetThrottle, TokenRefreshRateThrottle
+from .hashing import HashingPoolFull, get_hashing_pool
+from .authentication import get_user_cache
+from .tokens import RefreshToken, tokens_for_user, add_role_claims, revoke_user_tokens
+from .blacklist import get_blacklist_filter
+from .exceptions import hashing_pool_full_response
+from .sessions import start_api_session
+from main.counts import estimated_count
 from rest_framework.exceptions import Throttled
 
+# Upper bound on users promoted by one assign_petugas_batch request
+MAX_PROMOTION_BATCH = 500
+
+# Upper bound on users registered by one register_batch request, each one costs a password hash
+MAX_REGISTRATION_BATCH = 100
+
 @csrf_exempt
 @api_view(['POST'])
 def register(request: Request):
     if request.method == 'POST':
         # Use the serializer to handle data validation and phone encryption
-        serializer = UserSerializer(data=request.data)
+        serializer = RegistrationSerializer(data=request.data)
         
         if not serializer.is_valid():
             return JsonResponse({'error': serializer.errors}, status=400)
@@ -37,7 +50,7 @@ def register(request: Request):
             return JsonResponse({'error': 'Email, username, and password are required'}, status=400)
 
         try:
-            # Create the user with the encrypted phone number
+            # Create the user with the encrypted phone number, duplicates are reported by the unique constraints
             user = User.objects.register(
                 email=email,
                 username=username,
@@ -46,10 +59,63 @@ def register(request: Request):
                 nomor_telepon=nomor_telepon,  # Already encrypted by the serializer
             )
             return JsonResponse({'message': 'User registered successfully'}, status=201)
+        except HashingPoolFull as e:
+            return hashing_pool_full_response(e)
         except Exception as e:
             return JsonResponse({'error': str(e)}, status=400)
     return JsonResponse({'error': 'Invalid request method'}, status=405)
 
+@api_view(['POST'])
+@permission_classes([IsAdmin])
+def register_batch(request: Request):
+    """
+    Register several users in one request, e.g. for partner agencies.
+    Entries are validated separately; the valid ones are inserted together and
+    each rejected entry is reported with its index.
+    This only works for admin users.
+    """
+    try:
+        users_data = request.data.get('users')
+        if not users_data or not isinstance(users_data, list):
+            return JsonResponse({'error': 'A list of users is required'}, status=400)
+        if len(users_data) > MAX_REGISTRATION_BATCH:
+            return JsonResponse({'error': f'At most {MAX_REGISTRATION_BATCH} users can be registered at once'}, status=400)
+        
+        errors = {}
+        indexes = []
+        entries = []
+        for index, user_data in enumerate(users_data):
+            # Same validation and phone encryption as a single registration
+            serializer = RegistrationSerializer(data=user_data)
+            if not serializer.is_valid():
+                errors[index] = serializer.errors
+                continue
+            indexes.append(index)
+            entries.append(dict(serializer.validated_data))
+        
+        users, register_errors = User.objects.register_many(entries)
+        for position, message in register_errors.items():
+            errors[indexes[position]] = message
+        
+        return JsonResponse({
+            'message': f'{len(users)} users registered',
+            'users': [
+                {
+                    'id': str(user.id),
+                    'email': user.email,
+                    'username': user.username,
+                    'name': user.name
+                }
+                for user in users
+            ],
+            'errors': [{'index': index, 'error': errors[index]} for index in sorted(errors)],
+        }, status=201 if users else 400)
+    
+    except HashingPoolFull as e:
+        return hashing_pool_full_response(e)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
 @csrf_exempt
 @api_view(['POST'])
 @throttle_classes([LoginRateThrottle])
@@ -76,8 +142,8 @@ def login(request: Request):
         key = throttle.get_cache_key(request, None)
         throttle.reset_throttle_counter(key)
         
-        # Generate tokens
-        refresh = RefreshToken.for_user(user)
+        # Generate tokens carrying the user's role claims
+        refresh = tokens_for_user(user)
         
         # Create response
         response = JsonResponse({
@@ -96,10 +162,8 @@ def login(request: Request):
             }   
         }, status=200)
         
-        # Set session data for Django's session-based auth
-        request.session['_auth_user_id'] = str(user.pk)
-        request.session['_auth_user_backend'] = 'django.contrib.auth.backends.ModelBackend'
-        request.session.save()
+        # Set session data for Django's session-based auth, saved once by SessionMiddleware
+        start_api_session(request, user)
 
         # Set JWT cookie
         response.set_cookie(
@@ -120,6 +184,10 @@ def login(request: Request):
             'Retry-After': wait,
         }, status=429)
         return response
+
+    except HashingPoolFull as e:
+        # Password hashing workers are saturated, fail fast
+        return hashing_pool_full_response(e)
         
     except Exception as ex:
         return JsonResponse({'error': str(ex)}, status=400)
@@ -169,10 +237,10 @@ def protected_admin(request: Request):
     """
     user = request.user
     
-    # Get all users in the system (as an example of admin functionality)
-    all_users_count = User.objects.count()
-    all_petugas_count = getattr(getattr(User, 'petugas', None), 'objects', None)
-    petugas_count = all_petugas_count.count() if all_petugas_count else 0
+    # Table sizes are estimated unless ?exact=1 asks for a full COUNT(*)
+    exact = request.query_params.get('exact') in ('1', 'true')
+    all_users_count = estimated_count(User, exact=exact)
+    petugas_count = estimated_count(Petugas, exact=exact)
     
     return JsonResponse({
         'message': 'This is a protected admin endpoint',
@@ -187,6 +255,10 @@ def protected_admin(request: Request):
         'system_stats': {
             'total_users': all_users_count,
             'total_petugas': petugas_count,
+            'counts_exact': exact,
+            'password_hashing': get_hashing_pool().stats(),
+            'user_cache': get_user_cache().stats(),
+            'token_blacklist_filter': get_blacklist_filter().stats(),
         }
     }, status=200)
 
@@ -207,26 +279,16 @@ def assign_petugas(request: Request):
         except User.DoesNotExist:
             return JsonResponse({'error': 'User not found'}, status=404)
         
-        # Check if user is already a Petugas
-        if Petugas.objects.filter(id=user.id).exists():
-            return JsonResponse({'error': 'User is already a Petugas'}, status=400)
-        
         # Get optional fields
         jabatan = request.data.get('jabatan', 'Petugas Lapangan')  # Default to 'Petugas Lapangan' if not provided
         
-        # Make user a staff member
-        user.is_staff = True
-        user.save()
-        
-        # Create the Petugas object using multi-table inheritance
-        petugas = Petugas(
-            user_ptr=user,
-            jabatan=jabatan
-        )
-        
-        # This is required because we're using multi-table inheritance - same as in PetugasManager
-        petugas.__dict__.update(user.__dict__)
-        petugas.save()
+        # Insert only the Petugas row (and set is_staff), None if the user is already a Petugas
+        petugas = Petugas.objects.promote(user, jabatan)
+        if petugas is None:
+            return JsonResponse({'error': 'User is already a Petugas'}, status=400)
+
+        # Revoke the user's refresh tokens so tokens with the old role claims cannot be refreshed
+        revoke_user_tokens(user)
         
         return JsonResponse({
             'message': 'User assigned as Petugas',
@@ -242,6 +304,52 @@ def assign_petugas(request: Request):
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=400)
 
+@api_view(['POST'])
+@permission_classes([IsAdmin])
+def assign_petugas_batch(request: Request):
+    """
+    Assign several users as Petugas in one request.
+    This only works for admin users.
+    """
+    try:
+        user_ids = request.data.get('user_ids')
+        if not user_ids or not isinstance(user_ids, list):
+            return JsonResponse({'error': 'A list of user IDs is required'}, status=400)
+        if len(user_ids) > MAX_PROMOTION_BATCH:
+            return JsonResponse({'error': f'At most {MAX_PROMOTION_BATCH} users can be assigned at once'}, status=400)
+        
+        jabatan = request.data.get('jabatan', 'Petugas Lapangan')  # Default to 'Petugas Lapangan' if not provided
+        
+        users = list(User.objects.filter(id__in=user_ids).select_related('petugas'))
+        found_ids = {str(user.id) for user in users}
+        not_found = [str(user_id) for user_id in user_ids if str(user_id) not in found_ids]
+        already_petugas = [str(user.id) for user in users if user.is_petugas]
+        
+        promoted = Petugas.objects.promote_users([user for user in users if not user.is_petugas], jabatan)
+        
+        # Revoke refresh tokens carrying the old role claims, for all promoted users at once
+        if promoted:
+            revoke_user_tokens(*[petugas.user_ptr for petugas in promoted])
+        
+        return JsonResponse({
+            'message': f'{len(promoted)} users assigned as Petugas',
+            'petugas': [
+                {
+                    'id': str(petugas.id),
+                    'email': petugas.email,
+                    'username': petugas.username,
+                    'name': petugas.name,
+                    'jabatan': petugas.jabatan
+                }
+                for petugas in promoted
+            ],
+            'already_petugas': already_petugas,
+            'not_found': not_found,
+        }, status=200)
+    
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def logout(request: Request):
@@ -260,8 +368,9 @@ def logout(request: Request):
             # If blacklisting isn't available, just log it
             print("Token blacklisting is not enabled. Please configure your settings.")
         
-        # Clear the session regardless
-        request.session.flush()
+        # Clear the session regardless (no write when there is none)
+        if not request.session.is_empty():
+            request.session.flush()
         
         response = JsonResponse({'message': 'User logged out successfully'}, status=200)
         
@@ -315,14 +424,17 @@ def request_access_token(request: Request):
             user_id = token.payload.get('user_id')
             
             # Optional: Check if user is still valid/active
-            user = User.objects.filter(id=user_id).first()
+            user = User.objects.select_related('petugas').filter(id=user_id).first()
             if user and not user.is_active:
                 return JsonResponse({
                     'error': 'User account is disabled'
                 }, status=401)
             
-            # Generate new access token
-            access_token = str(token.access_token)
+            # Generate new access token with the user's current role claims
+            access_token = token.access_token
+            if user:
+                add_role_claims(access_token, user)
+            access_token = str(access_token)
             
             return JsonResponse({
                 'access': access_token
@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ApiReportConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api_report'
+
+    def ready(self):
+        # Databases built without migrations (e.g. --run-syncdb) still get the search index
+        from .search import create_search_index
+        post_migrate.connect(create_search_index, sender=self)
@@ -0,0 +1,134 @@
+"""
+Query parameter filters for report lists.
+
+Only the parameters in REPORT_FILTERS are read, each one becomes a single
+equality or range predicate, and every predicate is matched to the index
+that serves it. Report lists are read newest first, so a filter without an
+index can only be checked row by row while walking the created_at index:
+when its matches are rare that walk covers the whole table. On the public
+list such filters must come with an indexed one, and are otherwise capped
+to the last MAX_DATE_RANGE_DAYS days.
+"""
+import uuid
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from .models import Report, Status
+
+DEFAULT_REPORT_FILTERS = {
+    'MAX_DATE_RANGE_DAYS': 366,
+}
+
+# Index serving each status value: the partial indexes on Report.current_status
+STATUS_INDEXES = {value: f'report_{value}_created_idx' for value, _ in Status.status_choices}
+
+class InvalidFilter(ValueError):
+    """A filter parameter is malformed, not available to the caller, or too costly to run."""
+
+def get_filter_settings():
+    """`REPORT_FILTERS` from settings, over the defaults."""
+    return {**DEFAULT_REPORT_FILTERS, **getattr(settings, 'REPORT_FILTERS', {})}
+
+def _choice(choices):
+    allowed = dict(choices)
+    def parse(name, value):
+        if value not in allowed:
+            raise InvalidFilter(f'Invalid {name}: {value}. Must be one of: {", ".join(allowed)}')
+        return value
+    return parse
+
+def _uuid(name, value):
+    try:
+        return uuid.UUID(value)
+    except ValueError:
+        raise InvalidFilter(f'Invalid {name}: {value}')
+
+def _day_start(name, value, days=0):
+    try:
+        day = parse_date(value) if len(value) == 10 else None
+    except (ValueError, TypeError):
+        # Well formed but impossible, such as 2024-02-30
+        day = None
+    if day is None:
+        raise InvalidFilter(f'Invalid {name}: {value}. Must be a date (YYYY-MM-DD)')
+    try:
+        start = timezone.make_aware(datetime.combine(day + timedelta(days=days), time.min))
+        # Compared in UTC by the database, which must not fall outside the datetime range either
+        start.astimezone(dt_timezone.utc)
+    except OverflowError:
+        raise InvalidFilter(f'Invalid {name}: {value}. Date is out of range')
+    return start
+
+# parameter: (lookup, parser, staff only, index serving the predicate).
+# The status index depends on the value (see `_index_for`); petugas is
+# served by the foreign key index Django creates on Status.id_petugas.
+REPORT_FILTERS = {
+    'category': ('category', _choice(Report.category_choices), False, 'report_category_created_idx'),
+    'status': ('current_status', _choice(Status.status_choices), False, None),
+    'date_from': ('created_at__gte', _day_start, False, 'report_created_id_idx'),
+    # date_to includes the whole day
+    'date_to': ('created_at__lt', lambda name, value: _day_start(name, value, days=1), False, 'report_created_id_idx'),
+    'petugas': ('status__id_petugas', _uuid, True, 'api_report_status.id_petugas_id'),
+    'reporter': ('id_user', _uuid, True, 'report_user_created_id_idx'),
+}
+
+def _index_for(name, value):
+    if name == 'status':
+        return STATUS_INDEXES.get(value)
+    return REPORT_FILTERS[name][3]
+
+def parse_report_filters(params, staff=False):
+    """
+    The lookups for the filter parameters in `params` (a QueryDict), with
+    the index serving each. Other parameters are left to the view.
+
+    Returns:
+        (lookups, indexes): {lookup: value} and {parameter: index name or None}.
+
+    Raises:
+        InvalidFilter: If a filter is repeated, malformed, or staff only.
+    """
+    lookups, indexes = {}, {}
+    for name, (lookup, parse, staff_only, _) in REPORT_FILTERS.items():
+        values = params.getlist(name)
+        if not values or values == ['']:
+            continue
+        if len(values) > 1:
+            raise InvalidFilter(f'{name} can only be given once')
+        if staff_only and not staff:
+            raise InvalidFilter(f'Filtering by {name} is only available to petugas and admins')
+        lookups[lookup] = parse(name, values[0].strip())
+        indexes[name] = _index_for(name, lookups[lookup])
+
+    if 'created_at__gte' in lookups and 'created_at__lt' in lookups and lookups['created_at__gte'] >= lookups['created_at__lt']:
+        raise InvalidFilter('date_from must not be after date_to')
+    return lookups, indexes
+
+def filter_reports(queryset, params, staff=False):
+    """
+    `queryset` narrowed by the filter parameters in `params`.
+
+    Petugas and admins (`staff`) can filter on any combination. For everyone
+    else, date ranges are limited to MAX_DATE_RANGE_DAYS, and filters without
+    an index that come with no other indexed filter are only applied to the
+    last MAX_DATE_RANGE_DAYS days, so the scan stays bounded.
+
+    Raises:
+        InvalidFilter: See `parse_report_filters`, or a public date range is too wide.
+    """
+    lookups, indexes = parse_report_filters(params, staff)
+    if not staff:
+        max_days = get_filter_settings()['MAX_DATE_RANGE_DAYS']
+        start, end = lookups.get('created_at__gte'), lookups.get('created_at__lt')
+        if start and (end or timezone.now()) - start > timedelta(days=max_days + 1):
+            raise InvalidFilter(f'Date ranges are limited to {max_days} days')
+        residual = [name for name, index in indexes.items() if index is None]
+        indexed = [name for name, index in indexes.items() if index and name not in ('date_from', 'date_to')]
+        if residual and not indexed and not start:
+            # Only residual filters: bound the walk on the created_at index
+            try:
+                lookups['created_at__gte'] = (end or timezone.now()) - timedelta(days=max_days)
+            except OverflowError:
+                raise InvalidFilter('date_to is out of range')
+    return queryset.filter(**lookups)
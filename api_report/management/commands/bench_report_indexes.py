@@ -0,0 +1,134 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from api_auth.models import User
+from api_report.models import Report, Status
+from api_report.transfer import insert_rows
+
+BENCH_EMAIL = 'bench-index-{}@example.com'
+SEED_BATCH = 10000
+STATUS_WEIGHTS = {'new': 40, 'in_progress': 30, 'completed': 25, 'rejected': 5}
+
+class Command(BaseCommand):
+    help = (
+        'Seed a large report table, then show the EXPLAIN plan and latency of each '
+        'report listing query with and without the Report indexes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reports', type=int, default=1_000_000,
+                            help='Reports to seed (default: 1000000); existing seeded reports are reused')
+        parser.add_argument('--users', type=int, default=1000,
+                            help='Users the seeded reports are spread over (default: 1000)')
+        parser.add_argument('--runs', type=int, default=20,
+                            help='Timed runs per query (default: 20)')
+        parser.add_argument('--cleanup', action='store_true',
+                            help='Delete the seeded users and reports afterwards')
+
+    def handle(self, *args, **options):
+        users = self.seed(options['reports'], options['users'])
+        user = users[len(users) // 2]
+        queries = (
+            ('user list', lambda: Report.objects.filter(id_user=user)),
+            ('admin list', lambda: Report.objects.all()),
+            ('petugas list', lambda: Report.objects.filter(current_status__in=['in_progress', 'completed'])),
+            ('public list', lambda: Report.objects.exclude(current_status='rejected')),
+            ('rejected list', lambda: Report.objects.filter(current_status='rejected')),
+            ('category list', lambda: Report.objects.filter(category='health')),
+        )
+        indexes = [(Report, index) for index in Report._meta.indexes]
+
+        try:
+            results = {}
+            for label, state in (('without indexes', False), ('with indexes', True)):
+                self.set_indexes(indexes, state)
+                self.stdout.write(f'\n== {label} ==')
+                for name, make_queryset in queries:
+                    # First page of the keyset pagination, as the list views read it
+                    queryset = make_queryset().order_by('-created_at', '-id_report')[:20]
+                    self.stdout.write(f'-- {name}\n{queryset.explain()}')
+                    results[name, state] = self.time(queryset, options['runs'])
+
+            self.stdout.write(f'\n{"query":<16} {"without (ms)":>13} {"with (ms)":>10}')
+            for name, _ in queries:
+                self.stdout.write(
+                    f'{name:<16} {results[name, False] * 1000:13.2f} {results[name, True] * 1000:10.2f}'
+                )
+        finally:
+            self.set_indexes(indexes, True)
+            if options['cleanup']:
+                User.objects.filter(email__startswith='bench-index-').delete()
+
+    def seed(self, count, user_count):
+        users = list(User.objects.filter(email__startswith='bench-index-').order_by('email'))
+        if len(users) < user_count:
+            User.objects.bulk_create([
+                # Not meant to log in, the password is never checked
+                User(email=BENCH_EMAIL.format(i), username=f'bench-index-{i}', name='Bench', password='!', password_salt='')
+                for i in range(len(users), user_count)
+            ])
+            users = list(User.objects.filter(email__startswith='bench-index-').order_by('email'))
+
+        existing = Report.objects.filter(id_user__in=users).count()
+        if existing >= count:
+            self.stdout.write(f'Reusing {existing} seeded reports')
+            return users
+
+        self.stdout.write(f'Seeding {count - existing} reports...')
+        started = time.perf_counter()
+        rng = random.Random(existing)
+        now = timezone.now()
+        categories = [choice for choice, _ in Report.category_choices]
+        statuses, weights = zip(*STATUS_WEIGHTS.items())
+        remaining = count - existing
+        while remaining > 0:
+            size = min(SEED_BATCH, remaining)
+            reports = []
+            for keterangan in rng.choices(statuses, weights, k=size):
+                created_at = now - timedelta(seconds=rng.randrange(2 * 365 * 24 * 3600))
+                reports.append(Report(
+                    id_user=rng.choice(users), category=rng.choice(categories), created_at=created_at,
+                    description='Laporan benchmark indeks', location='Jakarta Pusat',
+                    current_status=keterangan, status_updated_at=created_at,
+                ))
+            report_statuses = [
+                Status(id_laporan=report, keterangan=report.current_status, waktu_update=report.created_at)
+                for report in reports
+            ]
+            with transaction.atomic():
+                insert_rows(Report, reports)
+                insert_rows(Status, report_statuses)
+            remaining -= size
+        with connection.cursor() as cursor:
+            # Fresh statistics so the planner knows the table sizes and status distribution
+            cursor.execute('ANALYZE')
+        self.stdout.write(f'Seeded in {time.perf_counter() - started:.1f}s')
+        return users
+
+    def set_indexes(self, indexes, present):
+        """Create or drop the model indexes, skipping those already in that state."""
+        with connection.cursor() as cursor:
+            existing = {
+                name for name, info in connection.introspection.get_constraints(cursor, Report._meta.db_table).items()
+                if info['index']
+            }
+        with connection.schema_editor() as editor:
+            for model, index in indexes:
+                if present and index.name not in existing:
+                    editor.add_index(model, index)
+                elif not present and index.name in existing:
+                    editor.remove_index(model, index)
+
+    def time(self, queryset, runs):
+        """Median time to fetch the page, after one warm-up run."""
+        list(queryset.all())
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            list(queryset.all())
+            timings.append(time.perf_counter() - started)
+        return statistics.median(timings)
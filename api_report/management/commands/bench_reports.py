@@ -0,0 +1,117 @@
+import time
+import tracemalloc
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.http import JsonResponse
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from api_auth.models import User
+from api_report.models import Report, Status
+from api_report.pagination import ReportCursorPaginator
+from api_report.streaming import stream_reports
+
+class Command(BaseCommand):
+    help = (
+        'Compare building report list pages with Report.to_dict (with and without '
+        'select_related) against the values_list fast path: queries per page and us per row. '
+        'Then compare peak memory of a full export as one JsonResponse and as a stream.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reports', type=int, default=2000,
+                            help='Reports to create for the benchmark (default: 2000)')
+        parser.add_argument('--page-size', type=int, default=100,
+                            help='Reports per page (default: 100)')
+
+    def handle(self, *args, **options):
+        user = User.objects.create_user(email='bench-reports@example.com', username='bench-reports', password='bench-password-123')
+        try:
+            self.create_reports(user, options['reports'])
+            queryset = Report.objects.filter(id_user=user)
+            paths = (
+                ('to_dict', lambda paginator: self.model_page(paginator, queryset)),
+                ('to_dict + select_related', lambda paginator: self.model_page(paginator, queryset.select_related('status'))),
+                ('values_list rows', lambda paginator: self.row_page(paginator, queryset)),
+            )
+            self.stdout.write(f'{options["reports"]} reports, {options["page_size"]} per page\n')
+            for label, build_page in paths:
+                result = self.walk(build_page, options['page_size'])
+                self.stdout.write(
+                    f'{label:<26} {result["queries"]:7.1f} queries/page   {result["per_row"] * 1e6:7.1f} us/row'
+                )
+
+            self.stdout.write('\nFull export')
+            exports = (
+                ('JsonResponse', lambda: self.json_export(queryset)),
+                ('streaming NDJSON', lambda: stream_reports(queryset, 'ndjson')),
+                ('streaming JSON array', lambda: stream_reports(queryset, 'json')),
+            )
+            for label, make_response in exports:
+                peak, size, elapsed = self.export(make_response)
+                self.stdout.write(
+                    f'{label:<26} peak {peak / 2 ** 20:7.1f} MiB   body {size / 2 ** 20:7.1f} MiB   {elapsed:6.2f} s'
+                )
+        finally:
+            # Reports and statuses are removed with the user (CASCADE)
+            user.delete()
+
+    def create_reports(self, user, count):
+        now = timezone.now()
+        reports = Report.objects.bulk_create(
+            Report(id_user=user, category='other', description=f'Laporan benchmark {i}', location='Jakarta Pusat')
+            for i in range(count)
+        )
+        # bulk_create skips the post_save signal that creates each status
+        Status.objects.bulk_create(
+            Status(id_laporan=report, keterangan='new', detail_status='Laporan baru dibuat dan menunggu verifikasi')
+            for report in reports
+        )
+        for i, report in enumerate(reports):
+            report.created_at = now - timedelta(seconds=i)
+        Report.objects.bulk_update(reports, ['created_at'], batch_size=500)
+
+    def model_page(self, paginator, queryset):
+        reports, next_cursor = paginator.paginate(queryset)
+        return [report.to_dict() for report in reports], next_cursor
+
+    def row_page(self, paginator, queryset):
+        rows, next_cursor = paginator.paginate(Report.list_values(queryset), key=Report.row_key)
+        return [Report.row_to_dict(row) for row in rows], next_cursor
+
+    def json_export(self, queryset):
+        # What the list views did before: every report built, then serialized at once
+        reports = queryset.select_related('status').order_by('-created_at', '-id_report')
+        return JsonResponse({'reports': [report.to_dict() for report in reports]})
+
+    def export(self, make_response):
+        """Peak traced memory while building and sending the response, its size and the time taken."""
+        tracemalloc.start()
+        started = time.perf_counter()
+        response = make_response()
+        size = 0
+        # Consuming the body the way a WSGI server would, one chunk at a time
+        for chunk in response:
+            size += len(chunk)
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return peak, size, elapsed
+
+    def walk(self, build_page, page_size):
+        """Read every page in order, timing the page building and counting its queries."""
+        pages = rows = queries = 0
+        elapsed = 0.0
+        cursor = None
+        while True:
+            paginator = ReportCursorPaginator(cursor, page_size)
+            with CaptureQueriesContext(connection) as ctx:
+                started = time.perf_counter()
+                page, cursor = build_page(paginator)
+                elapsed += time.perf_counter() - started
+            pages += 1
+            rows += len(page)
+            queries += len(ctx.captured_queries)
+            if cursor is None:
+                break
+        return {'queries': queries / pages, 'per_row': elapsed / max(rows, 1)}
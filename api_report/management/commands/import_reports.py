@@ -0,0 +1,54 @@
+import csv
+import time
+from itertools import islice
+from django.core.management.base import BaseCommand, CommandError
+from api_report.transfer import EXPORT_COLUMNS, import_reports
+
+# Invalid rows listed in the output before the rest are only counted
+MAX_REPORTED_ERRORS = 20
+
+class Command(BaseCommand):
+    help = (
+        'Import reports and their status from a CSV file with the export_reports columns. '
+        'Rows are validated a batch at a time and written with COPY on PostgreSQL, '
+        'batched executemany elsewhere, with the Status rows created in bulk.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file with a header row')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Rows validated and inserted per transaction (default: 5000)')
+
+    def handle(self, *args, **options):
+        totals = {'imported': 0, 'skipped': 0, 'invalid': 0}
+        reported = 0
+        started = time.perf_counter()
+
+        with open(options['path'], newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            missing = {'id_user', 'description', 'location'} - set(reader.fieldnames or ())
+            if missing:
+                raise CommandError(f'Missing columns: {", ".join(sorted(missing))} (expected {", ".join(EXPORT_COLUMNS)})')
+
+            first_line = 2  # after the header
+            while True:
+                batch = list(islice(reader, options['batch_size']))
+                if not batch:
+                    break
+                counts, errors = import_reports(batch)
+                for key, value in counts.items():
+                    totals[key] += value
+                for number, message in errors:
+                    if reported < MAX_REPORTED_ERRORS:
+                        self.stderr.write(f'Row {first_line + number}: {message}')
+                    reported += 1
+                first_line += len(batch)
+                elapsed = time.perf_counter() - started
+                self.stdout.write(f'{totals["imported"]} imported ({totals["imported"] / elapsed:.0f} rows/s)')
+
+        elapsed = time.perf_counter() - started
+        rate = totals['imported'] / elapsed if elapsed else 0.0
+        self.stdout.write(
+            f'Imported {totals["imported"]} reports in {elapsed:.2f}s ({rate:.0f} rows/s), '
+            f'{totals["skipped"]} already existed, {totals["invalid"]} invalid'
+        )
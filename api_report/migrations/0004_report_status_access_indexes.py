@@ -0,0 +1,26 @@
+from django.db import migrations, models
+from api_report.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('api_report', '0003_report_created_id_indexes'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='report',
+            index=models.Index(fields=['category', '-created_at', '-id_report'], name='report_category_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='status',
+            index=models.Index(condition=models.Q(('keterangan__in', ['in_progress', 'completed'])), fields=['id_laporan'], name='status_active_report_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='status',
+            index=models.Index(condition=models.Q(('keterangan', 'rejected')), fields=['id_laporan'], name='status_rejected_report_idx'),
+        ),
+    ]
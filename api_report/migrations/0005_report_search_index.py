@@ -0,0 +1,25 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from api_report.search import ensure_search_index
+    ensure_search_index(schema_editor.connection, concurrently=True)
+
+
+def drop_search_index(apps, schema_editor):
+    from api_report.search import drop_search_index
+    drop_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+    # The GIN index is built with CREATE INDEX CONCURRENTLY on PostgreSQL,
+    # and the search vectors of existing reports are filled in batches
+    atomic = False
+
+    dependencies = [
+        ('api_report', '0004_report_status_access_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,73 @@
+import django.utils.timezone
+from django.db import migrations, models
+from api_report.operations import AddIndexConcurrently
+
+
+def ensure_search_index(apps, schema_editor):
+    # Adding or removing a column rebuilds the report table on SQLite, which
+    # drops the full-text search triggers: recreate them
+    from api_report.search import ensure_search_index
+    ensure_search_index(schema_editor.connection)
+
+
+# Copy each report's status value and time from its Status row
+COPY_STATUS_SQL = """
+    UPDATE api_report_report SET
+        current_status = (SELECT keterangan FROM api_report_status WHERE id_laporan_id = api_report_report.id_report),
+        status_updated_at = (SELECT waktu_update FROM api_report_status WHERE id_laporan_id = api_report_report.id_report)
+    WHERE EXISTS (SELECT 1 FROM api_report_status WHERE id_laporan_id = api_report_report.id_report)
+"""
+
+
+class Migration(migrations.Migration):
+    # The partial indexes are built with CREATE INDEX CONCURRENTLY on PostgreSQL
+    atomic = False
+
+    dependencies = [
+        ('api_report', '0005_report_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, ensure_search_index),
+        migrations.AddField(
+            model_name='report',
+            name='current_status',
+            field=models.CharField(choices=[('new', 'New'), ('in_progress', 'In Progress'), ('completed', 'Completed'), ('rejected', 'Rejected')], default='new', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='status_updated_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.RunPython(ensure_search_index, migrations.RunPython.noop),
+        migrations.RunSQL(COPY_STATUS_SQL, migrations.RunSQL.noop),
+        # Lists filter on current_status now, the Status indexes are no longer read
+        migrations.RemoveIndex(
+            model_name='status',
+            name='status_active_report_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='status',
+            name='status_rejected_report_idx',
+        ),
+        AddIndexConcurrently(
+            model_name='report',
+            index=models.Index(condition=models.Q(('current_status', 'new')), fields=['-created_at', '-id_report'], name='report_new_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='report',
+            index=models.Index(condition=models.Q(('current_status', 'in_progress')), fields=['-created_at', '-id_report'], name='report_in_progress_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='report',
+            index=models.Index(condition=models.Q(('current_status', 'completed')), fields=['-created_at', '-id_report'], name='report_completed_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='report',
+            index=models.Index(condition=models.Q(('current_status', 'rejected')), fields=['-created_at', '-id_report'], name='report_rejected_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='report',
+            index=models.Index(condition=models.Q(('current_status__in', ['in_progress', 'completed'])), fields=['-created_at', '-id_report'], name='report_petugas_queue_idx'),
+        ),
+    ]
@@ -1,13 +1,26 @@
 import re
 import uuid, hashlib, os, base64
-from django.db import models
+from django.db import models, transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.utils import timezone
 from django.forms import ValidationError
 from django.core.validators import RegexValidator, URLValidator
 from api_auth.models import User
 
 
+# Characters allowed in free-text report fields, and patterns rejected in them
+ALLOWED_TEXT_PATTERN = r'^[a-zA-Z0-9\s.,!?()-]*$'
+INJECTION_PATTERN = r'(?i)(select|insert|update|delete|drop|union|exec|declare|script|\-\-|\/\*|\*\/|@@|@)'
+
+# Report status values, on Status and on the report's current_status copy
+STATUS_CHOICES = [
+    ('new', 'New'),
+    ('in_progress', 'In Progress'),
+    ('completed', 'Completed'),
+    ('rejected', 'Rejected')
+]
+
 # Create your models here.
 class ReportManager(models.Manager):
     def create_report(self, id_user, category, evidance, description, location):
@@ -43,13 +56,13 @@ class ReportManager(models.Manager):
         clean_description = re.sub(r'<[^>]*>', '', description)
 
         alphanumeric_validator = RegexValidator(
-            regex=r'^[a-zA-Z0-9\s.,!?()-]*$',
+            regex=ALLOWED_TEXT_PATTERN,
             message='Description can only contain letters, numbers, and basic punctuation',
             code='invalid_description'
         )
         
         sql_injection_validator = RegexValidator(
-            regex=r'(?i)(select|insert|update|delete|drop|union|exec|declare|script|\-\-|\/\*|\*\/|@@|@)',
+            regex=INJECTION_PATTERN,
             message='Description contains invalid characters or patterns',
             code='invalid_description',
             inverse_match=True  
@@ -72,13 +85,13 @@ class ReportManager(models.Manager):
         clean_location = re.sub(r'<[^>]*>', '', location)
 
         alphanumeric_validator = RegexValidator(
-            regex=r'^[a-zA-Z0-9\s.,!?()-]*$',
+            regex=ALLOWED_TEXT_PATTERN,
             message='Location can only contain letters, numbers, and basic punctuation',
             code='invalid_location'
         )
         
         sql_injection_validator = RegexValidator(
-            regex=r'(?i)(select|insert|update|delete|drop|union|exec|declare|script|\-\-|\/\*|\*\/|@@|@)',
+            regex=INJECTION_PATTERN,
             message='Location contains invalid characters or patterns',
             code='invalid_location',
             inverse_match=True  
@@ -118,9 +131,67 @@ class Report(models.Model):
     category = models.TextField(choices=category_choices, default='other')
     location = models.CharField(max_length=255)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Copy of status.keterangan and status.waktu_update, so lists can filter
+    # and sort on the status without joining Status. Written by update_status.
+    current_status = models.CharField(max_length=100, choices=STATUS_CHOICES, default='new')
+    status_updated_at = models.DateTimeField(default=timezone.now)
 
     objects = ReportManager()
 
+    class Meta:
+        # Keyset pagination (api_report.pagination) reads pages in this order,
+        # over all reports, a user's reports, one category, one status, or
+        # the petugas queue (in progress or completed), the last ones with
+        # partial indexes on current_status
+        # (see `python manage.py bench_report_indexes` for the plans they give)
+        indexes = [
+            models.Index(fields=['-created_at', '-id_report'], name='report_created_id_idx'),
+            models.Index(fields=['id_user', '-created_at', '-id_report'], name='report_user_created_id_idx'),
+            models.Index(fields=['category', '-created_at', '-id_report'], name='report_category_created_idx'),
+            *[
+                models.Index(fields=['-created_at', '-id_report'], name=f'report_{value}_created_idx',
+                             condition=models.Q(current_status=value))
+                for value, _ in STATUS_CHOICES
+            ],
+            models.Index(fields=['-created_at', '-id_report'], name='report_petugas_queue_idx',
+                         condition=models.Q(current_status__in=['in_progress', 'completed'])),
+        ]
+
+    # Columns for the listing fast path: the status value and time come from the
+    # report row, only the detail text through a LEFT JOIN on the page's rows
+    LIST_FIELDS = (
+        'id_report', 'description', 'category', 'location', 'created_at', 'evidance',
+        'current_status', 'status__detail_status', 'status_updated_at',
+    )
+
+    @staticmethod
+    def list_values(queryset):
+        """`queryset` as row tuples of LIST_FIELDS, for `row_to_dict`."""
+        return queryset.values_list(*Report.LIST_FIELDS)
+
+    @staticmethod
+    def row_key(row):
+        """The (created_at, id_report) pagination key of a LIST_FIELDS row."""
+        return row[4], row[0]
+
+    @staticmethod
+    def row_to_dict(row):
+        """Same dictionary as `to_dict`, built from a LIST_FIELDS row without a model instance."""
+        id_report, description, category, location, created_at, evidance, keterangan, detail_status, waktu_update = row
+        return {
+            'id': str(id_report),
+            'description': description,
+            'category': category,
+            'location': location,
+            'created_at': created_at.isoformat(),
+            'evidance': evidance,
+            'status': {
+                'keterangan': keterangan,
+                'detail_status': detail_status,
+                'waktu_update': waktu_update.isoformat()
+            }
+        }
+
     def to_dict(self):
         """Convert report instance to dictionary for JSON serialization"""
         data = {
@@ -131,19 +202,20 @@ class Report(models.Model):
             'created_at': self.created_at.isoformat(),
             'evidance': self.evidance,
             'status': {
-                'keterangan': self.status.keterangan,
-                'detail_status': self.status.detail_status,
-                'waktu_update': self.status.waktu_update.isoformat()
-            } if hasattr(self, 'status') else None
+                'keterangan': self.current_status,
+                'detail_status': self.status.detail_status if hasattr(self, 'status') else None,
+                'waktu_update': self.status_updated_at.isoformat()
+            }
         }
         return data
     
     def get_status(self):
-        return self.status
+        return self.current_status
 
     def update_status(self, new_status, detail, petugas=None):
         """
-        Update report status
+        Update report status, and its current_status copy on the report
+        in the same transaction
         Args:
             new_status (str): New status from status_choices
             detail (str): Detail explanation for status change
@@ -152,30 +224,38 @@ class Report(models.Model):
         if new_status not in dict(Status.status_choices):
             raise ValidationError(f"Invalid status: {new_status}")
         
-        if hasattr(self, 'status'):
-            self.status.keterangan = new_status
-            self.status.detail_status = detail
-            if petugas:
-                self.status.id_petugas = petugas
-            self.status.save()
-        else:
-            Status.objects.create(
-                id_laporan=self,
-                keterangan=new_status,
-                detail_status=detail,
-                id_petugas=petugas
-            )
-
-    def update_status_petugas(self, new_status, detail):
+        with transaction.atomic():
+            if hasattr(self, 'status'):
+                now = timezone.now()
+                # The report row is written first: its row lock makes concurrent
+                # updates of the same report apply one after the other
+                Report.objects.filter(pk=self.pk).update(current_status=new_status, status_updated_at=now)
+                fields = {'keterangan': new_status, 'detail_status': detail, 'waktu_update': now}
+                if petugas:
+                    fields['id_petugas'] = petugas
+                Status.objects.filter(pk=self.status.pk).update(**fields)
+                for name, value in fields.items():
+                    setattr(self.status, name, value)
+            else:
+                status = Status.objects.create(
+                    id_laporan=self,
+                    keterangan=new_status,
+                    detail_status=detail,
+                    id_petugas=petugas
+                )
+                now = status.waktu_update
+                Report.objects.filter(pk=self.pk).update(current_status=new_status, status_updated_at=now)
+        self.current_status = new_status
+        self.status_updated_at = now
+
+    def update_status_petugas(self, new_status, detail, petugas=None):
         if not hasattr(self, 'status'):
             raise ValidationError("Report has no status")
         
-        if new_status not in dict('in_progress', 'completed'):
+        if new_status not in ('in_progress', 'completed'):
             raise ValidationError(f"Invalid status: {new_status}")
         
-        self.status.keterangan = new_status
-        self.status.detail_status = detail
-        self.status.save()
+        self.update_status(new_status, detail, petugas)
         
     def is_new(self):
         return self.get_status() == 'new'
@@ -198,12 +278,7 @@ class Report(models.Model):
         self.update_status('in_progress', f'Laporan ditangani oleh {petugas.username}', petugas)
 
 class Status(models.Model):
-    status_choices = [
-        ('new', 'New'),
-        ('in_progress', 'In Progress'),
-        ('completed', 'Completed'),
-        ('rejected', 'Rejected')
-    ]
+    status_choices = STATUS_CHOICES
 
     id_status = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False, unique=True)
     keterangan = models.CharField(max_length=100, choices=status_choices, default='new')
@@ -221,14 +296,14 @@ class Status(models.Model):
         
         # Validator for allowed characters
         alphanumeric_validator = RegexValidator(
-            regex=r'^[a-zA-Z0-9\s.,!?()-]*$',
+            regex=ALLOWED_TEXT_PATTERN,
             message='Keterangan can only contain letters, numbers, and basic punctuation',
             code='invalid_status_keterangan'
         )
         
         # Validator for SQL/script injection patterns
         sql_injection_validator = RegexValidator(
-            regex=r'(?i)(select|insert|update|delete|drop|union|exec|declare|script|\-\-|\/\*|\*\/|@@|@)',
+            regex=INJECTION_PATTERN,
             message='Keterangan contains invalid characters or patterns',
             code='invalid_status_keterangan',
             inverse_match=True
@@ -247,6 +322,6 @@ def create_report_status(sender, instance, created, **kwargs):
     if created:
         Status.objects.create(
             id_laporan=instance,
-            keterangan='new',
+            keterangan=instance.current_status,
             detail_status='Laporan baru dibuat dan menunggu verifikasi'
         )
\ No newline at end of file
@@ -0,0 +1,100 @@
+import base64, json, uuid
+from datetime import datetime
+from django.conf import settings
+from django.utils import timezone
+
+DEFAULT_REPORT_PAGINATION = {
+    'PAGE_SIZE': 20,
+    'MAX_PAGE_SIZE': 100,
+}
+
+class InvalidCursor(ValueError):
+    """The cursor or page size sent by the client cannot be used."""
+
+def get_pagination_settings():
+    """`REPORT_PAGINATION` from settings, over the defaults."""
+    return {**DEFAULT_REPORT_PAGINATION, **getattr(settings, 'REPORT_PAGINATION', {})}
+
+def encode_cursor(created_at, id_report):
+    """Opaque cursor pointing just past the report with this (created_at, id_report)."""
+    raw = json.dumps([created_at.isoformat(), str(id_report)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """
+    The (created_at, id_report) position stored in a cursor.
+
+    Raises:
+        InvalidCursor: If the cursor was not made by `encode_cursor`.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        created_at, id_report = json.loads(raw)
+        if not isinstance(created_at, str) or not isinstance(id_report, str):
+            raise InvalidCursor('Invalid cursor')
+        created_at, id_report = datetime.fromisoformat(created_at), uuid.UUID(id_report)
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor('Invalid cursor') from e
+    # encode_cursor writes created_at as stored, which is aware under USE_TZ
+    if settings.USE_TZ and timezone.is_naive(created_at):
+        raise InvalidCursor('Invalid cursor')
+    return created_at, id_report
+
+class ReportCursorPaginator:
+    """
+    Keyset pagination for report lists, newest first, ordered on
+    (created_at, id_report) so ties on created_at still have a stable order.
+
+    A page is read with a range scan that starts right after the cursor
+    position on the matching composite index, instead of OFFSET, so every
+    page costs the same however deep the client has scrolled and however
+    many reports the table holds.
+
+    **Methods:**
+        paginate(queryset):
+            The reports on the requested page and the cursor for the next one.
+    """
+    ordering = ('-created_at', '-id_report')
+
+    def __init__(self, cursor=None, page_size=None):
+        config = get_pagination_settings()
+        try:
+            page_size = int(page_size) if page_size not in (None, '') else config['PAGE_SIZE']
+        except (TypeError, ValueError) as e:
+            raise InvalidCursor('page_size must be a number') from e
+        if page_size < 1:
+            raise InvalidCursor('page_size must be at least 1')
+        self.page_size = min(page_size, config['MAX_PAGE_SIZE'])
+        self.position = decode_cursor(cursor) if cursor else None
+
+    @classmethod
+    def from_request(cls, request):
+        """Paginator for the `cursor` and `page_size` query parameters."""
+        return cls(request.GET.get('cursor'), request.GET.get('page_size'))
+
+    def paginate(self, queryset, key=None):
+        """
+        `key` gives the (created_at, id_report) of a result, needed for
+        `values_list()` querysets; model instances are read directly.
+
+        Returns:
+            (reports, next_cursor): the reports on this page, and the cursor
+            for the next page, or None when this is the last one.
+        """
+        queryset = queryset.order_by(*self.ordering)
+        if self.position:
+            created_at, id_report = self.position
+            # Same as (created_at, id_report) < position, written so the
+            # leading created_at column bounds the index scan
+            queryset = queryset.filter(created_at__lte=created_at).exclude(
+                created_at=created_at, id_report__gte=id_report
+            )
+
+        # One extra row tells whether there is a next page, without a COUNT(*)
+        reports = list(queryset[:self.page_size + 1])
+        if len(reports) <= self.page_size:
+            return reports, None
+        reports = reports[:self.page_size]
+        last = reports[-1]
+        created_at, id_report = key(last) if key else (last.created_at, last.id_report)
+        return reports, encode_cursor(created_at, id_report)
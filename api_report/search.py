@@ -0,0 +1,198 @@
+"""
+Full-text search over report descriptions and locations.
+
+On PostgreSQL reports carry a `search_vector` tsvector column, kept up to date
+by a trigger and indexed with GIN. On SQLite (tests and local development) an
+FTS5 table mirrors the report text through triggers. Neither is a model field:
+both are created by migration 0005, or by `ensure_search_index` after
+`migrate` for databases built without migrations. Other databases fall back
+to unindexed `icontains` matching.
+"""
+import re
+from django.db import connections
+from django.db.migrations.loader import MigrationLoader
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+REPORT_TABLE = 'api_report_report'
+FTS_TABLE = 'api_report_report_fts'
+
+# The 'simple' configuration lowercases words without stemming: PostgreSQL has
+# no Indonesian dictionary, and English stemming would mangle Indonesian words.
+# The description weighs more than the location in the ranking.
+PG_VECTOR_EXPRESSION = (
+    "setweight(to_tsvector('simple', coalesce({row}description, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce({row}location, '')), 'B')"
+)
+
+# Rows given a search vector per statement when backfilling existing reports
+BACKFILL_BATCH = 10000
+
+# Longest search, in words
+MAX_SEARCH_TERMS = 10
+
+# Deepest page of search results: pages are read with OFFSET, and deeper
+# pages would rank and skip ever more matches
+MAX_SEARCH_PAGE = 10
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+def search_terms(text):
+    """Lowercased words of a search string. Anything else is dropped, so terms are safe in any query syntax."""
+    return [word.lower() for word in WORD_RE.findall(text or '')][:MAX_SEARCH_TERMS]
+
+def search_reports(queryset, text):
+    """
+    Reports of `queryset` matching every word of `text`, the last word also
+    as a prefix (so 'jalan rus' finds 'jalan rusak'), best match first.
+    Filters already applied to `queryset` are part of the same query.
+    Each report gets a `rank` (higher is better).
+    """
+    terms = search_terms(text)
+    if not terms:
+        return queryset.none()
+    vendor = connections[queryset.db].vendor
+
+    if vendor == 'postgresql':
+        tsquery = ' & '.join(f'{term}:*' if i == len(terms) - 1 else term for i, term in enumerate(terms))
+        query = SearchQuery(tsquery, config='simple', search_type='raw')
+        # The column is not a model field, it is maintained by the trigger
+        vector = RawSQL(f'{REPORT_TABLE}.search_vector', [], output_field=SearchVectorField())
+        queryset = queryset.alias(search_vector=vector).filter(search_vector=query).annotate(
+            rank=SearchRank(vector, query)
+        )
+    elif vendor == 'sqlite':
+        match = ' '.join(f'"{term}"*' if i == len(terms) - 1 else f'"{term}"' for i, term in enumerate(terms))
+        # Matching rowids come from the FTS index; bm25() is lower for better
+        # matches. bm25() reads statistics over all matches on every call, so
+        # the scores are computed once into a materialized table and looked
+        # up per report, rather than in a correlated MATCH per report.
+        queryset = queryset.filter(RawSQL(
+            f'{REPORT_TABLE}.rowid IN (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)',
+            [match], output_field=BooleanField(),
+        )).annotate(rank=RawSQL(
+            f'WITH ranks AS MATERIALIZED (SELECT rowid AS report_rowid, -bm25({FTS_TABLE}, 2.0, 1.0) AS rank '
+            f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s) '
+            f'SELECT rank FROM ranks WHERE ranks.report_rowid = {REPORT_TABLE}.rowid',
+            [match], output_field=FloatField(),
+        ))
+    else:
+        for term in terms:
+            queryset = queryset.filter(Q(description__icontains=term) | Q(location__icontains=term))
+        queryset = queryset.annotate(rank=Value(0.0, output_field=FloatField()))
+    return queryset.order_by('-rank', '-created_at', '-id_report')
+
+def ensure_search_index(connection, concurrently=False):
+    """
+    Create the search column or table, its triggers and its index if they
+    are missing, and fill them for existing reports. Safe to run repeatedly.
+    """
+    if connection.vendor == 'postgresql':
+        _ensure_postgres(connection, concurrently)
+    elif connection.vendor == 'sqlite':
+        _ensure_sqlite(connection)
+
+def drop_search_index(connection):
+    """Remove everything `ensure_search_index` creates."""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'DROP TRIGGER IF EXISTS {REPORT_TABLE}_search_vector ON {REPORT_TABLE}')
+            cursor.execute(f'DROP FUNCTION IF EXISTS {REPORT_TABLE}_search_vector()')
+            cursor.execute('DROP INDEX IF EXISTS report_search_vector_idx')
+            cursor.execute(f'ALTER TABLE {REPORT_TABLE} DROP COLUMN IF EXISTS search_vector')
+        elif connection.vendor == 'sqlite':
+            for suffix in ('ai', 'ad', 'au'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}')
+            cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+def create_search_index(sender, using, **kwargs):
+    """
+    post_migrate receiver: `ensure_search_index` when the app's migrations are
+    disabled (tables built by syncdb, as in tests). Otherwise migration 0005
+    owns the index, and unapplying it is not undone here.
+    """
+    module, _ = MigrationLoader.migrations_module(sender.label)
+    connection = connections[using]
+    if module is None and REPORT_TABLE in connection.introspection.table_names():
+        ensure_search_index(connection)
+
+def _ensure_postgres(connection, concurrently):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM information_schema.columns WHERE table_name = %s AND column_name = %s',
+            [REPORT_TABLE, 'search_vector'],
+        )
+        if cursor.fetchone():
+            return
+
+        # A nullable column without default is added without rewriting the table
+        cursor.execute(f'ALTER TABLE {REPORT_TABLE} ADD COLUMN search_vector tsvector')
+        cursor.execute(f"""
+            CREATE OR REPLACE FUNCTION {REPORT_TABLE}_search_vector() RETURNS trigger AS $$
+            BEGIN
+                NEW.search_vector := {PG_VECTOR_EXPRESSION.format(row='NEW.')};
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql
+        """)
+        # Fires for ORM saves, bulk inserts and COPY (import_reports) alike
+        cursor.execute(f"""
+            CREATE TRIGGER {REPORT_TABLE}_search_vector
+            BEFORE INSERT OR UPDATE OF description, location ON {REPORT_TABLE}
+            FOR EACH ROW EXECUTE FUNCTION {REPORT_TABLE}_search_vector()
+        """)
+
+        # Backfill in batches, so no single statement locks every row
+        while True:
+            cursor.execute(f"""
+                UPDATE {REPORT_TABLE} SET search_vector = {PG_VECTOR_EXPRESSION.format(row='')}
+                WHERE id_report IN (
+                    SELECT id_report FROM {REPORT_TABLE} WHERE search_vector IS NULL LIMIT {BACKFILL_BATCH}
+                )
+            """)
+            if cursor.rowcount < BACKFILL_BATCH:
+                break
+
+        cursor.execute(
+            f'CREATE INDEX {"CONCURRENTLY " if concurrently else ""}IF NOT EXISTS report_search_vector_idx '
+            f'ON {REPORT_TABLE} USING GIN (search_vector)'
+        )
+
+def _ensure_sqlite(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE name LIKE %s", [f'{FTS_TABLE}%'])
+        names = {name for name, in cursor.fetchall()}
+        if {FTS_TABLE, f'{FTS_TABLE}_ai', f'{FTS_TABLE}_ad', f'{FTS_TABLE}_au'} <= names:
+            return
+        # Rebuilding the report table (SQLite's ALTER TABLE) drops its triggers, start over
+        drop_search_index(connection)
+
+        # External content table: the text stays in the report table, FTS5 keeps only the index.
+        # It is keyed on the report table's implicit rowid.
+        cursor.execute(f"""
+            CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+                description, location,
+                content='{REPORT_TABLE}', content_rowid='rowid',
+                tokenize='unicode61 remove_diacritics 2'
+            )
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON {REPORT_TABLE} BEGIN
+                INSERT INTO {FTS_TABLE}(rowid, description, location) VALUES (new.rowid, new.description, new.location);
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON {REPORT_TABLE} BEGIN
+                INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description, location)
+                VALUES ('delete', old.rowid, old.description, old.location);
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF description, location ON {REPORT_TABLE} BEGIN
+                INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, description, location)
+                VALUES ('delete', old.rowid, old.description, old.location);
+                INSERT INTO {FTS_TABLE}(rowid, description, location) VALUES (new.rowid, new.description, new.location);
+            END
+        """)
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
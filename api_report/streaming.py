@@ -0,0 +1,71 @@
+import json
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from .models import Report
+
+DEFAULT_REPORT_EXPORT = {
+    'CHUNK_SIZE': 2000,
+    'WRITE_BATCH': 500,
+}
+
+# Content type and file extension per streaming format
+STREAM_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'json': ('application/json', 'json'),
+}
+
+def get_export_settings():
+    """`REPORT_EXPORT` from settings, over the defaults."""
+    return {**DEFAULT_REPORT_EXPORT, **getattr(settings, 'REPORT_EXPORT', {})}
+
+def _encoded_batches(queryset, chunk_size, write_batch):
+    """
+    Reports of `queryset` as lists of JSON-encoded `to_dict` objects.
+    Rows are read with `iterator()` (a server-side cursor on PostgreSQL), so
+    only one chunk of rows and one batch of encoded reports are held at a time.
+    """
+    batch = []
+    for row in Report.list_values(queryset).iterator(chunk_size=chunk_size):
+        batch.append(json.dumps(Report.row_to_dict(row)))
+        if len(batch) >= write_batch:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def iter_ndjson(queryset, chunk_size, write_batch):
+    """One report object per line."""
+    for batch in _encoded_batches(queryset, chunk_size, write_batch):
+        yield '\n'.join(batch) + '\n'
+
+def iter_json_array(queryset, chunk_size, write_batch, key='reports'):
+    """`{"reports": [...]}`, the body of the list views, written incrementally."""
+    yield '{%s: [' % json.dumps(key)
+    separator = ''
+    for batch in _encoded_batches(queryset, chunk_size, write_batch):
+        yield separator + ','.join(batch)
+        separator = ','
+    yield ']}'
+
+def stream_reports(queryset, stream_format='ndjson', filename=None):
+    """
+    StreamingHttpResponse of the reports in `queryset`, newest first, as NDJSON
+    or as a JSON array. Worker memory stays flat whatever the number of reports.
+
+    Raises:
+        ValueError: If `stream_format` is not one of STREAM_FORMATS.
+    """
+    if stream_format not in STREAM_FORMATS:
+        raise ValueError(f'Invalid format. Must be one of: {", ".join(STREAM_FORMATS)}')
+    config = get_export_settings()
+    queryset = queryset.order_by('-created_at', '-id_report')
+    if stream_format == 'ndjson':
+        content = iter_ndjson(queryset, config['CHUNK_SIZE'], config['WRITE_BATCH'])
+    else:
+        content = iter_json_array(queryset, config['CHUNK_SIZE'], config['WRITE_BATCH'])
+
+    content_type, extension = STREAM_FORMATS[stream_format]
+    response = StreamingHttpResponse(content, content_type=content_type)
+    if filename:
+        response['Content-Disposition'] = f'attachment; filename="{filename}.{extension}"'
+    return response
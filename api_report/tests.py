@@ -1,3 +1,443 @@
-from django.test import TestCase
+import base64, csv, json, os, tempfile, uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import StringIO
+from unittest import mock
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.management import call_command
+from django.http import QueryDict
+from django.apps import apps
+from django.db import connection, models
+from django.db.migrations.state import ProjectState
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from api_auth.models import Petugas, User
+from api_auth.tokens import tokens_for_user
+from api_report.models import Report, Status
+from api_report.filters import STATUS_INDEXES, filter_reports
+from api_report.search import MAX_SEARCH_PAGE
+from api_report.operations import AddIndexConcurrently
+from api_report.pagination import ReportCursorPaginator, InvalidCursor, encode_cursor
 
-# Create your tests here.
+class ReportCursorPaginationTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='reporter@example.com', username='reporter', password='password123')
+        self.other = User.objects.create_user(email='other@example.com', username='otheruser', password='password123')
+        now = timezone.now()
+        for i in range(25):
+            report = Report.objects.create(id_user=self.user if i % 5 else self.other, category='other',
+                                           description=f'Laporan nomor {i}', location='Jakarta Selatan')
+            # Groups of three reports share a timestamp, so ties on created_at are exercised
+            Report.objects.filter(pk=report.pk).update(created_at=now - timedelta(minutes=i // 3))
+        self.expected = list(Report.objects.order_by('-created_at', '-id_report').values_list('id_report', flat=True))
+
+    def test_pages_cover_every_report_once(self):
+        """Test following next cursors returns every report once, newest first."""
+        seen = []
+        cursor = None
+        while True:
+            reports, cursor = ReportCursorPaginator(cursor, page_size=4).paginate(Report.objects.all())
+            self.assertLessEqual(len(reports), 4)
+            seen.extend(report.id_report for report in reports)
+            if cursor is None:
+                break
+        self.assertEqual(seen, self.expected)
+
+    def test_page_size_and_invalid_cursor(self):
+        """Test page sizes are capped and bad or forged cursors are rejected."""
+        with override_settings(REPORT_PAGINATION={'PAGE_SIZE': 5, 'MAX_PAGE_SIZE': 7}):
+            self.assertEqual(ReportCursorPaginator().page_size, 5)
+            self.assertEqual(ReportCursorPaginator(page_size='50').page_size, 7)
+
+        def cursor_of(value):
+            return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+        forged = (
+            cursor_of(['2024-01-01T00:00:00+00:00', 5]),
+            cursor_of([20240101, str(uuid.uuid4())]),
+            cursor_of(['2024-01-01T00:00:00', str(uuid.uuid4())]),
+        )
+        for cursor, page_size in (('not-a-cursor', None), (None, '0'), (None, 'abc'), *((c, None) for c in forged)):
+            with self.assertRaises(InvalidCursor):
+                ReportCursorPaginator(cursor, page_size)
+        access = str(tokens_for_user(self.user).access_token)
+        for cursor in forged:
+            response = self.client.get(reverse('api_report:get_report_by_user'), {'cursor': cursor},
+                                       HTTP_AUTHORIZATION=f'Bearer {access}')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_report_list_endpoints(self):
+        """Test the list endpoints return one page and a cursor to the next."""
+        response = self.client.get(reverse('api_report:get_report'), {'page_size': 10})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual([report['id'] for report in data['reports']], [str(pk) for pk in self.expected[:10]])
+        response = self.client.get(reverse('api_report:get_report'), {'page_size': 10, 'cursor': data['next_cursor']})
+        self.assertEqual([report['id'] for report in response.json()['reports']], [str(pk) for pk in self.expected[10:20]])
+
+        response = self.client.get(reverse('api_report:get_report'), {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        access = str(tokens_for_user(self.user).access_token)
+        response = self.client.get(reverse('api_report:get_report_by_user'), {'page_size': 100},
+                                   HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(len(data['reports']), 20)
+        self.assertIsNone(data['next_cursor'])
+
+    def test_cursor_roundtrip(self):
+        """Test a cursor for the last report of a page starts the next page after it."""
+        report = Report.objects.get(pk=self.expected[5])
+        reports, _ = ReportCursorPaginator(encode_cursor(report.created_at, report.id_report), 3).paginate(Report.objects.all())
+        self.assertEqual([r.id_report for r in reports], self.expected[6:9])
+
+    def test_row_dicts_match_to_dict(self):
+        """Test the values_list fast path builds the same dictionaries as to_dict, in one query."""
+        Status.objects.filter(id_laporan_id=self.expected[0]).delete()
+        with CaptureQueriesContext(connection) as ctx:
+            rows, _ = ReportCursorPaginator(page_size=10).paginate(Report.list_values(Report.objects.all()), key=Report.row_key)
+            dicts = [Report.row_to_dict(row) for row in rows]
+        self.assertEqual(len(ctx.captured_queries), 1)
+        # The status value and time live on the report, only the detail text is missing
+        self.assertEqual(dicts[0]['status']['keterangan'], 'new')
+        self.assertIsNone(dicts[0]['status']['detail_status'])
+        reports = Report.objects.select_related('status').in_bulk(self.expected[:10])
+        self.assertEqual(dicts, [reports[pk].to_dict() for pk in self.expected[:10]])
+
+class ReportExportTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='reporter@example.com', username='reporter', password='password123')
+        self.admin = User.objects.create_superuser(email='admin@example.com', username='adminuser', password='password123')
+        for i in range(7):
+            Report.objects.create(id_user=self.user, category='health' if i % 2 else 'crime',
+                                  description=f'Laporan nomor {i}', location='Jakarta Selatan')
+        self.expected = [
+            report.to_dict() for report in Report.objects.select_related('status').order_by('-created_at', '-id_report')
+        ]
+
+    def export(self, user, **params):
+        access = str(tokens_for_user(user).access_token)
+        return self.client.get(reverse('api_report:export_reports'), params, HTTP_AUTHORIZATION=f'Bearer {access}')
+
+    @override_settings(REPORT_EXPORT={'CHUNK_SIZE': 2, 'WRITE_BATCH': 3})
+    def test_export_formats(self):
+        """Test exports stream every report as NDJSON or as a JSON array, across several chunks."""
+        response = self.export(self.admin)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        chunks = list(response.streaming_content)
+        self.assertEqual(len(chunks), 3)
+        lines = b''.join(chunks).decode().splitlines()
+        self.assertEqual([json.loads(line) for line in lines], self.expected)
+
+        response = self.export(self.admin, output='json')
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), {'reports': self.expected})
+
+        response = self.export(self.admin, output='json', category='crime')
+        reports = json.loads(b''.join(response.streaming_content))['reports']
+        self.assertEqual(reports, [report for report in self.expected if report['category'] == 'crime'])
+
+    def test_export_errors(self):
+        """Test exports are admin only and reject unknown formats and bad filters."""
+        self.assertEqual(self.export(self.user).status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.export(self.admin, output='xml').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.export(self.admin, date_to='9999-12-31').status_code, status.HTTP_400_BAD_REQUEST)
+
+class ReportTransferCommandTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='reporter@example.com', username='reporter', password='password123')
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write_csv(self, name, rows):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=['id_user', 'category', 'description', 'location', 'created_at', 'status'])
+            writer.writeheader()
+            writer.writerows(rows)
+        return path
+
+    def test_import_validates_and_creates_statuses(self):
+        """Test imports keep historical timestamps, create statuses in bulk and report invalid rows."""
+        row = {'id_user': str(self.user.pk), 'category': 'health', 'description': 'Laporan historis pertama',
+               'location': 'Bandung Utara', 'created_at': '2024-01-05T08:00:00+07:00', 'status': 'completed'}
+        path = self.write_csv('reports.csv', [
+            row,
+            {**row, 'description': 'Laporan historis kedua', 'created_at': '', 'status': ''},
+            {**row, 'category': 'unknown'},
+            {**row, 'description': 'DROP TABLE laporan;'},
+            {**row, 'id_user': str(uuid.uuid4())},
+        ])
+        out, err = StringIO(), StringIO()
+        call_command('import_reports', path, stdout=out, stderr=err)
+        self.assertIn('Imported 2 reports', out.getvalue())
+        self.assertIn('3 invalid', out.getvalue())
+        self.assertIn('Row 4: Invalid category: unknown', err.getvalue())
+        self.assertIn('Row 6: Unknown user', err.getvalue())
+
+        first = Report.objects.select_related('status').get(description='Laporan historis pertama')
+        self.assertEqual(first.created_at, datetime(2024, 1, 5, 1, 0, tzinfo=dt_timezone.utc))
+        self.assertEqual(first.status.keterangan, 'completed')
+        self.assertEqual((first.current_status, first.status_updated_at), ('completed', first.status.waktu_update))
+        self.assertEqual(Report.objects.get(description='Laporan historis kedua').status.keterangan, 'new')
+
+    def test_export_import_roundtrip(self):
+        """Test an export can be imported again, skipping the reports that already exist."""
+        for i in range(3):
+            Report.objects.create_report(self.user, 'crime', None, f'Laporan ekspor nomor {i}', 'Jakarta Pusat')
+        path = os.path.join(self.tmp.name, 'export.csv')
+        err = StringIO()
+        call_command('export_reports', path, stderr=err)
+        self.assertIn('Exported 3 reports', err.getvalue())
+        with open(path, newline='', encoding='utf-8') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([row['description'] for row in rows], [f'Laporan ekspor nomor {i}' for i in range(3)])
+        self.assertEqual({row['status'] for row in rows}, {'new'})
+
+        out = StringIO()
+        call_command('import_reports', path, stdout=out, stderr=StringIO())
+        self.assertIn('3 already existed', out.getvalue())
+
+        Report.objects.all().delete()
+        call_command('import_reports', path, stdout=StringIO(), stderr=StringIO())
+        self.assertEqual(sorted(str(pk) for pk in Report.objects.values_list('pk', flat=True)),
+                         sorted(row['id_report'] for row in rows))
+
+class AddIndexConcurrentlyTestCase(TransactionTestCase):
+    def test_falls_back_to_add_index(self):
+        """Test the concurrent index operation builds a plain index outside PostgreSQL, and can be reversed."""
+        index = models.Index(fields=['location'], name='report_location_test_idx')
+        operation = AddIndexConcurrently('report', index)
+        from_state = ProjectState.from_apps(apps)
+        to_state = from_state.clone()
+        operation.state_forwards('api_report', to_state)
+
+        def index_names():
+            with connection.cursor() as cursor:
+                return set(connection.introspection.get_constraints(cursor, Report._meta.db_table))
+
+        with connection.schema_editor(atomic=False) as editor:
+            operation.database_forwards('api_report', editor, from_state, to_state)
+        self.assertIn('report_location_test_idx', index_names())
+        with connection.schema_editor(atomic=False) as editor:
+            operation.database_backwards('api_report', editor, to_state, from_state)
+        self.assertNotIn('report_location_test_idx', index_names())
+
+class ReportSearchTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='reporter@example.com', username='reporter', password='password123')
+        self.admin = User.objects.create_superuser(email='admin@example.com', username='adminuser', password='password123')
+        self.petugas = Petugas.objects.create_petugas(email='petugas@example.com', username='petugasuser',
+                                                      password='password123', jabatan='Staff')
+        self.road = Report.objects.create(id_user=self.user, category='infrastructure',
+                                          description='Jalan rusak parah dekat sekolah', location='Jakarta Selatan')
+        self.bridge = Report.objects.create(id_user=self.user, category='infrastructure',
+                                            description='Jembatan retak di atas sungai', location='Jalan Sudirman')
+        self.health = Report.objects.create(id_user=self.user, category='health',
+                                            description='Puskesmas kekurangan obat', location='Bandung')
+        self.road.update_status('in_progress', 'Sedang ditangani')
+
+    def search(self, user, **params):
+        access = str(tokens_for_user(user).access_token)
+        return self.client.get(reverse('api_report:search_reports'), params, HTTP_AUTHORIZATION=f'Bearer {access}')
+
+    def found(self, user=None, **params):
+        response = self.search(user or self.admin, **params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [report['id'] for report in response.json()['reports']]
+
+    def test_prefix_and_ranking(self):
+        """Test the last word matches as a prefix and description matches rank above location matches."""
+        self.assertEqual(self.found(q='jalan'), [str(self.road.id_report), str(self.bridge.id_report)])
+        self.assertEqual(self.found(q='jalan rus'), [str(self.road.id_report)])
+        self.assertEqual(self.found(q='puskes'), [str(self.health.id_report)])
+        self.assertEqual(self.found(q='kebakaran'), [])
+
+    def test_filters_and_pages(self):
+        """Test category, status and date filters narrow the search, and pages do not overlap."""
+        self.assertEqual(self.found(q='jalan', status='new'), [str(self.bridge.id_report)])
+        self.assertEqual(self.found(q='jalan', category='health'), [])
+        today = timezone.localdate().isoformat()
+        self.assertEqual(len(self.found(q='jalan', date_from=today, date_to=today)), 2)
+        self.assertEqual(self.found(q='jalan', date_to='2000-01-01'), [])
+
+        first = self.search(self.admin, q='jalan', page_size=1).json()
+        second = self.search(self.admin, q='jalan', page_size=1, page=2).json()
+        self.assertTrue(first['has_more'])
+        self.assertFalse(second['has_more'])
+        self.assertEqual([first['reports'][0]['id'], second['reports'][0]['id']],
+                         [str(self.road.id_report), str(self.bridge.id_report)])
+
+    def test_index_follows_updates(self):
+        """Test edited and deleted reports are searched by their current text."""
+        Report.objects.filter(pk=self.health.pk).update(description='Banjir merendam rumah warga')
+        self.assertEqual(self.found(q='puskesmas'), [])
+        self.assertEqual(self.found(q='banjir'), [str(self.health.id_report)])
+        self.bridge.delete()
+        self.assertEqual(self.found(q='jalan'), [str(self.road.id_report)])
+
+    def test_access_and_errors(self):
+        """Test petugas only find reports being handled, reporters cannot search, and bad parameters are rejected."""
+        self.assertEqual(self.found(self.petugas, q='jalan'), [str(self.road.id_report)])
+        self.assertEqual(self.search(self.user, q='jalan').status_code, status.HTTP_403_FORBIDDEN)
+        for params in ({}, {'q': 'jalan', 'category': 'weather'}, {'q': 'jalan', 'status': 'lost'},
+                       {'q': 'jalan', 'date_from': 'yesterday'}, {'q': 'jalan', 'date_from': '2024-02-30'},
+                       {'q': 'jalan', 'date_to': '9999-12-31'},
+                       {'q': 'jalan', 'page': 'two'},
+                       {'q': 'jalan', 'page': 0}, {'q': 'jalan', 'page': MAX_SEARCH_PAGE + 1},
+                       {'q': 'jalan', 'page_size': 0}):
+            self.assertEqual(self.search(self.admin, **params).status_code, status.HTTP_400_BAD_REQUEST)
+
+class ReportFilterTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='reporter@example.com', username='reporter', password='password123')
+        self.other = User.objects.create_user(email='other@example.com', username='otheruser', password='password123')
+        self.admin = User.objects.create_superuser(email='admin@example.com', username='adminuser', password='password123')
+        self.petugas = Petugas.objects.create_petugas(email='petugas@example.com', username='petugasuser',
+                                                      password='password123', jabatan='Staff')
+        self.reports = {}
+        now = timezone.now()
+        for name, user, category, keterangan, age in (
+            ('fresh', self.user, 'health', 'new', 0),
+            ('handled', self.other, 'health', 'in_progress', 1),
+            ('old', self.user, 'crime', 'new', 500),
+            ('rejected', self.other, 'crime', 'rejected', 2),
+        ):
+            report = Report.objects.create(id_user=user, category=category,
+                                           description=f'Laporan {name} di kota', location='Jakarta Selatan')
+            Report.objects.filter(pk=report.pk).update(created_at=now - timedelta(days=age))
+            if keterangan != 'new':
+                report.update_status(keterangan, 'Diperbarui', self.petugas if keterangan == 'in_progress' else None)
+            self.reports[name] = str(report.id_report)
+
+    def get(self, user=None, **params):
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {tokens_for_user(user).access_token}'} if user else {}
+        return self.client.get(reverse('api_report:get_report'), params, **headers)
+
+    def found(self, user=None, **params):
+        response = self.get(user, **params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.content)
+        return {self.reports_by_id[report['id']] for report in response.json()['reports']}
+
+    @property
+    def reports_by_id(self):
+        return {id_report: name for name, id_report in self.reports.items()}
+
+    def test_public_filters(self):
+        """Test category, status and date filters combine on the public list."""
+        self.assertEqual(self.found(category='health'), {'fresh', 'handled'})
+        self.assertEqual(self.found(category='crime'), {'old'})
+        self.assertEqual(self.found(status='in_progress'), {'handled'})
+        self.assertEqual(self.found(category='health', status='new'), {'fresh'})
+        yesterday = (timezone.localdate() - timedelta(days=1)).isoformat()
+        self.assertEqual(self.found(date_from=yesterday), {'fresh', 'handled'})
+        self.assertEqual(self.found(date_to=yesterday, category='health'), {'handled'})
+
+    def test_public_limits(self):
+        """Test unindexed filters alone are capped to the recent window, and wide or staff-only filters are rejected."""
+        # Every status has its partial index on current_status
+        self.assertEqual(self.found(status='new'), {'fresh', 'old'})
+        # A filter without an index, and without another indexed filter, only covers the last year
+        with mock.patch.dict(STATUS_INDEXES, clear=True):
+            self.assertEqual(self.found(status='new'), {'fresh'})
+            self.assertEqual(self.found(status='new', category='crime'), {'old'})
+            # The recent window would start before the first representable datetime
+            self.assertEqual(self.get(status='new', date_to='0001-01-02').status_code, status.HTTP_400_BAD_REQUEST)
+        for params in ({'date_from': '2000-01-01'}, {'reporter': str(self.user.pk)},
+                       {'petugas': str(self.petugas.pk)}, {'category': 'weather'}, {'status': 'lost'},
+                       {'date_from': '01-02-2024'}, {'date_from': '2024-02-30'}, {'date_to': '2024-13-01'},
+                       {'date_to': '9999-12-31'},
+                       {'date_from': '2024-02-02', 'date_to': '2024-02-01'}):
+            response = self.get(**params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+            self.assertIn('error', response.json())
+        response = self.client.get(reverse('api_report:get_report') + '?category=health&category=crime')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_staff_filters(self):
+        """Test staff can filter by reporter and petugas, over the reports their role can see, without the caps."""
+        self.assertEqual(self.found(self.admin, reporter=str(self.user.pk)), {'fresh', 'old'})
+        self.assertEqual(self.found(self.admin, status='new'), {'fresh', 'old'})
+        self.assertEqual(self.found(self.admin, date_from='2000-01-01', category='crime'), {'old', 'rejected'})
+        self.assertEqual(self.found(self.admin, petugas=str(self.petugas.pk)), {'handled'})
+        self.assertEqual(self.found(self.petugas, reporter=str(self.other.pk)), {'handled'})
+        self.assertEqual(self.get(self.admin, reporter='nobody').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.get(self.admin, date_to='2023-02-29').status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.get(self.admin, date_to='9999-12-31').status_code, status.HTTP_400_BAD_REQUEST)
+        # Midnight of 0001-01-01 east of UTC is before the first representable UTC datetime
+        with override_settings(TIME_ZONE='Asia/Jakarta'):
+            self.assertEqual(self.get(self.admin, date_from='0001-01-01').status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(REPORT_FILTERS={'MAX_DATE_RANGE_DAYS': 1000})
+    def test_date_range_setting(self):
+        """Test MAX_DATE_RANGE_DAYS sets both the widest public range and the unindexed filter window."""
+        with mock.patch.dict(STATUS_INDEXES, clear=True):
+            self.assertEqual(self.found(status='new'), {'fresh', 'old'})
+        self.assertEqual(self.found(date_from=(timezone.localdate() - timedelta(days=900)).isoformat()),
+                         {'fresh', 'handled', 'old'})
+
+class ReportCurrentStatusTestCase(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='reporter@example.com', username='reporter', password='password123')
+        self.petugas = Petugas.objects.create_petugas(email='petugas@example.com', username='petugasuser',
+                                                      password='password123', jabatan='Staff')
+        self.report = Report.objects.create(id_user=self.user, category='health',
+                                            description='Laporan status di kota', location='Jakarta Selatan')
+
+    def assertInSync(self, report, keterangan):
+        stored = Report.objects.select_related('status').get(pk=report.pk)
+        self.assertEqual(stored.current_status, keterangan)
+        self.assertEqual(stored.status.keterangan, keterangan)
+        self.assertEqual(stored.status_updated_at, stored.status.waktu_update)
+        self.assertEqual((report.current_status, report.status_updated_at), (keterangan, stored.status_updated_at))
+
+    def test_status_changes_keep_report_in_sync(self):
+        """Test creating, updating, assigning and petugas updates write the status and its copy on the report."""
+        self.assertEqual(self.report.current_status, 'new')
+        self.assertTrue(self.report.is_new())
+        self.report.assign_officer(self.petugas)
+        self.assertInSync(self.report, 'in_progress')
+        self.assertEqual(self.report.status.id_petugas, self.petugas)
+        self.report.update_status_petugas('completed', 'Selesai ditangani', self.petugas)
+        self.assertInSync(self.report, 'completed')
+        self.assertTrue(self.report.is_completed())
+        self.assertFalse(self.report.is_new())
+        with self.assertRaises(DjangoValidationError):
+            self.report.update_status_petugas('rejected', 'Ditolak')
+        self.assertInSync(self.report, 'completed')
+
+        # A report without a Status row gets one
+        Status.objects.filter(id_laporan=self.report).delete()
+        report = Report.objects.get(pk=self.report.pk)
+        report.update_status('rejected', 'Ditolak')
+        self.assertInSync(report, 'rejected')
+
+    def test_status_filters_need_no_join(self):
+        """Test role scoping and status filters read current_status without joining Status."""
+        self.report.update_status('in_progress', 'Sedang ditangani', self.petugas)
+        queries = (
+            Report.objects.filter(current_status__in=['in_progress', 'completed']),
+            Report.objects.exclude(current_status='rejected'),
+            filter_reports(Report.objects.all(), QueryDict('status=in_progress')),
+        )
+        for queryset in queries:
+            self.assertNotIn('api_report_status', str(queryset.query))
+            self.assertEqual(list(queryset), [self.report])
+
+    def test_status_view_updates_report(self):
+        """Test the update-status endpoint changes the status the lists filter on."""
+        admin = User.objects.create_superuser(email='admin@example.com', username='adminuser', password='password123')
+        response = self.client.post(
+            reverse('api_report:update_report_status', args=[self.report.pk]),
+            json.dumps({'status': 'rejected', 'detail': 'Laporan tidak valid'}), content_type='application/json',
+            HTTP_AUTHORIZATION=f'Bearer {tokens_for_user(admin).access_token}',
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.content)
+        self.report.refresh_from_db()
+        self.assertInSync(self.report, 'rejected')
+        response = self.client.get(reverse('api_report:get_report'))
+        self.assertEqual(response.json()['reports'], [])
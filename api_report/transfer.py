@@ -0,0 +1,244 @@
+"""
+Bulk export and import of reports with their status, for the `export_reports`
+and `import_reports` commands.
+
+On PostgreSQL rows move through `COPY ... TO STDOUT` / `COPY ... FROM STDIN`;
+elsewhere they are read with a cursor iterator and written with one batched
+`executemany` per table. Imports bypass `Report.objects.create_report` and the
+`create_report_status` signal: rows are validated a batch at a time and each
+batch is written with one statement per table, Status rows included.
+"""
+import csv
+import datetime
+import io
+import re
+import uuid
+from django.core.exceptions import ValidationError
+from django.core.validators import URLValidator
+from django.db import connections, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from api_auth.models import User
+from .models import Report, Status, ALLOWED_TEXT_PATTERN, INJECTION_PATTERN
+
+# CSV header of exports, and the columns understood by imports
+EXPORT_COLUMNS = (
+    'id_report', 'id_user', 'category', 'description', 'location', 'evidance', 'created_at',
+    'status', 'detail_status', 'id_petugas', 'status_updated_at',
+)
+
+# The ORM path of each export column
+EXPORT_FIELDS = (
+    'id_report', 'id_user_id', 'category', 'description', 'location', 'evidance', 'created_at',
+    'current_status', 'status__detail_status', 'status__id_petugas_id', 'status_updated_at',
+)
+
+CATEGORIES = frozenset(dict(Report.category_choices))
+STATUSES = frozenset(dict(Status.status_choices))
+TAG_RE = re.compile(r'<[^>]*>')
+ALLOWED_TEXT_RE = re.compile(ALLOWED_TEXT_PATTERN)
+INJECTION_RE = re.compile(INJECTION_PATTERN)
+URL_VALIDATOR = URLValidator()
+
+def export_reports(output, queryset=None, using='default'):
+    """
+    Write reports and their status to `output` as CSV with an EXPORT_COLUMNS
+    header, oldest first. Returns the number of reports written.
+    """
+    queryset = (queryset if queryset is not None else Report.objects.all()).using(using)
+    queryset = queryset.order_by('created_at', 'id_report').values_list(*EXPORT_FIELDS)
+    connection = connections[using]
+
+    if connection.vendor == 'postgresql':
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            query = cursor.mogrify(sql, params)
+            query = query.decode() if isinstance(query, bytes) else query
+            output.write(','.join(EXPORT_COLUMNS) + '\n')
+            _copy(cursor, f'COPY ({query}) TO STDOUT WITH (FORMAT csv)', output, to_stdout=True)
+            # COPY reports the number of rows it copied
+            return cursor.cursor.rowcount
+
+    writer = csv.writer(output, lineterminator='\n')
+    writer.writerow(EXPORT_COLUMNS)
+    count = 0
+    for row in queryset.iterator(chunk_size=2000):
+        writer.writerow(_csv_value(value) for value in row)
+        count += 1
+    return count
+
+def import_reports(rows, using='default'):
+    """
+    Import one batch of CSV rows (dicts keyed by EXPORT_COLUMNS) in a single
+    transaction. Reports whose id_report already exists are skipped.
+
+    Returns:
+        (counts, errors): counts of imported, skipped and invalid rows, and
+        (row number in the batch, message) for each invalid row.
+    """
+    counts = {'imported': 0, 'skipped': 0, 'invalid': 0}
+    errors = []
+    candidates = []
+    for number, row in enumerate(rows):
+        try:
+            candidates.append({**_clean_row(row), 'number': number})
+        except ValidationError as e:
+            counts['invalid'] += 1
+            errors.append((number, e.messages[0]))
+
+    # One lookup per batch for every referenced user and already imported report
+    user_ids = {row['id_user'] for row in candidates} | {row['id_petugas'] for row in candidates if row['id_petugas']}
+    known_users = set(User.objects.using(using).filter(pk__in=user_ids).values_list('pk', flat=True))
+    existing = set(Report.objects.using(using).filter(
+        pk__in=[row['id_report'] for row in candidates]
+    ).values_list('pk', flat=True))
+
+    reports, statuses = [], []
+    seen = set()
+    for row in candidates:
+        if row['id_report'] in existing or row['id_report'] in seen:
+            counts['skipped'] += 1
+            continue
+        if row['id_user'] not in known_users or (row['id_petugas'] and row['id_petugas'] not in known_users):
+            counts['invalid'] += 1
+            errors.append((row['number'], 'Unknown user'))
+            continue
+        seen.add(row['id_report'])
+        reports.append(Report(
+            id_report=row['id_report'], id_user_id=row['id_user'], category=row['category'],
+            description=row['description'], location=row['location'], evidance=row['evidance'],
+            created_at=row['created_at'], current_status=row['status'], status_updated_at=row['status_updated_at'],
+        ))
+        statuses.append(Status(
+            id_laporan_id=row['id_report'], keterangan=row['status'], detail_status=row['detail_status'],
+            id_petugas_id=row['id_petugas'], waktu_update=row['status_updated_at'],
+        ))
+
+    with transaction.atomic(using=using):
+        insert_rows(Report, reports, using)
+        insert_rows(Status, statuses, using)
+    counts['imported'] = len(reports)
+    return counts, errors
+
+def insert_rows(model, objects, using='default'):
+    """
+    Insert unsaved `objects` with one COPY (PostgreSQL) or one executemany.
+    Field values are written as they are: no save(), no signals, and
+    auto_now/auto_now_add fields keep the values set on the objects.
+    """
+    if not objects:
+        return
+    connection = connections[using]
+    fields = model._meta.concrete_fields
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+    table = connection.ops.quote_name(model._meta.db_table)
+    rows = [
+        [field.get_db_prep_save(getattr(obj, field.attname), connection) for field in fields]
+        for obj in objects
+    ]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            data = io.StringIO(''.join('\t'.join(_copy_text(value) for value in row) + '\n' for row in rows))
+            _copy(cursor, f'COPY {table} ({columns}) FROM STDIN', data, to_stdout=False)
+        else:
+            placeholders = ', '.join(['%s'] * len(fields))
+            cursor.executemany(f'INSERT INTO {table} ({columns}) VALUES ({placeholders})', rows)
+
+def _clean_row(row):
+    """
+    Validated values of one CSV row, with the same rules as
+    `ReportManager.create_report` and defaults for the status columns.
+
+    Raises:
+        ValidationError: With the first problem found in the row.
+    """
+    def value(column):
+        text = (row.get(column) or '').strip()
+        return text or None
+
+    try:
+        id_report = uuid.UUID(value('id_report')) if value('id_report') else uuid.uuid4()
+        id_user = uuid.UUID(value('id_user') or '')
+        id_petugas = uuid.UUID(value('id_petugas')) if value('id_petugas') else None
+    except ValueError:
+        raise ValidationError('Invalid id')
+
+    category = value('category') or 'other'
+    if category not in CATEGORIES:
+        raise ValidationError(f'Invalid category: {category}')
+    keterangan = value('status') or 'new'
+    if keterangan not in STATUSES:
+        raise ValidationError(f'Invalid status: {keterangan}')
+
+    description = _clean_text(value('description'), 'Description', 10)
+    location = _clean_text(value('location'), 'Location', 5)
+
+    evidance = value('evidance')
+    if evidance:
+        evidance = TAG_RE.sub('', evidance)
+        try:
+            URL_VALIDATOR(evidance)
+        except ValidationError:
+            raise ValidationError('Invalid evidance URL')
+
+    created_at = _parse_timestamp(value('created_at'), 'created_at') or timezone.now()
+    status_updated_at = _parse_timestamp(value('status_updated_at'), 'status_updated_at') or created_at
+    return {
+        'id_report': id_report, 'id_user': id_user, 'category': category,
+        'description': description, 'location': location, 'evidance': evidance,
+        'created_at': created_at, 'status': keterangan,
+        'detail_status': value('detail_status') or 'Laporan baru dibuat dan menunggu verifikasi',
+        'id_petugas': id_petugas, 'status_updated_at': status_updated_at,
+    }
+
+def _clean_text(text, label, min_length):
+    if not text:
+        raise ValidationError(f'{label} is required')
+    if len(text) < min_length:
+        raise ValidationError(f'{label} is too short')
+    text = TAG_RE.sub('', text)
+    if not ALLOWED_TEXT_RE.match(text) or INJECTION_RE.search(text):
+        raise ValidationError(f'{label} contains invalid characters or patterns')
+    return text
+
+def _parse_timestamp(text, column):
+    if not text:
+        return None
+    try:
+        parsed = parse_datetime(text)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError(f'Invalid {column}')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, datetime.timezone.utc)
+    return parsed
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+def _copy_text(value):
+    """A value in COPY's text format: \\N for NULL, with backslashes and separators escaped."""
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    text = value.isoformat() if hasattr(value, 'isoformat') else str(value)
+    return text.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+def _copy(cursor, sql, file, to_stdout):
+    """Run COPY with psycopg2 (`copy_expert`) or psycopg 3 (`copy`)."""
+    if hasattr(cursor.cursor, 'copy_expert'):
+        cursor.cursor.copy_expert(sql, file)
+        return
+    with cursor.cursor.copy(sql) as copy:
+        if to_stdout:
+            for data in copy:
+                file.write(bytes(data).decode())
+        else:
+            while chunk := file.read(65536):
+                copy.write(chunk)
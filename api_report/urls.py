@@ -7,6 +7,8 @@ from api_report.views import (
     get_report_by_id,
     get_report_by_user,
     get_report,
+    export_reports,
+    search_report,
     update_report_status,
     update_report_status_petugas,
     assign_report,
@@ -28,4 +30,6 @@ urlpatterns = [
     path('<uuid:report_id>/update-status/', update_report_status, name='update_report_status'),
     path('user/', get_report_by_user, name='get_report_by_user'),
     path('get-report/', get_report, name='get_report'),
+    path('export/', export_reports, name='export_reports'),
+    path('search/', search_report, name='search_reports'),
 ]
\ No newline at end of file
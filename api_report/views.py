@@ -3,11 +3,15 @@ from django.forms import ValidationError
 from django.http import JsonResponse
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from api_auth.permissions import IsAdmin, IsPetugas
+from api_auth.permissions import IsAdmin, IsPetugas, request_is_admin, request_is_petugas
 from django.contrib.auth import get_user_model
 from rest_framework.request import Request
 from django.views.decorators.csrf import csrf_exempt
 from .models import Report, ReportManager
+from .pagination import ReportCursorPaginator, InvalidCursor, get_pagination_settings
+from .streaming import STREAM_FORMATS, stream_reports
+from .search import MAX_SEARCH_PAGE, search_reports
+from .filters import InvalidFilter, filter_reports
 from api_auth.models import User
 import json
 
@@ -121,10 +125,17 @@ def get_report_by_user(request):
     if request.method == 'GET':
         try:
             user = request.user
-            reports = Report.objects.filter(id_user=user)
+            paginator = ReportCursorPaginator.from_request(request)
+            # Reports and their status in one joined query, as row tuples
+            rows, next_cursor = paginator.paginate(
+                Report.list_values(Report.objects.filter(id_user=user)), key=Report.row_key
+            )
             return JsonResponse({
-                'reports': [report.to_dict() for report in reports]
+                'reports': [Report.row_to_dict(row) for row in rows],
+                'next_cursor': next_cursor,
             }, status=200)
+        except InvalidCursor as e:
+            return JsonResponse({'error': str(e)}, status=400)
         except Report.DoesNotExist:
             return JsonResponse({'error': 'No report found'}, status=404)
     else:
@@ -138,20 +149,28 @@ Method for getting reports by user role
 def get_report(request):
     if request.method == 'GET':
         try:
-            reports = Report.objects.all()
             # Get reports by user role
-            if request.user.is_petugas:
+            staff = True
+            if request_is_petugas(request):
                 reports = Report.objects.filter(
-                    status__keterangan__in=['in_progress', 'completed']
-                ).select_related('status').order_by('-created_at')
-            elif request.user.is_admin:
-                reports = Report.objects.all().order_by('-created_at')
+                    current_status__in=['in_progress', 'completed'])
+            elif request_is_admin(request):
+                reports = Report.objects.all()
             else:
+                staff = False
                 reports = Report.objects.exclude(
-                    status__keterangan='rejected').order_by('-created_at')
+                    current_status='rejected')
+
+            # ?category=, ?status=, ?date_from=, ?date_to=, and for staff ?petugas=, ?reporter=
+            reports = filter_reports(reports, request.GET, staff=staff)
+
+            # Newest first, one page per request, ?cursor= from the previous page's next_cursor
+            paginator = ReportCursorPaginator.from_request(request)
+            rows, next_cursor = paginator.paginate(Report.list_values(reports), key=Report.row_key)
 
             return JsonResponse({
-                'reports': [report.to_dict() for report in reports]
+                'reports': [Report.row_to_dict(row) for row in rows],
+                'next_cursor': next_cursor,
             }, status=200)
             
         except Exception as e:
@@ -159,6 +178,68 @@ def get_report(request):
     
     return JsonResponse({'error': 'Invalid request method'}, status=405)
 
+"""
+Method for searching reports
+"""
+@api_view(['GET'])
+@permission_classes([IsPetugas | IsAdmin])
+def search_report(request: Request):
+    try:
+        text = request.GET.get('q', '').strip()
+        if not text:
+            return JsonResponse({'error': 'Search query (q) is required'}, status=400)
+
+        # Petugas only see the reports they can work on, as in get_report
+        if request_is_admin(request):
+            reports = Report.objects.all()
+        else:
+            reports = Report.objects.filter(current_status__in=['in_progress', 'completed'])
+
+        # Filters are part of the same indexed search query
+        reports = filter_reports(reports, request.GET, staff=True)
+
+        config = get_pagination_settings()
+        try:
+            page = int(request.GET.get('page', 1))
+            page_size = int(request.GET.get('page_size', config['PAGE_SIZE']))
+        except ValueError:
+            return JsonResponse({'error': 'page and page_size must be numbers'}, status=400)
+        # Pages are read with OFFSET, so only the first few are served
+        if not 1 <= page <= MAX_SEARCH_PAGE:
+            return JsonResponse({'error': f'page must be between 1 and {MAX_SEARCH_PAGE}, narrow the search instead'}, status=400)
+        if page_size < 1:
+            return JsonResponse({'error': 'page_size must be at least 1'}, status=400)
+        page_size = min(page_size, config['MAX_PAGE_SIZE'])
+
+        # Best matches first, one extra row tells whether there is a next page
+        start = (page - 1) * page_size
+        rows = list(search_reports(reports, text).values_list(*Report.LIST_FIELDS, 'rank')[start:start + page_size + 1])
+        return JsonResponse({
+            'reports': [{**Report.row_to_dict(row[:-1]), 'rank': row[-1]} for row in rows[:page_size]],
+            'page': page,
+            'has_more': len(rows) > page_size and page < MAX_SEARCH_PAGE,
+        }, status=200)
+
+    except InvalidFilter as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+"""
+Method for exporting every report as a stream
+"""
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def export_reports(request: Request):
+    # ?output=ndjson (default) or ?output=json, `format` is taken by DRF's content negotiation
+    stream_format = request.GET.get('output', 'ndjson')
+    if stream_format not in STREAM_FORMATS:
+        return JsonResponse({'error': f'Invalid output. Must be one of: {", ".join(STREAM_FORMATS)}'}, status=400)
+
+    try:
+        reports = filter_reports(Report.objects.all(), request.GET, staff=True)
+    except InvalidFilter as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return stream_reports(reports, stream_format, filename='reports')
+
 """
 Method for updating report status
 """
@@ -173,13 +254,17 @@ def update_report_status(request, report_id):
         new_status = data.get('status')
         detail = data.get('detail')
 
-        if not user.is_petugas and not user.is_admin:
+        # Roles come from the verified token's claims, no extra lookup needed
+        is_petugas = request_is_petugas(request)
+        is_admin = request_is_admin(request)
+
+        if not is_petugas and not is_admin:
             return JsonResponse({'error': 'Unauthorized'}, status=401)
 
-        if user.is_petugas and new_status not in ['in_progress', 'completed']:
+        if is_petugas and new_status not in ['in_progress', 'completed']:
             return JsonResponse({'error': 'Invalid status for petugas'}, status=400)
         
-        if user.is_admin and new_status not in ['in_progress', 'completed', 'rejected']:
+        if is_admin and new_status not in ['in_progress', 'completed', 'rejected']:
             return JsonResponse({'error': 'Invalid status for admin'}, status=400)
 
         report.update_status(new_status, detail, request.user)
@@ -0,0 +1,79 @@
+from django.apps import apps
+from django.db import connections, router
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete
+from .models import RowCounter
+
+# Large tables whose size is shown in admin statistics and admin list pages
+COUNTED_MODELS = (
+    'api_auth.User',
+    'api_auth.Petugas',
+    'api_article.Artikel',
+    'api_article.Komentar',
+)
+
+def _postgres_estimate(connection, table):
+    """Planner row estimate from pg_class, None if the table was never analyzed."""
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)', [table])
+        row = cursor.fetchone()
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return row[0]
+
+def exact_count(model):
+    """Exact row count, also used to (re)seed the model's RowCounter."""
+    count = model._base_manager.count()
+    if model._meta.label in COUNTED_MODELS:
+        RowCounter.objects.update_or_create(table=model._meta.db_table, defaults={'count': count})
+    return count
+
+def estimated_count(model, exact=False):
+    """
+    Row count of `model`'s table without a full `COUNT(*)`.
+
+    On PostgreSQL this is `pg_class.reltuples`, kept current by autovacuum/ANALYZE,
+    with an exact count for tables not analyzed yet (those are small).
+    Elsewhere it is the maintained RowCounter, which is seeded with an exact
+    count the first time it is needed.
+    Pass `exact=True` for a real `COUNT(*)`.
+    """
+    if exact:
+        return exact_count(model)
+
+    table = model._meta.db_table
+    connection = connections[router.db_for_read(model)]
+    if connection.vendor == 'postgresql':
+        estimate = _postgres_estimate(connection, table)
+        return estimate if estimate is not None else model._base_manager.count()
+
+    counter = RowCounter.objects.filter(table=table).values_list('count', flat=True).first()
+    if counter is None:
+        return exact_count(model)
+    return max(counter, 0)
+
+def _adjust_counter(sender, delta):
+    # A missing counter is left alone, it is seeded exactly on first use
+    RowCounter.objects.filter(table=sender._meta.db_table).update(count=F('count') + delta)
+
+def count_created_row(sender, instance, created, raw=False, **kwargs):
+    if created:
+        _adjust_counter(sender, 1)
+
+def count_deleted_row(sender, instance, **kwargs):
+    _adjust_counter(sender, -1)
+
+def connect_counters():
+    """
+    Keep the RowCounter of every model in COUNTED_MODELS in step with inserts and deletes.
+    Not needed on PostgreSQL, which estimates from pg_class instead.
+    """
+    for label in COUNTED_MODELS:
+        try:
+            model = apps.get_model(label)
+        except LookupError:
+            continue
+        if connections[router.db_for_write(model)].vendor == 'postgresql':
+            continue
+        post_save.connect(count_created_row, sender=model, dispatch_uid=f'row_counter_save_{label}')
+        post_delete.connect(count_deleted_row, sender=model, dispatch_uid=f'row_counter_delete_{label}')
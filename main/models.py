@@ -1,3 +1,18 @@
 from django.db import models
 
-# Create your models here.
+class RowCounter(models.Model):
+    """
+    Row count of a table, kept up to date by `main.counts` signal receivers.
+    Used for estimated counts where the database has no cheap estimate of its own.
+
+    **Fields:**
+        - table: CharField, primary key, database table name
+        - count: BigIntegerField, number of rows
+        - updated_at: DateTimeField, last time the count was recalculated exactly
+    """
+    table = models.CharField(max_length=128, primary_key=True)
+    count = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.table}: {self.count}"
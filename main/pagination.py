@@ -0,0 +1,21 @@
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+from .counts import estimated_count
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Admin paginator that uses `estimated_count` for unfiltered change lists,
+    so opening a large table does not run `COUNT(*)`. Filtered and searched
+    lists are counted exactly, they are usually much smaller.
+
+    Usage:
+    class ArtikelAdmin(admin.ModelAdmin):
+        paginator = EstimatedCountPaginator
+        show_full_result_count = False
+    """
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where and not query.distinct:
+            return estimated_count(self.object_list.model)
+        return super().count
@@ -1,3 +1,55 @@
 from django.test import TestCase
+from django.urls import reverse
+from api_auth.models import User, Petugas, Admin
+from api_auth.tokens import tokens_for_user
+from main.counts import estimated_count
+from main.models import RowCounter
+from main.pagination import EstimatedCountPaginator
 
-# Create your tests here.
+class EstimatedCountTestCase(TestCase):
+    def create_users(self, count, prefix='count'):
+        return [
+            User.objects.create_user(email=f'{prefix}{i}@example.com', username=f'{prefix}{i}', password='password123')
+            for i in range(count)
+        ]
+
+    def test_counter_is_seeded_then_maintained(self):
+        """Test the row counter is seeded with an exact count and then follows inserts and deletes."""
+        self.create_users(3)
+        self.assertEqual(estimated_count(User), 3)
+        self.assertEqual(RowCounter.objects.get(table=User._meta.db_table).count, 3)
+
+        users = self.create_users(2, prefix='more')
+        users[0].delete()
+        with self.assertNumQueries(1):
+            self.assertEqual(estimated_count(User), 4)
+
+    def test_exact_count_reseeds_counter(self):
+        """Test exact=True runs a real count and corrects a drifted counter."""
+        self.create_users(2)
+        estimated_count(User)
+        RowCounter.objects.filter(table=User._meta.db_table).update(count=100)
+        self.assertEqual(estimated_count(User), 100)
+        self.assertEqual(estimated_count(User, exact=True), 2)
+        self.assertEqual(estimated_count(User), 2)
+
+    def test_paginator_estimates_only_unfiltered_lists(self):
+        """Test the admin paginator uses the estimate for full tables and counts filtered lists exactly."""
+        self.create_users(3)
+        estimated_count(User)
+        RowCounter.objects.filter(table=User._meta.db_table).update(count=50)
+        self.assertEqual(EstimatedCountPaginator(User.objects.order_by('email'), 10).count, 50)
+        self.assertEqual(EstimatedCountPaginator(User.objects.filter(username='count1').order_by('email'), 10).count, 1)
+
+    def test_protected_admin_counts(self):
+        """Test protected_admin reports user and petugas counts."""
+        admin = Admin.objects.create_admin(email='counts@example.com', username='countsadmin', password='password123')
+        Petugas.objects.create_petugas(email='p@example.com', username='countspetugas', password='password123', jabatan='Staf')
+        response = self.client.get(
+            reverse('api_auth:protected_admin') + '?exact=1',
+            HTTP_AUTHORIZATION=f'Bearer {tokens_for_user(admin).access_token}',
+        )
+        stats = response.json()['system_stats']
+        self.assertEqual(stats['total_users'], 2)
+        self.assertEqual(stats['total_petugas'], 1)
+        self.assertTrue(stats['counts_exact'])
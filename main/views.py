@@ -1,6 +1,7 @@
 from django.shortcuts import render
 from django.http import JsonResponse, HttpResponse
 from api_auth.models import User
+from api_auth.utils import decrypt_phone_numbers
 from asgiref.sync import sync_to_async
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
@@ -11,7 +12,9 @@ import random
 
 async def index(request):
     users = await sync_to_async(list)(User.objects.all())
-    users_data = [{'id': user.id, 'email': user.email, 'username': user.username, 'name': user.name, 'nomor_telepon': user.nomor_telepon,} for user in users]
+    # Decrypt every phone number in one batch instead of per user
+    phones = decrypt_phone_numbers([user.nomor_telepon for user in users])
+    users_data = [{'id': user.id, 'email': user.email, 'username': user.username, 'name': user.name, 'nomor_telepon': phone,} for user, phone in zip(users, phones)]
     return JsonResponse(users_data, safe=False)
 
 @api_view(['GET'])
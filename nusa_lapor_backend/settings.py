@@ -41,6 +41,15 @@ CRYPTOGRAPHY_SETTINGS = {
     'mode': 'CBC',
 }
 
+# Fernet key ring for key rotation, comma-separated, newest first.
+# The first key encrypts, every key decrypts; run `manage.py rotate_phone_keys`
+# after adding a key, then drop the old one. Falls back to CRYPTOGRAPHY_KEY when unset
+CRYPTOGRAPHY_KEYS = config('CRYPTOGRAPHY_KEYS', default='')
+
+# HMAC key for the phone number blind index (api_auth.User.nomor_telepon_index).
+# Derived from SECRET_KEY when unset; changing it requires `manage.py backfill_phone_index --all`
+PHONE_BLIND_INDEX_KEY = config('PHONE_BLIND_INDEX_KEY', default=None)
+
 # Application definition
 
 INSTALLED_APPS = [
@@ -86,6 +95,7 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'allauth.account.middleware.AccountMiddleware',
+    'api_auth.middleware.HashingPoolFullMiddleware',
 ]
 
 AUTHENTICATION_BACKENDS = [
@@ -131,7 +141,7 @@ ACCOUNT_SIGNUP_FIELDS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api_auth.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_THROTTLE_CLASSES': [
         'api_auth.throttling.LoginRateThrottle',
@@ -165,6 +175,61 @@ SIMPLE_JWT = {
 
 AUTH_USER_MODEL = 'api_auth.User'
 
+# Cache shared by every worker on this host (see nusa_lapor_backend.cache),
+# so throttle counters are not multiplied by the number of workers.
+# CACHE_LOCATION: path of the SQLite file, keep it on local disk
+CACHES = {
+    'default': {
+        'BACKEND': 'nusa_lapor_backend.cache.SQLiteCache',
+        'LOCATION': config('CACHE_LOCATION', default=str(BASE_DIR / 'cache.sqlite3')),
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=100000, cast=int),
+            'CULL_FREQUENCY': 3,
+        },
+    }
+}
+
+# Tests run on an in-memory cache instead (see nusa_lapor_backend.test_runner)
+TEST_RUNNER = 'nusa_lapor_backend.test_runner.TestRunner'
+
+# Per-process filter of blacklisted token JTIs (see api_auth.blacklist)
+# SYNC_INTERVAL: seconds between pulls of rows blacklisted by other processes,
+# GENERATION_SECONDS: expiry window per Bloom filter generation,
+# CAPACITY / ERROR_RATE: sizing of each generation
+TOKEN_BLACKLIST_FILTER = {
+    'SYNC_INTERVAL': config('TOKEN_BLACKLIST_SYNC_INTERVAL', default=5, cast=int),
+    'SYNC_OVERLAP': 100,
+    'GENERATION_SECONDS': 3600,
+    'CAPACITY': 10000,
+    'ERROR_RATE': 0.01,
+}
+
+# Per-process cache of users resolved from JWTs (see api_auth.authentication)
+# MAX_SIZE: users kept per process, TTL: seconds before an entry is reloaded
+USER_CACHE = {
+    'MAX_SIZE': config('USER_CACHE_MAX_SIZE', default=1024, cast=int),
+    'TTL': config('USER_CACHE_TTL', default=60, cast=int),
+}
+
+# Password hashing
+# ALGORITHM: preferred hasher from api_auth.hashers, PARAMS: cost per algorithm
+# (use `python manage.py calibrate_hasher` to pick values for this machine).
+# Hashes made with another algorithm or cost are upgraded on the next login.
+# WORKERS: hashing threads per process, QUEUE_DEPTH: jobs allowed to wait for a worker,
+# RETRY_AFTER: seconds advertised to clients when the pool is full
+PASSWORD_HASHING = {
+    'ALGORITHM': config('PASSWORD_HASHER', default='pbkdf2_sha256'),
+    'PARAMS': {
+        'pbkdf2_sha256': {'iterations': config('PASSWORD_HASHER_ITERATIONS', default=100000, cast=int)},
+        'scrypt': {'n': 2 ** 14, 'r': 8, 'p': 1},
+        'argon2': {'time_cost': 2, 'memory_cost': 65536, 'parallelism': 1},
+    },
+    'WORKERS': config('PASSWORD_HASHING_WORKERS', default=4, cast=int),
+    'QUEUE_DEPTH': config('PASSWORD_HASHING_QUEUE_DEPTH', default=16, cast=int),
+    'RETRY_AFTER': config('PASSWORD_HASHING_RETRY_AFTER', default=1, cast=int),
+}
+
 ROOT_URLCONF = 'nusa_lapor_backend.urls'
 
 TEMPLATES = [
@@ -257,4 +322,42 @@ CORS_ALLOW_CREDENTIALS = True
 CSRF_COOKIE_SECURE = True
 SESSION_COOKIE_SECURE = True
 CSRF_COOKIE_SAMESITE = 'None'
-SESSION_COOKIE_SAMESITE = 'None'
\ No newline at end of file
+SESSION_COOKIE_SAMESITE = 'None'
+
+# Session strategy for the JWT API (see api_auth.sessions)
+# 'db' (default): a django_session row per login, 'cached_db': the same, read through the cache,
+# 'signed_cookies': session kept in a signed cookie, no server-side writes,
+# 'none': API logins do not create a session at all (pure JWT clients).
+# SESSION_ENGINE follows it, and applies to the Django admin too: with
+# 'signed_cookies' admin sessions can no longer be revoked server-side,
+# with 'none' the admin keeps database sessions.
+API_SESSION_STRATEGY = config('API_SESSION_STRATEGY', default='db')
+SESSION_ENGINE = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+    'none': 'django.contrib.sessions.backends.db',
+}[API_SESSION_STRATEGY]
+
+
+# Cursor pagination of report lists (see api_report.pagination)
+# PAGE_SIZE: reports per page by default, MAX_PAGE_SIZE: upper bound for ?page_size=
+REPORT_PAGINATION = {
+    'PAGE_SIZE': config('REPORT_PAGE_SIZE', default=20, cast=int),
+    'MAX_PAGE_SIZE': config('REPORT_MAX_PAGE_SIZE', default=100, cast=int),
+}
+
+# Report list filters (see api_report.filters)
+# MAX_DATE_RANGE_DAYS: widest ?date_from=/?date_to= range on the public list, and the
+# window unindexed filters are limited to there when no indexed filter comes with them
+REPORT_FILTERS = {
+    'MAX_DATE_RANGE_DAYS': config('REPORT_MAX_DATE_RANGE_DAYS', default=366, cast=int),
+}
+
+# Streaming report exports (see api_report.streaming)
+# CHUNK_SIZE: rows fetched from the database per round trip,
+# WRITE_BATCH: encoded reports sent to the client per chunk of the response
+REPORT_EXPORT = {
+    'CHUNK_SIZE': config('REPORT_EXPORT_CHUNK_SIZE', default=2000, cast=int),
+    'WRITE_BATCH': config('REPORT_EXPORT_WRITE_BATCH', default=500, cast=int),
+}